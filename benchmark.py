@@ -0,0 +1,65 @@
+# benchmark.py
+"""
+Wall time of the worker-process paths against their serial versions.
+
+    python benchmark.py --workers 1,2,4,8
+
+Each case runs ``--repeat`` times per worker count on an already started
+pool, and the best time is reported along with the speedup over one
+worker. The results are checked to be identical for every worker count.
+"""
+import argparse
+import os
+import time
+
+from counting import bounded_arrangements_with_forbidden, get_executor, shutdown_executor
+from counting.parallel import parallel_count_with_min_requirements, parallel_schedule_slots_count
+
+PAIRS = [(1, 2), (2, 3), (5, 5), (7, 1)]
+CASES = {
+    "adjacency n=18": lambda w, ex: bounded_arrangements_with_forbidden(
+        18, 18, PAIRS, 256 * 2 ** 20, executor=ex, workers=w).value,
+    "team minimums": lambda w, ex: parallel_count_with_min_requirements(
+        [14, 15, 16, 17, 18, 19], [1, 2, 3, 1, 2, 0], 50, workers=w),
+    "schedule 24 people": lambda w, ex: parallel_schedule_slots_count(
+        [f"P{i}" for i in range(24)], 10, 4, [("P0", 0)], workers=w),
+}
+
+
+def run(workers, repeat):
+    rows = []
+    for name, case in CASES.items():
+        base = value = None
+        for w in workers:
+            ex = get_executor(w) if w > 1 else None
+            if ex is not None:
+                list(ex.map(abs, range(w)))  # start the processes outside the timing
+            best = float("inf")
+            for _ in range(repeat):
+                t = time.perf_counter()
+                got = case(w, ex)
+                best = min(best, time.perf_counter() - t)
+            if value is None:
+                value = got
+            elif got != value:
+                raise AssertionError(f"{name}: {w} workers gave {got}, expected {value}")
+            base = base or best
+            rows.append((name, w, best, base / best))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker-process speedup of the counting engines")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts; the first is the baseline")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    workers = [int(w) for w in args.workers.split(",")]
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'case':<20} {'workers':>7} {'best s':>8} {'speedup':>8}")
+    try:
+        for name, w, best, speedup in run(workers, args.repeat):
+            print(f"{name:<20} {w:>7} {best:>8.2f} {speedup:>7.2f}x")
+    finally:
+        shutdown_executor()
+
+if __name__ == "__main__":
+    main()
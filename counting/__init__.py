@@ -0,0 +1,58 @@
+# counting/__init__.py
+"""Combinatorics engines behind the Streamlit app."""
+from .core import (
+    arrangements_with_forbidden, count_with_at_most, count_with_exact_requirements,
+    count_with_min_requirements, inclusion_exclusion, multiset_permutations_count,
+    nCr, nPr, schedule_slots_count,
+)
+from .bigint import (
+    EDGE_DIGITS, INLINE_DIGITS, count_summary, digit_count, format_count,
+    leading_digits, log10_abs, scientific, scientific_from_log10,
+    to_decimal_string, trailing_digits,
+)
+from .approx import (
+    LogCount, approx_count_with_at_most, approx_count_with_exact_requirements,
+    approx_count_with_min_requirements, approx_multiset_permutations_count,
+    approx_nCr, approx_nPr, approx_schedule_slots_count, format_log_count,
+    log_factorial, log_percentage,
+)
+from .batch import (
+    DEFAULT_MODULUS, MODES, batch_multiset_permutations_count, batch_nCr, batch_nPr,
+    exact_factorials, lgamma_table, mod_factorial_tables,
+)
+from .multiset import constrained_multiset_count
+from .rook import count_forbidden_permutations, rook_polynomial, schedule_with_forbidden
+from .parallel import (
+    default_workers, get_executor, parallel_arrangements_with_forbidden, shutdown_executor,
+    parallel_count_with_min_requirements, parallel_schedule_slots_count,
+)
+from .budget import DEFAULT_MEMORY_BUDGET, DPResult, bounded_arrangements_with_forbidden
+from .incremental import IncrementalScheduleCounter, IncrementalTeamCounter
+from .sweep import sweep_arrangements_with_forbidden, sweep_schedule_slots_count, sweep_team_count, sweep_to_csv
+from .weighted import (
+    WeightedSchedule, WeightedTeam, parse_weight, weighted_schedule, weighted_schedule_count,
+    weighted_team_count, weighted_team_distribution,
+)
+from .bonferroni import BonferroniResult, BonferroniStep, bonferroni_bounds
+from .spec import (
+    AdjacencyProblem, ScheduleProblem, SetFamily, SpecError, TeamProblem, adjacency_problem, parse_ints,
+    parse_names, parse_nr_lines, parse_pairs, parse_set_family, parse_team_constraints, parse_weight_table,
+    parse_weights, schedule_problem, team_problem,
+)
+from .packed import (
+    FORMAT_VERSION, AdjacencySpec, BatchResult, BatchSpec, BlobCache, CountResult, Packed, ScheduleSpec, TeamSpec,
+    from_bytes,
+)
+from .cancel import CancelToken, Cancelled, cancel_scope, checkpoint
+from .aio import (
+    AsyncCounters, aarrangements_with_forbidden, abonferroni_bounds, abounded_arrangements_with_forbidden,
+    aconstrained_multiset_count, acount_forbidden_permutations, acount_with_at_most, acount_with_min_requirements,
+    aschedule_slots_count, aschedule_with_forbidden, aweighted_schedule, aweighted_team_distribution, get_default,
+    set_concurrency_limit,
+)
+from .transfer import MAX_EXACT_DIGITS, arrangements_with_repetition, transfer_matrix
+from .teams import GroupConstraint, count_with_constraints
+from .shard import (
+    FileCoordinator, RemoteCoordinator, ShardJob, ShardStatus, connect, count_job, count_shard, plan_adjacency,
+    plan_schedule, process_worker, run_worker, serve,
+)
@@ -0,0 +1,188 @@
+# counting/aio.py
+"""
+asyncio wrappers for the counters.
+
+``AsyncCounters.run`` moves a counter call off the event loop to a shared
+thread pool, with three guarantees:
+
+* Single flight: concurrent calls with equal arguments share one
+  computation. Arguments are compared by value; lists, dicts, sets and
+  NumPy arrays are frozen, and packed problems compare by digest. A call
+  with some other unhashable argument runs on its own.
+* Cancellation: cancelling a caller only detaches it. When the last caller
+  waiting on a computation is cancelled, the computation's ``CancelToken``
+  is triggered. The worker thread then raises ``Cancelled`` at its next
+  ``checkpoint()`` and exits instead of finishing the DP. The cancelled
+  computation leaves the single-flight table at once, so a later call with
+  the same arguments starts afresh rather than inheriting the cancellation.
+  The token only reaches this process: work already handed to a process
+  pool (the ``parallel_*`` counters, an ``executor`` given to
+  ``bounded_arrangements_with_forbidden``, shard workers) runs its current
+  tasks to the end, and the caller stops at its next checkpoint after that.
+* Concurrency limits: each calculator name can have a cap on simultaneous
+  computations. A slot is held until the worker thread has actually
+  stopped, including after a cancellation.
+
+The work is pure Python and holds the GIL, so threads keep the loop
+responsive rather than adding throughput. Use the ``parallel`` module for
+multi-core speed. An instance belongs to one event loop.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from .bonferroni import bonferroni_bounds
+from .budget import bounded_arrangements_with_forbidden
+from .cancel import CancelToken, cancel_scope, checkpoint
+from .core import arrangements_with_forbidden, count_with_at_most, count_with_min_requirements, schedule_slots_count
+from .multiset import constrained_multiset_count
+from .packed import Packed
+from .rook import count_forbidden_permutations, schedule_with_forbidden
+from .weighted import weighted_schedule, weighted_team_distribution
+
+
+def _freeze(x):
+    if isinstance(x, Packed):
+        return (type(x).__name__, x.digest)
+    if isinstance(x, dict):
+        return ("dict", frozenset((_freeze(k), _freeze(v)) for k, v in x.items()))
+    if isinstance(x, (set, frozenset)):
+        return ("set", frozenset(_freeze(v) for v in x))
+    if isinstance(x, (list, tuple)):
+        return tuple(_freeze(v) for v in x)
+    if isinstance(x, np.ndarray):
+        if x.dtype.hasobject:
+            return ("ndarray", x.shape, tuple(_freeze(v) for v in x.ravel().tolist()))
+        return ("ndarray", x.dtype.str, x.shape, x.tobytes())
+    return x
+
+def _call(token, fn, args, kwargs):
+    with cancel_scope(token):
+        checkpoint()
+        return fn(*args, **kwargs)
+
+
+class _Flight:
+    __slots__ = ("future", "token", "waiters")
+
+    def __init__(self):
+        self.future = None
+        self.token = CancelToken()
+        self.waiters = 0
+
+
+class AsyncCounters:
+    """Shared executor, single-flight table and per-calculator limits."""
+
+    def __init__(self, executor=None, max_workers=None, limits=None):
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._max_workers = max_workers
+        self._limits = dict(limits or {})
+        self._semaphores = {}
+        self._flights = {}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="counting")
+        return self._executor
+
+    def set_limit(self, name, limit):
+        """At most ``limit`` concurrent computations of ``name`` (None: unlimited)."""
+        self._limits[name] = limit
+        self._semaphores.pop(name, None)
+
+    def in_flight(self, name=None) -> int:
+        return sum(1 for key in self._flights if name is None or key[0] == name)
+
+    def _semaphore(self, name):
+        sem = self._semaphores.get(name)
+        if sem is None:
+            limit = self._limits.get(name)
+            sem = self._semaphores[name] = asyncio.Semaphore(limit) if limit else nullcontext()
+        return sem
+
+    async def _lead(self, key, flight, name, fn, args, kwargs):
+        try:
+            async with self._semaphore(name):
+                loop = asyncio.get_running_loop()
+                work = loop.run_in_executor(self.executor, _call, flight.token, fn, args, kwargs)
+                try:
+                    return await work
+                except asyncio.CancelledError:
+                    flight.token.cancel()
+                    # Keep the slot until the worker has reached a checkpoint and stopped.
+                    await asyncio.wait([work])
+                    raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def run(self, name, fn, *args, **kwargs):
+        """``fn(*args, **kwargs)`` in the executor, de-duplicated under ``name``."""
+        key = (name, _freeze(args), _freeze(kwargs))
+        try:
+            hash(key)
+        except TypeError:
+            key = (name, object())  # not comparable by value: a flight of its own
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.future = asyncio.ensure_future(self._lead(key, flight, name, fn, args, kwargs))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                # The last interested caller left: stop the computation, and
+                # let later callers start a fresh one instead of joining it.
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.token.cancel()
+                flight.future.cancel()
+
+    def close(self, wait=True):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_default = None
+
+def get_default() -> AsyncCounters:
+    global _default
+    if _default is None:
+        _default = AsyncCounters()
+    return _default
+
+def set_concurrency_limit(name, limit):
+    """Limit for one calculator (e.g. "schedule_slots_count") on the default instance."""
+    get_default().set_limit(name, limit)
+
+def _wrap(fn):
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await get_default().run(name, fn, *args, **kwargs)
+
+    wrapper.__name__ = wrapper.__qualname__ = "a" + name
+    return wrapper
+
+
+acount_with_min_requirements = _wrap(count_with_min_requirements)
+acount_with_at_most = _wrap(count_with_at_most)
+aarrangements_with_forbidden = _wrap(arrangements_with_forbidden)
+abounded_arrangements_with_forbidden = _wrap(bounded_arrangements_with_forbidden)
+aschedule_slots_count = _wrap(schedule_slots_count)
+aschedule_with_forbidden = _wrap(schedule_with_forbidden)
+acount_forbidden_permutations = _wrap(count_forbidden_permutations)
+aconstrained_multiset_count = _wrap(constrained_multiset_count)
+aweighted_schedule = _wrap(weighted_schedule)
+aweighted_team_distribution = _wrap(weighted_team_distribution)
+abonferroni_bounds = _wrap(bonferroni_bounds)
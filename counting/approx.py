@@ -0,0 +1,169 @@
+# counting/approx.py
+"""
+Log-space approximate counters.
+
+Each function mirrors an exact counter in ``core`` but returns a ``LogCount``:
+log10 of the count plus a bound on its relative error, without ever building
+the big integer. Factorials come from ``math.lgamma`` and sums are accumulated
+with log-sum-exp, so the cost is a few float operations per term.
+
+Error bounds are tracked as absolute error on the natural log, which for
+small values equals the relative error of the count.
+"""
+import math
+from typing import NamedTuple
+
+from .bigint import scientific_from_log10
+
+_EPS = 2.0 ** -52
+_LN10 = math.log(10)
+_NEG_INF = float("-inf")
+# lgamma is accurate to a few ulps of its result; be generous.
+_LGAMMA_ULPS = 8
+
+
+class LogCount(NamedTuple):
+    log10: float
+    rel_error: float
+
+    @property
+    def is_zero(self) -> bool:
+        return self.log10 == _NEG_INF
+
+
+def _finish(ln, err) -> LogCount:
+    if ln == _NEG_INF: return LogCount(_NEG_INF, 0.0)
+    return LogCount(ln / _LN10, math.expm1(err + _EPS * abs(ln)))
+
+def _lf(n):
+    """(ln n!, error bound)."""
+    v = math.lgamma(n + 1)
+    return v, _LGAMMA_ULPS * _EPS * max(1.0, abs(v))
+
+def log_factorial(n: int) -> float:
+    if n < 0: raise ValueError("factorial not defined for negative values")
+    return math.lgamma(n + 1)
+
+def _ln_nCr(n, r):
+    if r < 0 or r > n: return _NEG_INF, 0.0
+    a, ea = _lf(n)
+    b, eb = _lf(r)
+    c, ec = _lf(n - r)
+    v = a - b - c
+    return v, ea + eb + ec + 3 * _EPS * abs(a)
+
+def _logsumexp(vals, errs):
+    """ln(sum(exp(vals))) with the error of positive-term summation."""
+    top = max(vals, default=_NEG_INF)
+    if top == _NEG_INF: return _NEG_INF, 0.0
+    acc = math.fsum(math.exp(v - top) for v in vals if v != _NEG_INF)
+    res = top + math.log(acc)
+    # A sum of positive terms is never less accurate than its worst term.
+    return res, max(errs) + 4 * _EPS * (abs(res) + len(vals))
+
+def _ln_poly_coeff(polys, target):
+    """
+    ln of the coefficient of x**target in the product of polynomials given as
+    (ln-coefficients, errors) lists, truncated at degree target.
+    """
+    if target < 0: return _NEG_INF, 0.0
+    cur = [0.0] + [_NEG_INF] * target
+    cur_err = [0.0] * (target + 1)
+    for coeffs, errs in polys:
+        nxt = []
+        nxt_err = []
+        for k in range(target + 1):
+            vals = []
+            ev = []
+            for j in range(min(k, len(coeffs) - 1) + 1):
+                a = cur[k - j]
+                b = coeffs[j]
+                if a == _NEG_INF or b == _NEG_INF:
+                    continue
+                vals.append(a + b)
+                ev.append(cur_err[k - j] + errs[j] + _EPS * abs(a + b))
+            v, e = _logsumexp(vals, ev) if vals else (_NEG_INF, 0.0)
+            nxt.append(v)
+            nxt_err.append(e)
+        cur, cur_err = nxt, nxt_err
+    return cur[target], cur_err[target]
+
+def _binomial_poly(g, lo, hi):
+    coeffs, errs = [], []
+    for k in range(0, max(hi, -1) + 1):
+        v, e = _ln_nCr(g, k) if k >= lo else (_NEG_INF, 0.0)
+        coeffs.append(v)
+        errs.append(e)
+    return coeffs, errs
+
+# ---------- Approximate counters ----------
+def approx_nPr(n: int, r: int) -> LogCount:
+    if r < 0 or r > n: return _finish(_NEG_INF, 0.0)
+    a, ea = _lf(n)
+    b, eb = _lf(n - r)
+    return _finish(a - b, ea + eb + 2 * _EPS * abs(a))
+
+def approx_nCr(n: int, r: int) -> LogCount:
+    return _finish(*_ln_nCr(n, r))
+
+def approx_multiset_permutations_count(counts: dict) -> LogCount:
+    total, err = _lf(sum(counts.values()))
+    for c in counts.values():
+        v, e = _lf(c)
+        total -= v
+        err += e + _EPS * abs(total)
+    return _finish(total, err)
+
+def approx_count_with_min_requirements(group_sizes, mins, r) -> LogCount:
+    if len(mins) != len(group_sizes): raise ValueError("mins length must match group_sizes")
+    polys = [_binomial_poly(g, lo, g) for g, lo in zip(group_sizes, mins)]
+    return _finish(*_ln_poly_coeff(polys, r))
+
+def approx_count_with_exact_requirements(group_sizes, exacts) -> LogCount:
+    if len(group_sizes) != len(exacts): raise ValueError("exacts length mismatch")
+    total = err = 0.0
+    for g, e in zip(group_sizes, exacts):
+        if e < 0 or e > g: return _finish(_NEG_INF, 0.0)
+        v, ev = _ln_nCr(g, e)
+        total += v
+        err += ev + _EPS * abs(total)
+    return _finish(total, err)
+
+def approx_count_with_at_most(group_sizes, maxs, r) -> LogCount:
+    if len(group_sizes) != len(maxs): raise ValueError("maxs length mismatch")
+    polys = [_binomial_poly(g, 0, min(g, m)) for g, m in zip(group_sizes, maxs)]
+    return _finish(*_ln_poly_coeff(polys, r))
+
+def approx_schedule_slots_count(people, slots, max_per_slot, must_include=None) -> LogCount:
+    """
+    Same count as ``schedule_slots_count``, via its exponential generating
+    function: (n-m)! * [x^(n-m)] prod_i sum_{j <= cap - req_i} x^j / j!.
+    """
+    n = len(people)
+    if must_include is None:
+        must_include = []
+    slot_req = [0] * slots
+    for _, s in must_include:
+        slot_req[s] += 1
+    remaining = n - len(must_include)
+    polys = []
+    for req in slot_req:
+        coeffs, errs = [], []
+        for j in range(0, max_per_slot - req + 1):
+            v, e = _lf(j)
+            coeffs.append(-v)
+            errs.append(e)
+        polys.append((coeffs, errs))
+    v, e = _ln_poly_coeff(polys, remaining)
+    if v == _NEG_INF: return _finish(v, e)
+    f, ef = _lf(remaining)
+    return _finish(v + f, e + ef + _EPS * abs(v + f))
+
+def log_percentage(part_log10: float, whole_log10: float) -> float:
+    """100 * part / whole from log10 magnitudes; stable for any size."""
+    if part_log10 == _NEG_INF: return 0.0
+    return 100.0 * 10.0 ** (part_log10 - whole_log10)
+
+def format_log_count(lc: LogCount) -> str:
+    if lc.is_zero: return "0"
+    return f"≈ {scientific_from_log10(lc.log10)}"
@@ -0,0 +1,262 @@
+# counting/batch.py
+"""
+Batch nCr / nPr / multinomial over arrays of inputs.
+
+Three modes share one API:
+
+* ``"exact"``  – Python ints (object array); factorials of every distinct
+  argument in the batch are built incrementally in sorted order, starting
+  from the nearest factorial kept from earlier calls.
+* ``"mod"``    – int64 results modulo a prime, fully vectorised through cached
+  factorial / inverse-factorial tables.
+* ``"log10"``  – float64 log10 of the count, vectorised through a cached
+  ``lgamma`` table.
+
+Tables cover arguments up to ``TABLE_CAP``. Above that, a table would cost
+more than the batch itself (a single n = 10**9 would need gigabytes), so
+log10 calls ``math.lgamma`` on each distinct argument and mod multiplies
+each element's factor range in vectorised blocks.
+"""
+import math
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+import numpy as np
+
+MODES = ("exact", "mod", "log10")
+DEFAULT_MODULUS = 1_000_000_007
+# Largest argument served from the mod / lgamma tables (32 MB per table).
+TABLE_CAP = 1 << 22
+# Total size of the factorials kept between exact calls.
+EXACT_CACHE_BYTES = 64 * 2 ** 20
+_BLOCK = 1 << 20
+
+_mod_tables = {}
+_lgamma_table = np.zeros(0)
+_fact_cache = OrderedDict()
+_fact_keys = []  # the keys of _fact_cache, sorted
+_fact_cache_bytes = 0
+_LN10 = math.log(10)
+
+
+def _range_prod(lo, hi):
+    """Product of lo..hi-1 by binary splitting."""
+    if hi - lo <= 16:
+        return math.prod(range(lo, hi))
+    mid = (lo + hi) // 2
+    return _range_prod(lo, mid) * _range_prod(mid, hi)
+
+def _remember(v, f):
+    global _fact_cache_bytes
+    size = (f.bit_length() + 7) // 8
+    if size > EXACT_CACHE_BYTES // 4:
+        return
+    _fact_cache[v] = f
+    insort(_fact_keys, v)
+    _fact_cache_bytes += size
+    while _fact_cache_bytes > EXACT_CACHE_BYTES:
+        u, old = _fact_cache.popitem(last=False)
+        del _fact_keys[bisect_left(_fact_keys, u)]
+        _fact_cache_bytes -= (old.bit_length() + 7) // 8
+
+def exact_factorials(values) -> dict:
+    """
+    {v: v!} for every distinct v. Each is built from the previous one or
+    from the nearest smaller factorial cached by earlier calls (LRU, at
+    most ``EXACT_CACHE_BYTES``).
+    """
+    out = {}
+    prev, acc = 0, 1
+    for v in sorted(set(int(x) for x in values if x >= 0)):
+        f = _fact_cache.get(v)
+        if f is None:
+            i = bisect_left(_fact_keys, v) - 1
+            if i >= 0 and _fact_keys[i] > prev:
+                prev = _fact_keys[i]
+                acc = _fact_cache[prev]
+            f = acc * _range_prod(prev + 1, v + 1)
+            _remember(v, f)
+        else:
+            _fact_cache.move_to_end(v)
+        out[v] = acc = f
+        prev = v
+    return out
+
+def _is_prime(m) -> bool:
+    """Deterministic Miller-Rabin; bases 2, 3, 5 and 7 settle every m below 3.2e9."""
+    if m < 2: return False
+    for p in (2, 3, 5, 7):
+        if m % p == 0: return m == p
+    d, s = m - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in (2, 3, 5, 7):
+        x = pow(a, d, m)
+        if x in (1, m - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % m
+            if x == m - 1:
+                break
+        else:
+            return False
+    return True
+
+def check_modulus(modulus):
+    """Raise ValueError unless ``modulus`` is a prime below 2**31 (mod mode divides by factorials)."""
+    if not isinstance(modulus, (int, np.integer)) or not 1 < modulus < 2 ** 31 or not _is_prime(int(modulus)):
+        raise ValueError(f"modulus must be a prime below 2**31, got {modulus}")
+
+def mod_factorial_tables(modulus: int, upto: int):
+    """Cached (fact, inv_fact) int64 arrays modulo a prime, covering 0..upto (upto <= TABLE_CAP)."""
+    check_modulus(modulus)
+    if upto >= modulus: raise ValueError("arguments must be smaller than the modulus")
+    if upto > TABLE_CAP: raise ValueError(f"factorial tables are capped at {TABLE_CAP:,}")
+    tables = _mod_tables.get(modulus)
+    if tables is None or len(tables[0]) <= upto:
+        size = max(upto + 1, 2 * len(tables[0]) if tables else 1024)
+        size = min(size, modulus, TABLE_CAP + 1)
+        fact = [1] * size
+        for i in range(1, size):
+            fact[i] = fact[i - 1] * i % modulus
+        inv = [1] * size
+        inv[-1] = pow(fact[-1], -1, modulus)
+        for i in range(size - 1, 0, -1):
+            inv[i - 1] = inv[i] * i % modulus
+        tables = (np.array(fact, dtype=np.int64), np.array(inv, dtype=np.int64))
+        _mod_tables[modulus] = tables
+    return tables
+
+def _mod_range_prod(lo, hi, p):
+    """Product of lo..hi-1 modulo p (< 2**31), reduced pairwise in int64 blocks."""
+    acc = 1
+    for start in range(lo, hi, _BLOCK):
+        block = np.arange(start, min(start + _BLOCK, hi), dtype=np.int64) % p
+        while len(block) > 1:
+            if len(block) & 1:
+                block = np.append(block, 1)
+            block = block[0::2] * block[1::2] % p
+        acc = acc * int(block[0]) % p
+    return acc
+
+def _mod_single(n, r, p, choose):
+    """nCr / nPr mod p for one large n without tables."""
+    if choose:
+        r = min(r, n - r)
+        return _mod_range_prod(n - r + 1, n + 1, p) * pow(_mod_range_prod(1, r + 1, p), -1, p) % p
+    return _mod_range_prod(n - r + 1, n + 1, p)
+
+def _ln_factorial(values):
+    """ln(v!) elementwise: table lookup up to TABLE_CAP, ``math.lgamma`` per distinct value above."""
+    values = np.asarray(values, dtype=np.int64)
+    top = int(values.max(initial=0))
+    if top <= TABLE_CAP:
+        return lgamma_table(top)[values]
+    uniq, inverse = np.unique(values, return_inverse=True)
+    return np.array([math.lgamma(v + 1.0) for v in uniq.tolist()])[inverse].reshape(values.shape)
+
+def lgamma_table(upto: int):
+    """Cached float64 array of ln(k!) for k = 0..upto (upto <= TABLE_CAP)."""
+    global _lgamma_table
+    if upto > TABLE_CAP: raise ValueError(f"lgamma table is capped at {TABLE_CAP:,}")
+    if len(_lgamma_table) <= upto:
+        size = min(max(upto + 1, 2 * len(_lgamma_table), 1024), TABLE_CAP + 1)
+        _lgamma_table = np.fromiter(
+            (math.lgamma(k + 1) for k in range(size)), dtype=np.float64, count=size
+        )
+    return _lgamma_table
+
+def _prepare(n, r):
+    n = np.asarray(n, dtype=np.int64)
+    r = np.asarray(r, dtype=np.int64)
+    n, r = np.broadcast_arrays(n, r)
+    valid = (r >= 0) & (r <= n)
+    return n, r, valid
+
+def _check_mode(mode):
+    if mode not in MODES: raise ValueError(f"mode must be one of {MODES}")
+
+def _batch(n, r, mode, modulus, choose):
+    _check_mode(mode)
+    n, r, valid = _prepare(n, r)
+    # Clamp invalid entries to a harmless index; they are masked out below.
+    ns = np.where(valid, n, 0)
+    rs = np.where(valid, r, 0)
+    ks = ns - rs
+    top = int(ns.max(initial=0))
+    if mode == "mod":
+        check_modulus(modulus)
+        if top >= modulus: raise ValueError("arguments must be smaller than the modulus")
+        small = ns <= TABLE_CAP
+        fact, inv = mod_factorial_tables(modulus, int(ns[small].max(initial=0)))
+        a, b, c = np.where(small, ns, 0), np.where(small, ks, 0), np.where(small, rs, 0)
+        res = fact[a] * inv[b] % modulus
+        if choose:
+            res = res * inv[c] % modulus
+        res = np.array(res, dtype=np.int64)
+        for idx in map(tuple, np.argwhere(~small)):
+            res[idx] = _mod_single(int(ns[idx]), int(rs[idx]), modulus, choose)
+        return np.where(valid, res, 0)
+    if mode == "log10":
+        res = _ln_factorial(ns) - _ln_factorial(ks)
+        if choose:
+            res = res - _ln_factorial(rs)
+        return np.where(valid, res / _LN10, -np.inf)
+    needed = np.concatenate([ns[valid], ks[valid], rs[valid]]) if choose else \
+        np.concatenate([ns[valid], ks[valid]])
+    facts = exact_factorials(needed.tolist())
+    out = np.zeros(n.shape, dtype=object)
+    for idx in np.ndindex(n.shape):
+        if not valid[idx]:
+            continue
+        a, b = int(ns[idx]), int(ks[idx])
+        denom = facts[b] * facts[int(rs[idx])] if choose else facts[b]
+        out[idx] = facts[a] // denom
+    return out
+
+def batch_nCr(n, r, mode: str = "exact", modulus: int = DEFAULT_MODULUS):
+    """nCr elementwise over broadcastable arrays/sequences of n and r."""
+    return _batch(n, r, mode, modulus, True)
+
+def batch_nPr(n, r, mode: str = "exact", modulus: int = DEFAULT_MODULUS):
+    """nPr elementwise over broadcastable arrays/sequences of n and r."""
+    return _batch(n, r, mode, modulus, False)
+
+def batch_multiset_permutations_count(counts, mode: str = "exact", modulus: int = DEFAULT_MODULUS):
+    """
+    Multinomial coefficients for each row of a 2-D array of item counts
+    (pad ragged rows with zeros).
+    """
+    _check_mode(mode)
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.int64))
+    if (counts < 0).any(): raise ValueError("counts must be non-negative")
+    totals = counts.sum(axis=1)
+    top = int(totals.max(initial=0))
+    if mode == "mod":
+        check_modulus(modulus)
+        if top >= modulus: raise ValueError("arguments must be smaller than the modulus")
+        if top > TABLE_CAP:
+            # Product of binomials C(c_1 + ... + c_i, c_i), each without tables.
+            res = np.ones(len(totals), dtype=np.int64)
+            for i, row in enumerate(counts.tolist()):
+                acc, run = 1, 0
+                for c in row:
+                    run += c
+                    acc = acc * _mod_single(run, c, modulus, True) % modulus
+                res[i] = acc
+            return res
+        fact, inv = mod_factorial_tables(modulus, top)
+        res = fact[totals]
+        for col in counts.T:
+            res = res * inv[col] % modulus
+        return res
+    if mode == "log10":
+        return (_ln_factorial(totals) - _ln_factorial(counts).sum(axis=1)) / _LN10
+    facts = exact_factorials(np.concatenate([totals, counts.ravel()]).tolist())
+    out = np.zeros(len(totals), dtype=object)
+    for i, row in enumerate(counts.tolist()):
+        denom = 1
+        for c in row:
+            denom *= facts[c]
+        out[i] = facts[int(totals[i])] // denom
+    return out
@@ -0,0 +1,128 @@
+# counting/bigint.py
+"""Rendering helpers for very large counts.
+
+Converting an int with hundreds of thousands of digits to decimal is quadratic
+in CPython and, since 3.11, refused outright above ``sys.get_int_max_str_digits()``.
+Everything here works from the binary representation instead and only builds
+the full decimal string on explicit request.
+"""
+import decimal
+import math
+
+# Counts with at most this many digits are shown in full, with separators.
+INLINE_DIGITS = 40
+# Leading/trailing digits shown for anything larger.
+EDGE_DIGITS = 12
+
+_BITLIM = 128
+
+
+def log10_abs(n: int) -> float:
+    if n == 0: return float("-inf")
+    # math.log10 works on the int's binary form, so it is safe for any size.
+    return math.log10(abs(n))
+
+def digit_count(n: int) -> int:
+    n = abs(n)
+    if n < 10: return 1
+    lg = math.log10(n)
+    d = int(lg) + 1
+    # The float estimate can only be off when log10(n) is within rounding
+    # distance of an integer; confirm exactly in that case.
+    frac = lg - int(lg)
+    if frac < 1e-6 or frac > 1 - 1e-6:
+        p = 10 ** (d - 1)
+        if n < p:
+            d -= 1
+        elif n >= p * 10:
+            d += 1
+    return d
+
+def leading_digits(n: int, k: int = EDGE_DIGITS, digits: int = None) -> str:
+    n = abs(n)
+    d = digit_count(n) if digits is None else digits
+    if d <= k: return str(n)
+    # Quotient has only k digits, so the long division is linear in len(n).
+    return str(n // 10 ** (d - k))
+
+def trailing_digits(n: int, k: int = EDGE_DIGITS) -> str:
+    n = abs(n)
+    return str(n % 10 ** k).rjust(k, "0") if n >= 10 ** k else str(n)
+
+def scientific_from_log10(lg: float, sig: int = 6, negative: bool = False) -> str:
+    if lg == float("-inf"): return "0"
+    exp = math.floor(lg)
+    mant = round(10 ** (lg - exp), sig - 1)
+    if mant >= 10:
+        mant /= 10
+        exp += 1
+    sign = "-" if negative else ""
+    return f"{sign}{mant:.{sig - 1}f}e{exp:+d}"
+
+def scientific(n: int, sig: int = 6) -> str:
+    """Scientific notation from log10(n); never converts n to decimal."""
+    return scientific_from_log10(log10_abs(n), sig, n < 0)
+
+def format_count(n: int) -> str:
+    """Short display string suitable for ``st.metric``."""
+    if digit_count(n) <= INLINE_DIGITS:
+        return f"{n:,}"
+    return f"≈ {scientific(n)}"
+
+def count_summary(n: int, edge: int = EDGE_DIGITS):
+    """JSON-friendly description of n: n itself when small, digit stats otherwise."""
+    d = digit_count(n)
+    if d <= INLINE_DIGITS:
+        return n
+    return {
+        "digits": d,
+        "bit_length": abs(n).bit_length(),
+        "sign": "-" if n < 0 else "+",
+        "scientific": scientific(n),
+        "leading_digits": leading_digits(n, edge, d),
+        "trailing_digits": trailing_digits(n, edge),
+    }
+
+def to_decimal_string(n: int) -> str:
+    """
+    Full decimal expansion of n in subquadratic time, independent of the
+    int-to-str digit limit.
+
+    Splits n on its bits and recombines the halves as Decimals; libmpdec
+    multiplies large operands with a number-theoretic transform, so the total
+    cost is close to that of one big multiplication.
+    """
+    if abs(n).bit_length() <= _BITLIM * 8:
+        return str(n)
+    D = decimal.Decimal
+    pow2 = {}
+
+    def w2pow(w):
+        res = pow2.get(w)
+        if res is None:
+            if w <= _BITLIM:
+                res = D(1 << w)
+            elif w - 1 in pow2:
+                res = pow2[w - 1] + pow2[w - 1]
+            else:
+                w2 = w >> 1
+                res = w2pow(w2) * w2pow(w - w2)
+            pow2[w] = res
+        return res
+
+    def inner(m, w):
+        if w <= _BITLIM:
+            return D(m)
+        w2 = w >> 1
+        hi = m >> w2
+        lo = m - (hi << w2)
+        return inner(lo, w2) + inner(hi, w - w2) * w2pow(w2)
+
+    ctx = decimal.Context(
+        prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN,
+        traps=[decimal.Inexact, decimal.InvalidOperation],
+    )
+    with decimal.localcontext(ctx):
+        res = inner(abs(n), abs(n).bit_length())
+    s = format(res, "f")
+    return "-" + s if n < 0 else s
@@ -0,0 +1,131 @@
+# counting/bonferroni.py
+"""
+Truncated inclusion-exclusion with Bonferroni bounds.
+
+With S_k the sum of all k-fold intersection sizes, the partial sums
+S_1 - S_2 + ... ± S_d are upper bounds on the union for odd d and lower
+bounds for even d. Evaluation goes one depth at a time and stops once the
+best lower and upper bounds meet.
+
+Intersections that were not supplied are unknown, not zero. Since an
+intersection is contained in each of its sub-intersections, a missing
+|∩T| lies in [0, min_{t in T} |∩(T - t)|]. Each S_k is therefore an
+interval, and every bound uses its worst case. A subset whose upper limit is
+0 is dropped, along with all its supersets, so sparse families never expand
+into the full C(n, k) subsets.
+
+The result lists the missing intersections whose width, counted once for
+each best bound that includes their depth (the deepest bound of each parity
+while only the trivial max/sum bounds hold), is largest. Supplying those
+tightens the bounds the most.
+"""
+from typing import NamedTuple
+
+from .cancel import checkpoint
+
+# Stop expanding once a depth would hold more subsets than this.
+MAX_TERMS = 2_000_000
+
+
+class BonferroniStep(NamedTuple):
+    depth: int
+    sum_low: int       # lowest possible S_depth
+    sum_high: int      # highest possible S_depth
+    missing: int       # intersections of this depth that were not supplied
+    lower: int         # best lower bound so far
+    upper: int         # best upper bound so far
+
+
+class BonferroniResult(NamedTuple):
+    lower: int
+    upper: int
+    exact: bool
+    depth: int             # deepest level evaluated
+    complete: bool         # False if stopped by max_depth or MAX_TERMS before the bounds met
+    steps: list
+    suggestions: list      # [(intersection key, potential bound tightening), ...]
+
+
+def _next_level(level, labels, index, known, max_terms):
+    nxt = {}
+    for key, (_, hi) in level.items():
+        checkpoint()
+        for j in range(index[key[-1]] + 1, len(labels)):
+            cand = key + (labels[j],)
+            cap = hi
+            for t in range(len(cand) - 1):
+                sub = level.get(cand[:t] + cand[t + 1:])
+                if sub is None:
+                    cap = 0
+                    break
+                cap = min(cap, sub[1])
+            if cand in known:
+                nxt[cand] = (known[cand], known[cand])
+            elif cap > 0:
+                nxt[cand] = (0, cap)
+            if len(nxt) > max_terms:
+                return None
+    # Supplied zeros prune their supersets like derived zeros.
+    return {k: v for k, v in nxt.items() if v[1] > 0}
+
+def bonferroni_bounds(set_sizes: dict, intersections: dict, max_depth=None, suggest=10,
+                      max_terms=MAX_TERMS) -> BonferroniResult:
+    """
+    Bounds on |A ∪ B ∪ ...| from intersections up to max_depth sets deep.
+
+    set_sizes and intersections are given as for ``inclusion_exclusion``
+    (intersection keys are sorted label tuples). Missing intersections are
+    treated as unknown.
+    """
+    labels = sorted(set_sizes)
+    n = len(labels)
+    max_depth = n if max_depth is None else min(max_depth, n)
+    index = {l: i for i, l in enumerate(labels)}
+    known = {tuple(sorted(k)): int(v) for k, v in intersections.items() if len(k) > 1}
+    sizes = [int(set_sizes[l]) for l in labels]
+
+    lower, upper = max(sizes, default=0), sum(sizes)
+    best = {"lower": 0, "upper": 0}
+    p_up = p_low = 0
+    steps, gaps = [], []
+    level = {(l,): (s, s) for l, s in zip(labels, sizes) if s > 0}
+    depth = 0
+    complete = True
+    for k in range(1, max_depth + 1):
+        if k > 1:
+            nxt = _next_level(level, labels, index, known, max_terms)
+            if nxt is None:
+                complete = False
+                break
+            level = nxt
+        depth = k
+        s_lo = sum(lo for lo, _ in level.values())
+        s_hi = sum(hi for _, hi in level.values())
+        missing = [(key, hi - lo) for key, (lo, hi) in level.items() if lo != hi]
+        gaps.append(missing)
+        if k % 2:
+            p_up, p_low = p_up + s_hi, p_low + s_lo
+        else:
+            p_up, p_low = p_up - s_lo, p_low - s_hi
+        # Past the last set, or once nothing survives, the alternating sum is complete.
+        full = k == n or not level
+        if (k % 2 or full) and p_up < upper:
+            upper, best["upper"] = p_up, k
+        if (not k % 2 or full) and p_low > lower:
+            lower, best["lower"] = p_low, k
+        steps.append(BonferroniStep(k, s_lo, s_hi, len(missing), lower, upper))
+        if lower >= upper or full:
+            break
+    else:
+        complete = lower >= upper
+
+    # When only the trivial bounds hold, blame the deepest bound of each parity.
+    du = best["upper"] or max((k for k in range(1, depth + 1) if k % 2), default=0)
+    dl = best["lower"] or max((k for k in range(1, depth + 1) if not k % 2), default=0)
+    ranked = []
+    for k, missing in enumerate(gaps, start=1):
+        uses = (k <= du) + (k <= dl)
+        if uses:
+            ranked.extend((key, width * uses) for key, width in missing)
+    ranked.sort(key=lambda item: (-item[1], len(item[0]), item[0]))
+    return BonferroniResult(lower, upper, lower >= upper, depth, complete, steps, ranked[:suggest])
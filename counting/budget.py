@@ -0,0 +1,235 @@
+# counting/budget.py
+"""
+Memory-bounded forbidden-adjacency DP.
+
+``arrangements_with_forbidden`` memoises every (mask, last) state in an
+unbounded ``lru_cache``, which for n around 20 means tens of millions of
+Python objects. ``bounded_arrangements_with_forbidden`` estimates that table
+first and picks a layout that fits the budget:
+
+* ``"memo"``  – the original recursive DP, when its cache fits.
+* ``"array"`` – a DP over popcount layers. A layer is a dense array
+  indexed by (rank of mask among masks of that popcount, last item), with
+  counts stored as 32-bit limbs in uint64 so they never overflow. Only two
+  layers are alive at a time.
+* ``"mmap"``  – the same arrays as memory-mapped files in a temporary
+  directory, for instances whose layers alone exceed the budget.
+
+Each row of layer d is pulled from layer d - 1: the count for (mask, y) sums
+the counts of (mask without y, x) over every x allowed before y. Any range
+of rows can therefore be computed from the previous layer alone. With an
+executor, each layer's rows are split into disjoint ranges that worker
+processes fill in place, in shared memory-mapped files (``/dev/shm`` when
+the layers fit the budget). The total work equals the serial DP, so the
+speedup is close to linear. The budget covers the layers plus every
+worker's chunk buffers.
+
+The result carries the chosen layout and the peak memory/disk used by the
+state tables. ``layered_counts`` also returns the total of every layer,
+i.e. the count for every length up to r.
+"""
+import math
+import os
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+
+from .cancel import checkpoint
+from .core import arrangements_with_forbidden
+
+DEFAULT_MEMORY_BUDGET = 512 * 2 ** 20
+# Rough cost of one lru_cache entry: key tuple, two ints, result, dict slot.
+MEMO_ENTRY_BYTES = 250
+_LIMB_BITS = 32
+_LIMB_MASK = np.uint64(2 ** _LIMB_BITS - 1)
+_MAX_ITEMS = 62
+
+
+class DPResult(NamedTuple):
+    value: int
+    meta: dict
+
+
+def _memo_states(n, r):
+    return 1 + sum(math.comb(n, d) * d for d in range(1, min(n, r) + 1))
+
+def _layer_rows(n, d):
+    return math.comb(n, d)
+
+def _rank(masks, n, binom):
+    """Colex rank of each mask among masks of equal popcount."""
+    rank = np.zeros(len(masks), dtype=np.int64)
+    k = np.zeros(len(masks), dtype=np.int64)
+    for b in range(n):
+        bit = ((masks >> b) & 1).astype(np.int64)
+        rank += bit * binom[b, k + 1]
+        k += bit
+    return rank
+
+def _unrank(ranks, n, d, binom):
+    masks = np.zeros(len(ranks), dtype=np.int64)
+    rest = ranks.copy()
+    k = np.full(len(ranks), d, dtype=np.int64)
+    for b in range(n - 1, -1, -1):
+        c = binom[b, k]
+        take = (k > 0) & (rest >= c)
+        masks |= take.astype(np.int64) << b
+        rest -= np.where(take, c, 0)
+        k -= take
+    return masks
+
+def _normalize(layer, chunk):
+    """Propagate limb carries so every limb is back below 2**32."""
+    for lo in range(0, len(layer), chunk):
+        block = layer[lo:lo + chunk]
+        for l in range(block.shape[-1] - 1):
+            carry = block[..., l] >> np.uint64(_LIMB_BITS)
+            block[..., l] &= _LIMB_MASK
+            block[..., l + 1] += carry
+
+def _binom(n):
+    return np.array([[math.comb(b, j) for j in range(n + 2)] for b in range(n)], dtype=np.int64)
+
+def _allowed(n, forbidden_pairs):
+    allowed = np.ones((n, n), dtype=np.uint64)
+    for a, b in forbidden_pairs:
+        if 0 <= a < n and 0 <= b < n:
+            allowed[a, b] = 0
+    return allowed
+
+def _limb_total(block) -> int:
+    """Sum of all counts in a block of rows (fewer than 2**32 entries per limb)."""
+    total = 0
+    for l, s in enumerate(np.asarray(block).sum(axis=(0, 1), dtype=np.uint64).tolist()):
+        total += int(s) << (_LIMB_BITS * l)
+    return total
+
+def _pull_rows(cur, lo, hi, n, d, allowed, binom):
+    """Rows lo..hi of popcount layer d, pulled from layer d - 1 (``cur``), carries normalised."""
+    masks = _unrank(np.arange(lo, hi, dtype=np.int64), n, d, binom)
+    out = np.zeros((hi - lo, n, cur.shape[-1]), dtype=np.uint64)
+    for y in range(n):
+        has = ((masks >> y) & 1) == 1
+        if not has.any():
+            continue
+        src = _rank(masks[has] ^ (1 << y), n, binom)
+        # Sum over last items that may precede y: at most n limbs below 2**32 each.
+        out[has, y] = (np.asarray(cur[src]) * allowed[:, y][None, :, None]).sum(axis=1)
+    _normalize(out, len(out))
+    return out
+
+def layer_task(cur_path, cur_shape, nxt_path, nxt_shape, lo, hi, n, d, allowed, chunk) -> int:
+    """Fill rows lo..hi of the layer-d file from the layer d - 1 file; returns their total."""
+    cur = np.memmap(cur_path, dtype=np.uint64, mode="r", shape=cur_shape)
+    nxt = np.memmap(nxt_path, dtype=np.uint64, mode="r+", shape=nxt_shape)
+    binom = _binom(n)
+    total = 0
+    for a in range(lo, hi, chunk):
+        checkpoint()
+        b = min(a + chunk, hi)
+        rows = _pull_rows(cur, a, b, n, d, allowed, binom)
+        nxt[a:b] = rows
+        total += _limb_total(rows)
+    nxt.flush()
+    return total
+
+def _slices(rows, parts):
+    step = -(-rows // max(1, min(rows, parts)))
+    return [(lo, min(lo + step, rows)) for lo in range(0, rows, step)]
+
+def layered_counts(n, r, forbidden_pairs, memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None,
+                   executor=None, workers=1):
+    """
+    ([count for length 0..r], meta) from the layered DP, in this process or,
+    with ``executor`` (a process pool of ``workers``), split row-wise per layer.
+    """
+    if n > _MAX_ITEMS: raise MemoryError(f"masks of n={n} items cannot be packed")
+    top = min(r, n)
+    counts = [1] + [0] * r
+    meta = {"layout": "array", "peak_memory_bytes": 0, "peak_disk_bytes": 0, "workers": workers}
+    if top < 1:
+        return counts, meta
+    limbs = max(1, -(-math.perm(n, top).bit_length() // _LIMB_BITS))
+    row_bytes = n * limbs * 8
+    max_rows = max(_layer_rows(n, d) for d in range(1, top + 1))
+    peak_pair = max(_layer_rows(n, d) + _layer_rows(n, d + 1) for d in range(1, top)) * row_bytes if top > 1 \
+        else n * row_bytes
+    spill = peak_pair > memory_budget
+    parallel = executor is not None and workers > 1
+    # Working set per chunk: the slice being built plus the gathered source rows.
+    chunk = max(1, min(memory_budget // (4 * row_bytes * workers), 1 << 20))
+    buffers = workers * min(chunk, max_rows) * row_bytes * 4
+    meta["layout"] = "mmap" if spill else "array"
+    allowed = _allowed(n, forbidden_pairs)
+    binom = _binom(n)
+
+    files = spill or parallel
+    if files:
+        shm = None if spill or not os.path.isdir("/dev/shm") else "/dev/shm"
+        tmp = tempfile.TemporaryDirectory(prefix="counting-dp-", dir=spill_dir if spill else shm)
+
+    def new_layer(d):
+        shape = (_layer_rows(n, d), n, limbs)
+        if files:
+            return np.memmap(os.path.join(tmp.name, f"layer{d}.bin"), dtype=np.uint64, mode="w+", shape=shape)
+        return np.zeros(shape, dtype=np.uint64)
+
+    def release(layer):
+        if files:
+            path = layer.filename
+            del layer
+            os.remove(path)
+
+    try:
+        # Layer 1: each item alone, as the last item; colex rank of {y} is y.
+        cur = new_layer(1)
+        for y in range(n):
+            cur[y, y, 0] = 1
+        counts[1] = n
+        for d in range(2, top + 1):
+            checkpoint()
+            nxt = new_layer(d)
+            key = "peak_disk_bytes" if spill else "peak_memory_bytes"
+            meta[key] = max(meta[key], cur.nbytes + nxt.nbytes)
+            rows = len(nxt)
+            if parallel:
+                cur.flush()
+                parts = _slices(rows, workers * 4)
+                k = len(parts)
+                counts[d] = sum(executor.map(
+                    layer_task, [cur.filename] * k, [cur.shape] * k, [nxt.filename] * k, [nxt.shape] * k,
+                    [lo for lo, _ in parts], [hi for _, hi in parts], [n] * k, [d] * k, [allowed] * k, [chunk] * k,
+                ))
+            else:
+                for lo in range(0, rows, chunk):
+                    checkpoint()
+                    hi = min(lo + chunk, rows)
+                    block = _pull_rows(cur, lo, hi, n, d, allowed, binom)
+                    nxt[lo:hi] = block
+                    counts[d] += _limb_total(block)
+            release(cur)
+            cur = nxt
+        release(cur)
+        meta["peak_memory_bytes"] += buffers
+        return counts, meta
+    finally:
+        if files:
+            tmp.cleanup()
+
+def bounded_arrangements_with_forbidden(n, r, forbidden_pairs, memory_budget=DEFAULT_MEMORY_BUDGET,
+                                        spill_dir=None, executor=None, workers=1) -> DPResult:
+    """
+    ``arrangements_with_forbidden`` under a memory budget (bytes). With an
+    executor of ``workers`` processes, every layer is split across them.
+    """
+    memo_bytes = _memo_states(n, r) * MEMO_ENTRY_BYTES if 0 <= r <= n else 0
+    serial = executor is None or workers <= 1
+    if (serial and memo_bytes <= memory_budget) or r <= 1 or r > n:
+        value = arrangements_with_forbidden(n, r, forbidden_pairs)
+        return DPResult(value, {"layout": "memo", "peak_memory_bytes": memo_bytes, "peak_disk_bytes": 0})
+    if n > _MAX_ITEMS:
+        raise MemoryError(f"state table for n={n} exceeds the memory budget and cannot be packed")
+    counts, meta = layered_counts(n, r, forbidden_pairs, memory_budget, spill_dir,
+                                  None if serial else executor, 1 if serial else workers)
+    return DPResult(counts[r], meta)
@@ -0,0 +1,45 @@
+# counting/cancel.py
+"""
+Cooperative cancellation for long-running counters.
+
+The DP and enumeration loops call ``checkpoint()`` once per state layer,
+composition or memo miss. It reads a thread-local token and raises
+``Cancelled`` if that token has been cancelled. With no active scope the
+check is one attribute lookup, so direct callers pay next to nothing.
+"""
+import threading
+from contextlib import contextmanager
+
+
+class Cancelled(Exception):
+    """Raised inside a counter whose cancellation token was triggered."""
+
+
+class CancelToken:
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+_local = threading.local()
+_local.token = None
+
+
+def checkpoint():
+    token = getattr(_local, "token", None)
+    if token is not None and token.cancelled:
+        raise Cancelled()
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Make ``token`` the one ``checkpoint()`` checks in this thread."""
+    prev = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = prev
@@ -0,0 +1,154 @@
+# counting/core.py
+"""Exact counters used by the Streamlit tabs."""
+import math
+from functools import lru_cache
+from itertools import combinations as it_combinations
+
+from .cancel import checkpoint
+
+def nPr(n: int, r: int) -> int:
+    if r < 0 or r > n: return 0
+    return math.factorial(n) // math.factorial(n - r)
+
+def nCr(n: int, r: int) -> int:
+    if r < 0 or r > n: return 0
+    return math.factorial(n) // (math.factorial(r) * math.factorial(n - r))
+
+def multiset_permutations_count(counts: dict) -> int:
+    total = sum(counts.values())
+    denom = 1
+    for c in counts.values():
+        denom *= math.factorial(c)
+    return math.factorial(total) // denom
+
+def inclusion_exclusion(set_sizes: dict, intersections: dict) -> int:
+    """
+    set_sizes: {'A':a, 'B':b, ...}
+    intersections: keys as tuples sorted, e.g. ('A','B'): x, ('A','B','C'): y
+    """
+    labels = list(set(set_sizes.keys()))
+    total = 0
+
+    def inter_size(lbls_tuple):
+        key = tuple(sorted(lbls_tuple))
+        return intersections.get(key, 0)
+
+    for r in range(1, len(labels)+1):
+        sign = 1 if r % 2 == 1 else -1
+        for subset in it_combinations(labels, r):
+            if r == 1:
+                total += sign * set_sizes[subset[0]]
+            else:
+                total += sign * inter_size(subset)
+    return total
+
+def count_with_min_requirements(group_sizes, mins, r):
+    m = len(group_sizes)
+    if len(mins) != m: raise ValueError("mins length must match group_sizes")
+    if sum(mins) > r: return 0
+    remaining = r - sum(mins)
+
+    def bounded_compositions(total_rem, bounds):
+        if len(bounds) == 1:
+            if 0 <= total_rem <= bounds[0]:
+                yield (total_rem,)
+            return
+        b0 = bounds[0]
+        for x0 in range(0, min(b0, total_rem) + 1):
+            for rest in bounded_compositions(total_rem - x0, bounds[1:]):
+                yield (x0,) + rest
+
+    bounds = [group_sizes[i] - mins[i] for i in range(m)]
+    total = 0
+    for extra in bounded_compositions(remaining, bounds):
+        checkpoint()
+        picks = [mins[i] + extra[i] for i in range(m)]
+        ways = 1
+        for g, e in zip(group_sizes, picks):
+            ways *= nCr(g, e)
+        total += ways
+    return total
+
+def count_with_exact_requirements(group_sizes, exacts):
+    if len(group_sizes) != len(exacts): raise ValueError("exacts length mismatch")
+    ways = 1
+    for g, e in zip(group_sizes, exacts):
+        if e < 0 or e > g: return 0
+        ways *= nCr(g, e)
+    return ways
+
+def count_with_at_most(group_sizes, maxs, r):
+    if len(group_sizes) != len(maxs): raise ValueError("maxs length mismatch")
+    def bounded_compositions(total_rem, bounds):
+        if len(bounds) == 1:
+            if 0 <= total_rem <= bounds[0]:
+                yield (total_rem,)
+            return
+        b0 = bounds[0]
+        for x0 in range(0, min(b0, total_rem) + 1):
+            for rest in bounded_compositions(total_rem - x0, bounds[1:]):
+                yield (x0,) + rest
+    caps = [min(g, m) for g, m in zip(group_sizes, maxs)]
+    total = 0
+    for picks in bounded_compositions(r, caps):
+        checkpoint()
+        ways = 1
+        for g, e in zip(group_sizes, picks):
+            ways *= nCr(g, e)
+        total += ways
+    return total
+
+def arrangements_with_forbidden(n, r, forbidden_pairs):
+    all_items = tuple(range(n))
+    fset = set(tuple(p) for p in forbidden_pairs)
+
+    @lru_cache(maxsize=None)
+    def dp(mask, last):
+        checkpoint()
+        used_count = mask.bit_count()
+        if used_count == r:
+            return 1
+        total = 0
+        for x in all_items:
+            bit = 1 << x
+            if mask & bit: 
+                continue
+            if last != -1 and (last, x) in fset:
+                continue
+            total += dp(mask | bit, x)
+        return total
+
+    return dp(0, -1)
+
+def schedule_slots_count(people, slots, max_per_slot, must_include=None):
+    n = len(people)
+    if must_include is None:
+        must_include = []
+    
+    def bounded_compositions(total, parts, cap):
+        if parts == 1:
+            if 0 <= total <= cap:
+                yield (total,)
+            return
+        for x in range(0, min(total, cap) + 1):
+            for rest in bounded_compositions(total - x, parts - 1, cap):
+                yield (x,) + rest
+
+    total_count = 0
+    for counts in bounded_compositions(n, slots, max_per_slot):
+        checkpoint()
+        slot_req = [0]*slots
+        for _, s in must_include:
+            slot_req[s] += 1
+        feasible = all(slot_req[i] <= counts[i] for i in range(slots))
+        if not feasible:
+            continue
+        m = len(must_include)
+        remaining_people = n - m
+        remaining_counts = [counts[i] - slot_req[i] for i in range(slots)]
+        denom = 1
+        for c in remaining_counts:
+            denom *= math.factorial(c)
+        ways_assign = math.factorial(remaining_people) // denom
+        total_count += ways_assign
+    return total_count
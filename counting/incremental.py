@@ -0,0 +1,208 @@
+# counting/incremental.py
+"""
+Incremental generating-function counters.
+
+Both counters keep their intermediate products between calls, so changing
+one input costs about one polynomial convolution instead of a full recount.
+
+``IncrementalTeamCounter`` — team selection with per-group bounds. Group i
+contributes sum_{lo_i <= k <= hi_i} C(g_i, k) x^k and the count for r picks
+is the x^r coefficient of the product. Prefix products of the groups before
+a pivot and suffix products of those after it are cached. Editing the pivot
+group costs one convolution, and moving the pivot costs one convolution per
+group it passes.
+
+``IncrementalScheduleCounter`` — ``schedule_slots_count`` through the EGF
+(n-m)! [x^(n-m)] prod_j E_{c_j}(x), where c_j is slot j's capacity left
+after fixed assignments. Slots with equal residual capacity share cached
+powers E_c^k, so adding a slot or a fixed assignment extends one power.
+"""
+import math
+
+from .rook import _egf_capped, _egf_mul
+
+
+def _mul(a, b):
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                if y:
+                    out[i + j] += x * y
+    return out
+
+def _group_poly(size, lo, hi):
+    hi = size if hi is None else min(hi, size)
+    lo = max(lo, 0)
+    if lo > hi:
+        return [0]
+    return [math.comb(size, k) if k >= lo else 0 for k in range(hi + 1)]
+
+
+class IncrementalTeamCounter:
+    """
+    Team selection count with per-group [min, max] bounds, kept up to date
+    across single-group edits.
+    """
+
+    def __init__(self, group_sizes, mins=None, maxs=None):
+        m = len(group_sizes)
+        mins = list(mins) if mins else [0] * m
+        maxs = list(maxs) if maxs else [None] * m
+        if len(mins) != m or len(maxs) != m: raise ValueError("bounds length must match group_sizes")
+        self.groups = [(g, lo, hi) for g, lo, hi in zip(group_sizes, mins, maxs)]
+        self._polys = [_group_poly(*grp) for grp in self.groups]
+        # prefix[i] = product of polys[:i], valid for i <= pivot;
+        # suffix[i] = product of polys[i:], valid for i > pivot.
+        self._pivot = max(0, m - 1)
+        self._prefix = [[1]]
+        for p in self._polys[:-1]:
+            self._prefix.append(_mul(self._prefix[-1], p))
+        self._prefix += [None] * (m + 1 - len(self._prefix))
+        self._suffix = [None] * m + [[1]]
+        self._head = None
+        self.convolutions = 0
+
+    def __len__(self):
+        return len(self.groups)
+
+    def _move_pivot(self, j):
+        p = self._pivot
+        while p < j:
+            self._prefix[p + 1] = _mul(self._prefix[p], self._polys[p])
+            self.convolutions += 1
+            p += 1
+        while p > j:
+            self._suffix[p] = _mul(self._polys[p], self._suffix[p + 1])
+            self.convolutions += 1
+            p -= 1
+        self._pivot = p
+        self._head = None
+
+    def set_group(self, i, size=None, lo=None, hi=...):
+        """Change one group's size and/or bounds (hi=None means no maximum)."""
+        g0, lo0, hi0 = self.groups[i]
+        grp = (g0 if size is None else size, lo0 if lo is None else lo, hi0 if hi is ... else hi)
+        if grp == self.groups[i]:
+            return
+        self._move_pivot(i)
+        self.groups[i] = grp
+        self._polys[i] = _group_poly(*grp)
+        self._head = None
+
+    def add_group(self, size, lo=0, hi=None):
+        m = len(self.groups)
+        self.groups.append((size, lo, hi))
+        self._polys.append(_group_poly(size, lo, hi))
+        self._prefix.append(None)
+        self._suffix.append([1])
+        self._suffix[m] = None
+        self._move_pivot(m)
+
+    def count(self, r: int) -> int:
+        if not self.groups:
+            return 1 if r == 0 else 0
+        if r < 0: return 0
+        p = self._pivot
+        if self._head is None:
+            self._head = _mul(self._prefix[p], self._polys[p])
+            self.convolutions += 1
+        head, tail = self._head, self._suffix[p + 1]
+        total = 0
+        for k in range(max(0, r - len(tail) + 1), min(r, len(head) - 1) + 1):
+            total += head[k] * tail[r - k]
+        return total
+
+    def sync(self, group_sizes, mins=None, maxs=None):
+        """Apply only the differences between the current state and new inputs."""
+        m = len(group_sizes)
+        mins = list(mins) if mins else [0] * m
+        maxs = list(maxs) if maxs else [None] * m
+        if m < len(self.groups):
+            self.__init__(group_sizes, mins, maxs)
+            return self
+        for i, grp in enumerate(zip(group_sizes, mins, maxs)):
+            if i < len(self.groups):
+                if grp != self.groups[i]:
+                    self.set_group(i, *grp)
+            else:
+                self.add_group(*grp)
+        return self
+
+
+class IncrementalScheduleCounter:
+    """``schedule_slots_count`` kept up to date across slot, cap and fixed-assignment edits."""
+
+    def __init__(self, slots, max_per_slot, fixed_slots=()):
+        self.slots = slots
+        self.cap = max_per_slot
+        self.fixed = [0] * slots
+        for s in fixed_slots:
+            self.fixed[s] += 1
+        self._powers = {}
+        self._product = None
+        self.convolutions = 0
+
+    def _power(self, c, k):
+        """E_c^k as an integer EGF sequence, extending the cached chain by need."""
+        chain = self._powers.setdefault(c, [[1]])
+        while len(chain) <= k:
+            prev = chain[-1]
+            deg = len(prev) - 1 + c
+            chain.append(_egf_mul(prev + [0] * c, _egf_capped(c, deg), deg))
+            self.convolutions += 1
+        return chain[k]
+
+    def _residuals(self):
+        tally = {}
+        for f in self.fixed:
+            c = self.cap - f
+            tally[c] = tally.get(c, 0) + 1
+        return tally
+
+    def set_slots(self, slots):
+        if slots < self.slots and any(self.fixed[slots:]): raise ValueError("fixed assignment refers to a removed slot")
+        self.fixed = self.fixed[:slots] + [0] * max(0, slots - self.slots)
+        self.slots = slots
+        self._product = None
+
+    def set_cap(self, max_per_slot):
+        self.cap = max_per_slot
+        self._product = None
+
+    def set_fixed(self, fixed_slots):
+        fixed = [0] * self.slots
+        for s in fixed_slots:
+            fixed[s] += 1
+        if fixed != self.fixed:
+            self.fixed = fixed
+            self._product = None
+
+    def count(self, n_people: int) -> int:
+        m = sum(self.fixed)
+        rem = n_people - m
+        if rem < 0: return 0
+        tally = self._residuals()
+        if any(c < 0 for c in tally): return 0
+        if self._product is None:
+            prod = [1]
+            for c, k in sorted(tally.items()):
+                pw = self._power(c, k)
+                if len(prod) == 1:
+                    prod = pw
+                else:
+                    deg = len(prod) + len(pw) - 2
+                    prod = _egf_mul(prod + [0] * (deg + 1 - len(prod)), pw + [0] * (deg + 1 - len(pw)), deg)
+                    self.convolutions += 1
+            self._product = prod
+        return self._product[rem] if rem < len(self._product) else 0
+
+    def sync(self, slots, max_per_slot, fixed_slots=()):
+        if slots != self.slots:
+            self.slots = slots
+            self.fixed = [0] * slots
+            self._product = None
+        if max_per_slot != self.cap:
+            self.set_cap(max_per_slot)
+        self.set_fixed(fixed_slots)
+        return self
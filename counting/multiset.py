@@ -0,0 +1,67 @@
+# counting/multiset.py
+"""
+Arrangements of a multiset under adjacency and position constraints.
+
+The DP walks positions left to right. Its state is the vector of remaining
+counts per item type (packed into one mixed-radix int) plus the last type
+placed, so the table holds at most prod(c_i + 1) * k entries, however long
+the sequence is. That suits long sequences drawn from a handful of types,
+where a per-item bitmask would need 2**n states.
+"""
+from .cancel import checkpoint
+
+
+def constrained_multiset_count(counts: dict, forbidden_adjacent=(), forbidden_positions=None,
+                               symmetric: bool = False) -> int:
+    """
+    counts: {'A': 3, 'B': 2, ...}
+    forbidden_adjacent: pairs (a, b) meaning b may not directly follow a;
+        (a, a) forbids two a's in a row. ``symmetric`` also forbids (b, a).
+    forbidden_positions: {'A': {0, 4}, ...} 0-based positions a type may not take.
+    """
+    types = list(counts)
+    k = len(types)
+    index = {t: i for i, t in enumerate(types)}
+    sizes = [int(counts[t]) for t in types]
+    if any(c < 0 for c in sizes): raise ValueError("counts must be non-negative")
+    n = sum(sizes)
+
+    bad_next = [[False] * k for _ in range(k)]
+    for a, b in forbidden_adjacent:
+        if a not in index or b not in index: raise ValueError(f"unknown item type in pair ({a}, {b})")
+        bad_next[index[a]][index[b]] = True
+        if symmetric:
+            bad_next[index[b]][index[a]] = True
+
+    banned = [set() for _ in range(k)]
+    for t, positions in (forbidden_positions or {}).items():
+        if t not in index: raise ValueError(f"unknown item type {t!r}")
+        for p in positions:
+            if not 0 <= p < n: raise ValueError(f"position {p} outside 0..{n - 1}")
+            banned[index[t]].add(p)
+
+    # Mixed-radix packing: digit i holds the remaining count of type i.
+    strides = []
+    stride = 1
+    for c in sizes:
+        strides.append(stride)
+        stride *= c + 1
+    start = sum(c * s for c, s in zip(sizes, strides))
+
+    layer = {(start, -1): 1}
+    for pos in range(n):
+        checkpoint()
+        allowed = [i for i in range(k) if pos not in banned[i]]
+        nxt = {}
+        for (code, last), ways in layer.items():
+            for i in allowed:
+                if (code // strides[i]) % (sizes[i] + 1) == 0:
+                    continue
+                if last >= 0 and bad_next[last][i]:
+                    continue
+                key = (code - strides[i], i)
+                nxt[key] = nxt.get(key, 0) + ways
+        layer = nxt
+        if not layer:
+            return 0
+    return sum(layer.values())
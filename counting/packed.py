@@ -0,0 +1,397 @@
+# counting/packed.py
+"""
+Compact problem and result types with a versioned binary encoding.
+
+Each type uses ``__slots__`` and stores list-shaped data (group sizes, pairs,
+batch columns) as ``array.array`` instead of lists of Python ints. The
+encoding is
+
+    b"CNT" | version (u8) | kind (u8) | payload
+
+where scalars are little-endian int64, packed arrays are a typecode, a
+length and the raw little-endian items, strings are length-prefixed UTF-8,
+and big integers are a sign byte, a length and their magnitude from
+``int.to_bytes``. Version 2 added the coupled constraints of ``TeamSpec``;
+older blobs still decode, and re-encode at the current version. A round trip never goes through a decimal string, so even
+counts with millions of digits encode in linear time.
+
+A value's identity is a 16-byte BLAKE2b digest of its encoding. Problems
+built from the canonical ``counting.spec`` objects encode identically when
+they are equal, so the digest works as a cache key. It is computed once and
+kept in a slot; reassigning a field drops the cached encoding and digest.
+"""
+import hashlib
+import json
+from abc import ABC, abstractmethod
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+from .approx import LogCount
+from .teams import GroupConstraint
+
+MAGIC = b"CNT"
+FORMAT_VERSION = 2
+_SWAP = sys.byteorder != "little"
+_Q = struct.Struct("<q")
+_U32 = struct.Struct("<I")
+
+
+# ---------- Wire helpers ----------
+def _put_int(out, v):
+    out += _Q.pack(v)
+
+def _put_big(out, v):
+    mag = abs(v)
+    data = mag.to_bytes((mag.bit_length() + 7) // 8, "little")
+    out.append(1 if v < 0 else 0)
+    out += _U32.pack(len(data))
+    out += data
+
+def _put_array(out, arr):
+    if _SWAP:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    out += arr.typecode.encode()
+    out += _U32.pack(len(arr))
+    out += arr.tobytes()
+
+def _put_str(out, s):
+    data = s.encode()
+    out += _U32.pack(len(data))
+    out += data
+
+
+class _Reader:
+    __slots__ = ("buf", "pos", "version")
+
+    def __init__(self, buf, pos=0, version=FORMAT_VERSION):
+        self.buf, self.pos, self.version = memoryview(buf), pos, version
+
+    def take(self, n):
+        if self.pos + n > len(self.buf): raise ValueError("truncated payload")
+        chunk = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def int(self):
+        return _Q.unpack(self.take(8))[0]
+
+    def u32(self):
+        return _U32.unpack(self.take(4))[0]
+
+    def big(self):
+        negative = self.take(1)[0]
+        v = int.from_bytes(self.take(self.u32()), "little")
+        return -v if negative else v
+
+    def array(self):
+        arr = array(bytes(self.take(1)).decode())
+        count = self.u32()
+        arr.frombytes(self.take(count * arr.itemsize))
+        if _SWAP:
+            arr.byteswap()
+        return arr
+
+    def str(self):
+        return str(self.take(self.u32()), "utf-8")
+
+
+# ---------- Base ----------
+_KINDS = {}
+
+class Packed(ABC):
+    """Base for encodable values: equality, hashing and bytes via the canonical encoding."""
+    __slots__ = ("_blob", "_digest")
+    KIND = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _KINDS[cls.KIND] = cls
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name not in Packed.__slots__:
+            for cached in Packed.__slots__:
+                if hasattr(self, cached):
+                    object.__delattr__(self, cached)
+
+    @abstractmethod
+    def _encode(self, out):
+        """Append the payload to the bytearray ``out``."""
+
+    @classmethod
+    @abstractmethod
+    def _decode(cls, reader):
+        """The value whose payload ``reader`` (a ``_Reader``) is positioned at."""
+
+    def to_bytes(self) -> bytes:
+        blob = getattr(self, "_blob", None)
+        if blob is None:
+            out = bytearray(MAGIC)
+            out += bytes((FORMAT_VERSION, self.KIND))
+            self._encode(out)
+            blob = self._blob = bytes(out)
+        return blob
+
+    @property
+    def digest(self) -> bytes:
+        d = getattr(self, "_digest", None)
+        if d is None:
+            d = self._digest = hashlib.blake2b(self.to_bytes(), digest_size=16).digest()
+        return d
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.to_bytes() == self.to_bytes()
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+def from_bytes(blob):
+    """Decode any packed value; raises ValueError for foreign or newer data."""
+    if bytes(blob[:3]) != MAGIC: raise ValueError("not a packed counting value")
+    if len(blob) < 5: raise ValueError("truncated header")
+    version, kind = blob[3], blob[4]
+    if version > FORMAT_VERSION: raise ValueError(f"format version {version} is newer than {FORMAT_VERSION}")
+    cls = _KINDS.get(kind)
+    if cls is None: raise ValueError(f"unknown kind {kind}")
+    obj = cls._decode(_Reader(blob, 5, version))
+    if version == FORMAT_VERSION:
+        obj._blob = bytes(blob)
+    return obj
+
+def _ints(values):
+    return values if isinstance(values, array) and values.typecode == "q" else array("q", values)
+
+def _flat(pairs):
+    return array("q", (x for pair in pairs for x in pair))
+
+def _pairs(arr):
+    return tuple(zip(arr[::2], arr[1::2]))
+
+
+# ---------- Problems ----------
+class TeamSpec(Packed):
+    """Constraints are ``GroupConstraint``s; a missing maximum is encoded as -1."""
+    __slots__ = ("group_sizes", "r", "mins", "maxs", "exacts", "constraints")
+    KIND = 1
+
+    def __init__(self, group_sizes, r, mins=(), maxs=(), exacts=(), constraints=()):
+        self.group_sizes, self.r = _ints(group_sizes), int(r)
+        self.mins, self.maxs, self.exacts = _ints(mins), _ints(maxs), _ints(exacts)
+        self.constraints = tuple(GroupConstraint(tuple(c[0]), *c[1:]) for c in constraints)
+
+    @classmethod
+    def from_problem(cls, p):
+        return cls(p.group_sizes, p.r, p.mins, p.maxs, p.exacts, p.constraints)
+
+    def _encode(self, out):
+        _put_int(out, self.r)
+        for arr in (self.group_sizes, self.mins, self.maxs, self.exacts):
+            _put_array(out, arr)
+        _put_int(out, len(self.constraints))
+        for c in self.constraints:
+            _put_array(out, _ints(c.groups))
+            _put_int(out, c.min)
+            _put_int(out, -1 if c.max is None else c.max)
+
+    @classmethod
+    def _decode(cls, rd):
+        r = rd.int()
+        sizes, mins, maxs, exacts = rd.array(), rd.array(), rd.array(), rd.array()
+        constraints = []
+        for _ in range(rd.int() if rd.version >= 2 else 0):
+            groups, lo, hi = tuple(rd.array()), rd.int(), rd.int()
+            constraints.append(GroupConstraint(groups, lo, None if hi < 0 else hi))
+        return cls(sizes, r, mins, maxs, exacts, constraints)
+
+
+class AdjacencySpec(Packed):
+    """Forbidden pairs are stored flat: a0, b0, a1, b1, ..."""
+    __slots__ = ("n", "r", "pairs")
+    KIND = 2
+
+    def __init__(self, n, r, pairs):
+        self.n, self.r = int(n), int(r)
+        self.pairs = pairs if isinstance(pairs, array) else _flat(sorted(set(map(tuple, pairs))))
+
+    @classmethod
+    def from_problem(cls, p):
+        return cls(p.n, p.r, p.forbidden)
+
+    @property
+    def forbidden(self):
+        return _pairs(self.pairs)
+
+    def _encode(self, out):
+        _put_int(out, self.n)
+        _put_int(out, self.r)
+        _put_array(out, self.pairs)
+
+    @classmethod
+    def _decode(cls, rd):
+        return cls(rd.int(), rd.int(), rd.array())
+
+
+class ScheduleSpec(Packed):
+    """Assignments are stored flat as (person index, slot) pairs."""
+    __slots__ = ("people", "slots", "cap", "fixed", "forbidden")
+    KIND = 3
+
+    def __init__(self, people, slots, cap, fixed=(), forbidden=()):
+        self.people, self.slots, self.cap = tuple(people), int(slots), int(cap)
+        index = {p: i for i, p in enumerate(self.people)}
+        self.fixed = fixed if isinstance(fixed, array) else _flat(sorted((index[n], s) for n, s in fixed))
+        self.forbidden = (forbidden if isinstance(forbidden, array)
+                          else _flat(sorted({(index[n], s) for n, s in forbidden})))
+
+    @classmethod
+    def from_problem(cls, p):
+        return cls(p.people, p.slots, p.cap, p.fixed, p.forbidden)
+
+    def assignments(self, which):
+        """(name, slot) pairs of ``fixed`` or ``forbidden``."""
+        return tuple((self.people[i], s) for i, s in _pairs(getattr(self, which)))
+
+    def _encode(self, out):
+        _put_int(out, self.slots)
+        _put_int(out, self.cap)
+        _put_int(out, len(self.people))
+        for name in self.people:
+            _put_str(out, name)
+        _put_array(out, self.fixed)
+        _put_array(out, self.forbidden)
+
+    @classmethod
+    def _decode(cls, rd):
+        slots, cap = rd.int(), rd.int()
+        people = tuple(rd.str() for _ in range(rd.int()))
+        return cls(people, slots, cap, rd.array(), rd.array())
+
+
+class BatchSpec(Packed):
+    """A batch nCr/nPr request: op is "nCr" or "nPr", mode one of batch.MODES."""
+    __slots__ = ("op", "mode", "modulus", "ns", "rs")
+    KIND = 4
+
+    def __init__(self, op, mode, modulus, ns, rs):
+        if len(ns) != len(rs): raise ValueError("ns and rs must have the same length")
+        self.op, self.mode, self.modulus = op, mode, int(modulus)
+        self.ns, self.rs = _ints(ns), _ints(rs)
+
+    def _encode(self, out):
+        _put_str(out, self.op)
+        _put_str(out, self.mode)
+        _put_int(out, self.modulus)
+        _put_array(out, self.ns)
+        _put_array(out, self.rs)
+
+    @classmethod
+    def _decode(cls, rd):
+        return cls(rd.str(), rd.str(), rd.int(), rd.array(), rd.array())
+
+
+# ---------- Results ----------
+class CountResult(Packed):
+    """An exact count (int) or a ``LogCount``, tagged with the digest of its problem."""
+    __slots__ = ("problem", "value", "meta")
+    KIND = 16
+
+    def __init__(self, problem, value, meta=None):
+        self.problem = problem.digest if isinstance(problem, Packed) else bytes(problem)
+        self.value, self.meta = value, meta
+
+    def _encode(self, out):
+        out += self.problem
+        if isinstance(self.value, LogCount):
+            out.append(1)
+            out += struct.pack("<dd", self.value.log10, self.value.rel_error)
+        else:
+            out.append(0)
+            _put_big(out, self.value)
+        _put_str(out, json.dumps(self.meta, sort_keys=True) if self.meta is not None else "")
+
+    @classmethod
+    def _decode(cls, rd):
+        problem = bytes(rd.take(16))
+        if rd.take(1)[0]:
+            value = LogCount(*struct.unpack("<dd", rd.take(16)))
+        else:
+            value = rd.big()
+        meta = rd.str()
+        return cls(problem, value, json.loads(meta) if meta else None)
+
+
+class BatchResult(Packed):
+    """
+    Batch values: exact big ints are stored as one length array plus the
+    concatenated magnitudes (signs in a byte array), mod results as int64
+    and log10 results as float64.
+    """
+    __slots__ = ("problem", "mode", "values")
+    KIND = 17
+
+    def __init__(self, problem, mode, values):
+        self.problem = problem.digest if isinstance(problem, Packed) else bytes(problem)
+        self.mode = mode
+        if hasattr(values, "tolist"):
+            values = values.tolist()
+        if mode == "exact":
+            self.values = list(values)
+        else:
+            self.values = values if isinstance(values, array) else array("q" if mode == "mod" else "d", values)
+
+    def _encode(self, out):
+        out += self.problem
+        _put_str(out, self.mode)
+        if self.mode != "exact":
+            _put_array(out, self.values)
+            return
+        mags = [abs(v).to_bytes((abs(v).bit_length() + 7) // 8, "little") for v in self.values]
+        _put_array(out, array("q", map(len, mags)))
+        _put_array(out, array("b", (v < 0 for v in self.values)))
+        out += b"".join(mags)
+
+    @classmethod
+    def _decode(cls, rd):
+        problem, mode = bytes(rd.take(16)), rd.str()
+        if mode != "exact":
+            return cls(problem, mode, rd.array())
+        lengths, signs = rd.array(), rd.array()
+        values = []
+        for n, neg in zip(lengths, signs):
+            v = int.from_bytes(rd.take(n), "little")
+            values.append(-v if neg else v)
+        return cls(problem, mode, values)
+
+
+# ---------- Cache ----------
+class BlobCache:
+    """Bounded LRU of encoded results keyed by problem digest."""
+    __slots__ = ("max_entries", "_data")
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, problem):
+        blob = self._data.get(problem.digest)
+        if blob is None:
+            return None
+        self._data.move_to_end(problem.digest)
+        return from_bytes(blob)
+
+    def put(self, problem, result):
+        self._data[problem.digest] = result.to_bytes()
+        self._data.move_to_end(problem.digest)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        return result
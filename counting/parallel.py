@@ -0,0 +1,220 @@
+# counting/parallel.py
+"""
+Multi-core execution for the bitmask DP and the composition sums.
+
+``arrangements_with_forbidden`` runs the layered DP from ``budget``. Each
+popcount layer's masks are split into disjoint row ranges, which workers
+fill from the previous layer in shared memory-mapped files. Every state is
+computed exactly once, whatever the worker count, and the memory budget
+covers the layers and all workers' buffers.
+
+For the scheduling and team counters, the parent expands first-k prefixes
+of the compositions, writes them together with the problem data into
+``multiprocessing.shared_memory`` int64 arrays, and hands each worker a
+contiguous slice. Tasks therefore carry only a block name and two indices.
+Partial sums come back in submission order and are added in that order, so
+results are identical for any worker count.
+"""
+import atexit
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from .budget import DEFAULT_MEMORY_BUDGET, bounded_arrangements_with_forbidden
+from .core import arrangements_with_forbidden, count_with_min_requirements, nCr, schedule_slots_count
+
+# Aim for several slices per worker so uneven subtrees balance out.
+TASKS_PER_WORKER = 4
+# Masks are packed into int64 shared arrays.
+_MAX_ITEMS = 62
+
+_executor = None  # (workers, pool)
+_executor_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    The shared process pool, reused across calls. Asking for a different
+    worker count replaces it, and the old pool is shut down once the work
+    already submitted to it has finished.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None or _executor[0] != workers:
+            if _executor is not None:
+                _executor[1].shutdown(wait=False)
+            # spawn: forking a threaded server process (Streamlit) is unsafe.
+            _executor = (workers, ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")))
+        return _executor[1]
+
+@atexit.register
+def shutdown_executor():
+    """Stop the shared pool's processes; the next ``get_executor`` starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor[1].shutdown()
+            _executor = None
+
+class _SharedTable:
+    """A named int64 shared-memory block holding several 2-D arrays."""
+
+    def __init__(self, **arrays):
+        arrays = {k: np.ascontiguousarray(np.atleast_2d(v), dtype=np.int64) for k, v in arrays.items()}
+        size = max(1, sum(a.nbytes for a in arrays.values()))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.layout = []
+        offset = 0
+        for key, a in arrays.items():
+            np.ndarray(a.shape, np.int64, self.shm.buf, offset)[:] = a
+            self.layout.append((key, a.shape, offset))
+            offset += a.nbytes
+
+    @property
+    def spec(self):
+        return self.shm.name, tuple(self.layout)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+@contextmanager
+def _attach(spec, lo, hi):
+    """
+    Views into the shared block, with ``prefixes`` cut to rows lo..hi. They
+    are only valid inside the ``with`` block, which must copy what it keeps.
+    """
+    name, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+    views = {key: np.ndarray(shape, np.int64, shm.buf, offset) for key, shape, offset in layout}
+    views["prefixes"] = views["prefixes"][lo:hi]
+    try:
+        yield views
+    finally:
+        views.clear()  # the block cannot be closed while views export it
+        shm.close()
+
+def _slices(total, workers):
+    chunks = max(1, min(total, workers * TASKS_PER_WORKER))
+    step = -(-total // chunks)
+    return [(lo, min(lo + step, total)) for lo in range(0, total, step)]
+
+def _run(spec, worker, total, workers):
+    if total == 0:
+        return 0
+    ex = get_executor(workers)
+    parts = [(spec, lo, hi) for lo, hi in _slices(total, workers)]
+    return sum(ex.map(worker, *zip(*parts)))
+
+# ---------- Forbidden adjacency ----------
+def parallel_arrangements_with_forbidden(n, r, forbidden_pairs, workers=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                                         spill_dir=None):
+    """``arrangements_with_forbidden`` with every DP layer split across processes."""
+    workers = workers or default_workers()
+    if n > _MAX_ITEMS or r <= 1:
+        return arrangements_with_forbidden(n, r, forbidden_pairs)
+    executor = get_executor(workers) if workers > 1 else None
+    return bounded_arrangements_with_forbidden(n, r, forbidden_pairs, memory_budget, spill_dir, executor, workers).value
+
+# ---------- Composition sums ----------
+def _compositions(total, bounds):
+    if not bounds:
+        if total == 0:
+            yield ()
+        return
+    if len(bounds) == 1:
+        if 0 <= total <= bounds[0]:
+            yield (total,)
+        return
+    for x0 in range(0, min(bounds[0], total) + 1):
+        for rest in _compositions(total - x0, bounds[1:]):
+            yield (x0,) + rest
+
+def _prefixes(total, bounds, workers):
+    """Shortest first-k prefixes of the bounded compositions giving enough tasks."""
+    prefixes = [()]
+    k = 0
+    while k < len(bounds) - 1 and len(prefixes) < workers * TASKS_PER_WORKER:
+        prefixes = [p + (x,) for p in prefixes for x in range(0, min(bounds[k], total - sum(p)) + 1)]
+        k += 1
+    return np.array(prefixes, dtype=np.int64).reshape(len(prefixes), k)
+
+def _min_requirements_worker(spec, lo, hi):
+    with _attach(spec, lo, hi) as t:
+        sizes, mins = t["groups"].tolist()
+        remaining = int(t["params"][0][0])
+        prefixes = t["prefixes"].tolist()
+    bounds = [g - m for g, m in zip(sizes, mins)]
+    total = 0
+    for prefix in prefixes:
+        k = len(prefix)
+        for rest in _compositions(remaining - sum(prefix), bounds[k:]):
+            ways = 1
+            for g, m, e in zip(sizes, mins, prefix + list(rest)):
+                ways *= nCr(g, m + e)
+            total += ways
+    return total
+
+def parallel_count_with_min_requirements(group_sizes, mins, r, workers=None):
+    """``count_with_min_requirements`` with first-group prefixes split across processes."""
+    workers = workers or default_workers()
+    m = len(group_sizes)
+    if workers == 1 or m < 2:
+        return count_with_min_requirements(group_sizes, mins, r)
+    if len(mins) != m: raise ValueError("mins length must match group_sizes")
+    if sum(mins) > r: return 0
+    remaining = r - sum(mins)
+    bounds = [g - lo for g, lo in zip(group_sizes, mins)]
+    prefixes = _prefixes(remaining, bounds, workers)
+    table = _SharedTable(params=[remaining], groups=[group_sizes, mins], prefixes=prefixes)
+    try:
+        return _run(table.spec, _min_requirements_worker, len(prefixes), workers)
+    finally:
+        table.close()
+
+def _schedule_worker(spec, lo, hi):
+    with _attach(spec, lo, hi) as t:
+        n, slots, cap, m = t["params"][0].tolist()
+        slot_req = t["slot_req"][0].tolist()
+        prefixes = t["prefixes"].tolist()
+    fact_rem = math.factorial(n - m)
+    total = 0
+    for prefix in prefixes:
+        k = len(prefix)
+        for rest in _compositions(n - sum(prefix), [cap] * (slots - k)):
+            counts = prefix + list(rest)
+            if any(slot_req[i] > counts[i] for i in range(slots)):
+                continue
+            denom = 1
+            for c, q in zip(counts, slot_req):
+                denom *= math.factorial(c - q)
+            total += fact_rem // denom
+    return total
+
+def parallel_schedule_slots_count(people, slots, max_per_slot, must_include=None, workers=None):
+    """``schedule_slots_count`` with first-slot prefixes split across processes."""
+    workers = workers or default_workers()
+    if workers == 1 or slots < 2:
+        return schedule_slots_count(people, slots, max_per_slot, must_include)
+    if must_include is None:
+        must_include = []
+    n = len(people)
+    slot_req = [0] * slots
+    for _, s in must_include:
+        slot_req[s] += 1
+    prefixes = _prefixes(n, [max_per_slot] * slots, workers)
+    table = _SharedTable(
+        params=[n, slots, max_per_slot, len(must_include)], slot_req=slot_req, prefixes=prefixes
+    )
+    try:
+        return _run(table.spec, _schedule_worker, len(prefixes), workers)
+    finally:
+        table.close()
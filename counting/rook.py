@@ -0,0 +1,215 @@
+# counting/rook.py
+"""
+Forbidden-position counting with rook polynomials.
+
+A board is a set of forbidden cells (row, col). Its rook number r_k counts
+ways to pick k forbidden cells with no two in a row or column, and
+inclusion-exclusion over those placements gives the number of assignments
+that avoid every forbidden cell.
+
+Boards are split into independent sub-boards (cells connected through shared
+rows or columns); the rook polynomial of the whole board is the product of
+theirs. A full rectangular sub-board has a closed form; anything else falls
+back to a bitmask DP over the frontier of its smaller side.
+
+For scheduling, a slot can take several people, so a column may hold up to
+its capacity of rooks. ``schedule_with_forbidden`` tracks per-slot rook
+counts instead, and weights each placement with the exponential generating
+function of the remaining free assignments.
+"""
+import math
+
+from .cancel import checkpoint
+
+
+def _components(cells):
+    """Group cells into independent sub-boards (shared row or column)."""
+    parent = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for r, c in cells:
+        a, b = ("r", r), ("c", c)
+        parent.setdefault(a, a)
+        parent.setdefault(b, b)
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[ra] = rb
+    groups = {}
+    for cell in cells:
+        groups.setdefault(find(("r", cell[0])), []).append(cell)
+    return list(groups.values())
+
+def _poly_mul(a, b):
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return out
+
+def _component_rook(cells):
+    rows = sorted({r for r, _ in cells})
+    cols = sorted({c for _, c in cells})
+    if len(cells) == len(rows) * len(cols):
+        a, b = len(rows), len(cols)
+        return [math.comb(a, k) * math.comb(b, k) * math.factorial(k) for k in range(min(a, b) + 1)]
+    # Bitmask DP: iterate over the longer side, mask over the shorter one.
+    # A column's bit is dropped once its last row has been processed, so the
+    # mask only spans the columns still reachable (the frontier), and the
+    # number of rooks placed is carried alongside it.
+    if len(cols) > len(rows):
+        cells = [(c, r) for r, c in cells]
+        rows, cols = cols, rows
+    bit = {c: 1 << i for i, c in enumerate(cols)}
+    by_row = {}
+    last_row = {}
+    for r, c in cells:
+        by_row.setdefault(r, []).append(bit[c])
+        last_row[c] = max(last_row.get(c, r), r)
+    retire = {}
+    for c, r in last_row.items():
+        retire[r] = retire.get(r, 0) | bit[c]
+    layer = {(0, 0): 1}
+    for r in rows:
+        checkpoint()
+        keep = ~retire.get(r, 0)
+        nxt = {}
+        for (mask, k), ways in layer.items():
+            key = (mask & keep, k)
+            nxt[key] = nxt.get(key, 0) + ways
+            for b in by_row[r]:
+                if not mask & b:
+                    key = ((mask | b) & keep, k + 1)
+                    nxt[key] = nxt.get(key, 0) + ways
+        layer = nxt
+    poly = [0] * (len(cols) + 1)
+    for (_, k), ways in layer.items():
+        poly[k] += ways
+    return poly
+
+def rook_polynomial(cells) -> list:
+    """Rook numbers [r_0, r_1, ...] of a board given as (row, col) cells."""
+    cells = list(set(tuple(c) for c in cells))
+    poly = [1]
+    for comp in _components(cells):
+        poly = _poly_mul(poly, _component_rook(comp))
+    while len(poly) > 1 and poly[-1] == 0:
+        poly.pop()
+    return poly
+
+def count_forbidden_permutations(n: int, r: int, forbidden) -> int:
+    """
+    Arrangements of r of the items 0..n-1 into positions 0..r-1 where no
+    (item, position) pair in ``forbidden`` occurs. n = r with forbidden
+    {(i, i)} gives the derangement numbers.
+    """
+    if r < 0 or r > n: return 0
+    cells = {(p, i) for i, p in forbidden if 0 <= i < n and 0 <= p < r}
+    total = 0
+    for k, rk in enumerate(rook_polynomial(cells)):
+        if rk and k <= r:
+            term = rk * math.perm(n - k, r - k)
+            total += -term if k % 2 else term
+    return total
+
+# ---------- Capacity-aware boards (scheduling) ----------
+def _egf_mul(a, b, n):
+    """Product of EGFs stored as k!·[x^k] integer sequences, truncated at x^n."""
+    out = [0] * (n + 1)
+    for k in range(n + 1):
+        s = 0
+        for i in range(k + 1):
+            if a[i] and b[k - i]:
+                s += math.comb(k, i) * a[i] * b[k - i]
+        out[k] = s
+    return out
+
+def _egf_capped(m, n):
+    """k!·[x^k] of sum_{i<=m} x^i / i!."""
+    return [1 if k <= m else 0 for k in range(n + 1)]
+
+def schedule_with_forbidden(people, slots, max_per_slot, forbidden, must_include=None):
+    """
+    ``schedule_slots_count`` with forbidden (person, slot) assignments.
+
+    Inclusion-exclusion runs over sets S of forbidden cells using each person
+    at most once and each slot at most its remaining capacity. Every such S
+    contributes (-1)^|S| times the number of ways to place the other people,
+    (n-|S|)! [x^(n-|S|)] prod_j E_{cap_j - s_j}(x), where E_m is the truncated
+    exponential series. Independent sub-boards multiply as polynomials in |S|.
+    """
+    if must_include is None:
+        must_include = []
+    caps = [max_per_slot] * slots
+    fixed = {}
+    for name, s in must_include:
+        caps[s] -= 1
+        fixed[name] = s
+    if any(c < 0 for c in caps): return 0
+    forbidden = {(name, s) for name, s in forbidden if 0 <= s < slots}
+    if any((name, s) in forbidden for name, s in fixed.items()): return 0
+    free_people = [p for p in people if p not in fixed]
+    n = len(people) - len(must_include)
+    if n < 0: return 0
+
+    row_of = {p: i for i, p in enumerate(free_people)}
+    cells = [(row_of[name], s) for name, s in forbidden if name in row_of]
+    comps = _components(cells)
+    used_cols = {c for _, c in cells}
+
+    base = [1] + [0] * n
+    for j in range(slots):
+        if j not in used_cols:
+            base = _egf_mul(base, _egf_capped(caps[j], n), n)
+    total = {0: base}
+
+    egf_cache = {}
+    for comp in comps:
+        cols = sorted({c for _, c in comp})
+        col_idx = {c: i for i, c in enumerate(cols)}
+        by_row = {}
+        for r, c in comp:
+            by_row.setdefault(r, []).append(col_idx[c])
+        comp_caps = [caps[c] for c in cols]
+        # States: rooks placed per slot of this sub-board.
+        layer = {tuple([0] * len(cols)): 1}
+        for r in sorted(by_row):
+            checkpoint()
+            nxt = dict(layer)
+            for state, ways in layer.items():
+                for i in by_row[r]:
+                    if state[i] < comp_caps[i]:
+                        key = state[:i] + (state[i] + 1,) + state[i + 1:]
+                        nxt[key] = nxt.get(key, 0) + ways
+            layer = nxt
+        comp_poly = {}
+        for state, ways in layer.items():
+            residual = tuple(sorted(cp - s for cp, s in zip(comp_caps, state)))
+            egf = egf_cache.get(residual)
+            if egf is None:
+                egf = [1] + [0] * n
+                for m in residual:
+                    egf = _egf_mul(egf, _egf_capped(m, n), n)
+                egf_cache[residual] = egf
+            k = sum(state)
+            w = -ways if k % 2 else ways
+            acc = comp_poly.setdefault(k, [0] * (n + 1))
+            for i, v in enumerate(egf):
+                acc[i] += w * v
+        combined = {}
+        for k1, a in total.items():
+            for k2, b in comp_poly.items():
+                if k1 + k2 > n:
+                    continue
+                prod = _egf_mul(a, b, n)
+                acc = combined.setdefault(k1 + k2, [0] * (n + 1))
+                for i, v in enumerate(prod):
+                    acc[i] += v
+        total = combined
+
+    return sum(seq[n - k] for k, seq in total.items() if k <= n)
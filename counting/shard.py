@@ -0,0 +1,668 @@
+# counting/shard.py
+"""
+Sharded counting across processes and hosts.
+
+A ``ShardJob`` splits one problem into shards:
+
+* Forbidden adjacency: the popcount layers of ``budget``'s layered DP. A
+  shard is a range of mask ranks (rows) of one layer d, pulled from layer
+  d - 1 alone, so the shards of a layer are disjoint and together do
+  exactly the work of the serial DP. A layer's shards can only be claimed
+  once the previous layer is finished. Each shard stores its rows in the
+  job's layer file and its exact row total as its count; the total of the
+  last layer (d = r) is the answer.
+* Scheduling: the slot-count compositions are split by their first-k slot
+  counts, and a shard is a contiguous run of prefixes. All shards are
+  independent, and the answer is their sum.
+
+A shard's count is an exact Python int, so the split never changes the
+answer.
+
+The coordinator is a job directory:
+
+    job.json           the plan: kind, packed problem (hex), shard list
+    done/<i>.cnt       a finished shard, as a packed ``CountResult``
+    lease/<i>          a claimed shard (worker id and time)
+    lease/<i>.*.takeover  marks one expired lease of shard i as taken over
+    layers/<d>.bin     adjacency only: rows of layer d, 32-bit limbs in
+                       little-endian uint64 as in ``budget`` (sparse until
+                       written; removed once layer d + 1 is finished)
+
+Workers claim a shard by creating its lease file exclusively, count it and
+write the result atomically (temporary file, then rename). Results are tagged
+with the plan's digest, so results from a different plan are rejected.
+Finished shards survive crashes and restarts, and an expired lease (a worker
+that died) is taken over by the next claimant. A worker touches its lease
+every quarter lease period while it counts, so a slow shard is not taken
+over, and it only removes a lease it still holds. ``serve`` puts a directory
+behind a small JSON-lines TCP server for hosts that do not share a
+filesystem: workers fetch the previous layer from it and send their rows
+back with the count. ``run_worker`` accepts either a directory or
+"host:port".
+The server has no authentication: any client that can reach it can claim
+or release any shard and submit any value as a shard's count. Shard indices
+are checked against the plan before a path is built from them, but a wrong
+count from a hostile client would still corrupt the total, so only expose
+it on a trusted network (it binds to 127.0.0.1 by default).
+
+The ``shard.py`` script at the repository root drives all of this from the
+command line.
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from .budget import (
+    _LIMB_BITS, _MAX_ITEMS, DEFAULT_MEMORY_BUDGET, _allowed, _binom, _layer_rows, _limb_total, _pull_rows, _slices,
+)
+from .cancel import Cancelled, checkpoint
+from .packed import AdjacencySpec, CountResult, ScheduleSpec, from_bytes
+from .parallel import _compositions
+
+JOB_FORMAT = 2
+# Schedule: shards per job. Adjacency: the most shards one DP layer is cut into.
+DEFAULT_SHARDS = 64
+# Seconds after which a claimed but unfinished shard may be taken over.
+DEFAULT_LEASE = 3600
+# Prefix units per requested schedule shard, so that uneven subtrees average out.
+UNITS_PER_SHARD = 4
+# Adjacency layers are not cut finer than this many rows per shard.
+MIN_SHARD_ROWS = 64
+# Seconds a worker waits before asking again while a layer is being finished.
+POLL_SECONDS = 1.0
+# Largest layer slice a remote worker fetches in one message.
+FETCH_BYTES = 8 * 2 ** 20
+_ROW = np.dtype("<u8")
+
+
+class ShardJob(NamedTuple):
+    kind: str                # "adjacency" or "schedule"
+    problem: object          # AdjacencySpec or ScheduleSpec
+    depth: int               # schedule: prefix length the shards were cut at; adjacency: last layer
+    shards: tuple            # per shard, a tuple of units; adjacency: ((layer, lo, hi),)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "format": JOB_FORMAT, "kind": self.kind, "problem": self.problem.to_bytes().hex(),
+            "depth": self.depth, "shards": [[list(u) for u in s] for s in self.shards],
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        d = json.loads(text)
+        if d.get("format") != JOB_FORMAT: raise ValueError(f"unsupported job format {d.get('format')!r}")
+        shards = tuple(tuple(tuple(u) for u in s) for s in d["shards"])
+        return cls(d["kind"], from_bytes(bytes.fromhex(d["problem"])), d["depth"], shards)
+
+    @property
+    def digest(self) -> bytes:
+        return hashlib.blake2b(self.to_json().encode(), digest_size=16).digest()
+
+
+class ShardStatus(NamedTuple):
+    shards: int
+    done: int
+    leased: int
+    partial: int             # exact sum of the finished shards that add to the answer
+    complete: bool
+
+
+def _check_index(job, index):
+    """``index`` if it names a shard of ``job``; anything else is rejected before it reaches a path."""
+    if type(index) is not int or not 0 <= index < len(job.shards):
+        raise ValueError(f"no shard {index!r} in this job")
+    return index
+
+def _split(units, shards):
+    shards = max(1, min(shards, len(units)))
+    step = -(-len(units) // shards) if units else 1
+    return tuple(tuple(units[i:i + step]) for i in range(0, len(units), step))
+
+# ---------- Planning ----------
+def plan_adjacency(n, r, forbidden_pairs, shards=DEFAULT_SHARDS) -> ShardJob:
+    """
+    Cut ``arrangements_with_forbidden(n, r, pairs)`` into row ranges of the
+    DP layers 2..r, at most ``shards`` per layer. Lengths 0 and 1 are a single
+    trivial shard, and r > n has no shards at all (the count is 0).
+    """
+    problem = AdjacencySpec(n, r, forbidden_pairs)
+    if r > n: return ShardJob("adjacency", problem, r, ())
+    if r <= 1: return ShardJob("adjacency", problem, r, (((r, 0, n if r else 1),),))
+    if n > _MAX_ITEMS: raise ValueError(f"masks of n={n} items cannot be packed")
+    units = []
+    for d in range(2, r + 1):
+        rows = _layer_rows(n, d)
+        units += [((d, lo, hi),) for lo, hi in _slices(rows, max(1, min(shards, rows // MIN_SHARD_ROWS)))]
+    return ShardJob("adjacency", problem, r, tuple(units))
+
+def plan_schedule(people, slots, cap, fixed=(), shards=DEFAULT_SHARDS) -> ShardJob:
+    """Cut ``schedule_slots_count`` by the slot counts of the first k slots."""
+    problem = ScheduleSpec(people, slots, cap, fixed)
+    n = len(problem.people)
+    prefixes = [()]
+    k = 0
+    while k < slots - 1 and len(prefixes) < shards * UNITS_PER_SHARD:
+        left = slots - k - 1
+        prefixes = [p + (x,) for p in prefixes for x in range(0, min(cap, n - sum(p)) + 1)
+                    if n - sum(p) - x <= cap * left]
+        k += 1
+    return ShardJob("schedule", problem, k, _split(prefixes, shards))
+
+# ---------- Counting one shard ----------
+def _layer(job, i):
+    """DP layer of shard i (0 for schedule shards, which all add to the answer)."""
+    return job.shards[i][0][0] if job.kind == "adjacency" else 0
+
+def _final(job, i):
+    return job.kind != "adjacency" or _layer(job, i) == job.depth
+
+def _layer_shape(problem, d):
+    limbs = max(1, -(-math.perm(problem.n, problem.r).bit_length() // _LIMB_BITS))
+    return _layer_rows(problem.n, d), problem.n, limbs
+
+def _first_layer(problem):
+    """Layer 1: each item alone, as the last item; the colex rank of {y} is y."""
+    layer = np.zeros(_layer_shape(problem, 1), dtype=_ROW)
+    for y in range(problem.n):
+        layer[y, y, 0] = 1
+    return layer
+
+def _adjacency_shard(job, units, source):
+    (d, lo, hi), = units
+    if d <= 1:
+        return hi - lo, None
+    if source is None: raise ValueError(f"a layer {d} shard needs layer {d - 1}")
+    p = job.problem
+    n = p.n
+    allowed, binom = _allowed(n, p.forbidden), _binom(n)
+    shape = _layer_shape(p, d)
+    chunk = max(1, min(DEFAULT_MEMORY_BUDGET // (4 * shape[1] * shape[2] * 8), 1 << 20))
+    # Rows of the last layer are only summed, never read again.
+    rows = np.empty((hi - lo,) + shape[1:], dtype=_ROW) if d < job.depth else None
+    total = 0
+    for a in range(lo, hi, chunk):
+        checkpoint()
+        b = min(a + chunk, hi)
+        block = _pull_rows(source, a, b, n, d, allowed, binom)
+        total += _limb_total(block)
+        if rows is not None:
+            rows[a - lo:b - lo] = block
+    return total, rows
+
+def _schedule_shard(job, units):
+    p = job.problem
+    n, m = len(p.people), len(p.fixed) // 2
+    slot_req = [0] * p.slots
+    for _, s in p.assignments("fixed"):
+        slot_req[s] += 1
+    fact_rem = math.factorial(n - m)
+    total = 0
+    for prefix in units:
+        for rest in _compositions(n - sum(prefix), [p.cap] * (p.slots - len(prefix))):
+            checkpoint()
+            counts = prefix + rest
+            if any(q > c for q, c in zip(slot_req, counts)):
+                continue
+            denom = 1
+            for c, q in zip(counts, slot_req):
+                denom *= math.factorial(c - q)
+            total += fact_rem // denom
+    return total
+
+def count_shard(job: ShardJob, index: int, source=None):
+    """
+    (count, rows) of one shard. An adjacency shard of layer d needs
+    ``source``, the rows of layer d - 1, and returns its own rows unless d is
+    the last layer; other shards return None for rows.
+    """
+    units = job.shards[index]
+    if job.kind == "adjacency": return _adjacency_shard(job, units, source)
+    if job.kind == "schedule": return _schedule_shard(job, units), None
+    raise ValueError(f"unknown job kind {job.kind!r}")
+
+def count_job(job: ShardJob) -> int:
+    """All shards in this process, layer by layer; the reference the distributed total must equal."""
+    layers = {1: _first_layer(job.problem)} if job.kind == "adjacency" and job.depth >= 2 else {}
+    total = 0
+    for i in range(len(job.shards)):
+        d = _layer(job, i)
+        value, rows = count_shard(job, i, layers.get(d - 1))
+        if rows is not None:
+            if d not in layers:
+                layers.pop(d - 2, None)
+                layers[d] = np.zeros(_layer_shape(job.problem, d), dtype=_ROW)
+            _, lo, hi = job.shards[i][0]
+            layers[d][lo:hi] = rows
+        if _final(job, i):
+            total += value
+    return total
+
+# ---------- File coordinator ----------
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class FileCoordinator:
+    """Shard bookkeeping in a job directory; safe for concurrent local processes."""
+
+    def __init__(self, directory, lease_seconds=DEFAULT_LEASE):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self._job = None
+
+    @classmethod
+    def create(cls, directory, job: ShardJob, **kwargs):
+        """Write a new job; an existing identical plan is reused with its finished shards."""
+        path = os.path.join(directory, "job.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                if f.read() != job.to_json():
+                    raise FileExistsError(f"{directory} already holds a different job")
+        else:
+            os.makedirs(os.path.join(directory, "done"), exist_ok=True)
+            os.makedirs(os.path.join(directory, "lease"), exist_ok=True)
+            if job.kind == "adjacency" and job.depth >= 2:
+                os.makedirs(os.path.join(directory, "layers"), exist_ok=True)
+                _write_atomic(os.path.join(directory, "layers", "1.bin"), _first_layer(job.problem).tobytes())
+                for d in range(2, job.depth):
+                    # Sparse: disk is only used as the shards write their rows.
+                    with open(os.path.join(directory, "layers", f"{d}.bin"), "wb") as f:
+                        f.truncate(math.prod(_layer_shape(job.problem, d)) * _ROW.itemsize)
+            _write_atomic(path, job.to_json().encode())
+        return cls(directory, **kwargs)
+
+    def job(self) -> ShardJob:
+        if self._job is None:
+            with open(os.path.join(self.directory, "job.json")) as f:
+                self._job = ShardJob.from_json(f.read())
+        return self._job
+
+    def _done(self, i):
+        return os.path.join(self.directory, "done", f"{i}.cnt")
+
+    def _lease(self, i):
+        return os.path.join(self.directory, "lease", str(i))
+
+    def _layer_path(self, d):
+        return os.path.join(self.directory, "layers", f"{d}.bin")
+
+    def _layer_done(self, d):
+        job = self.job()
+        return d == 1 or all(os.path.exists(self._done(i)) for i in range(len(job.shards)) if _layer(job, i) == d)
+
+    def layer(self, d):
+        """Rows of the finished adjacency layer ``d``, memory-mapped read-only."""
+        job = self.job()
+        if job.kind != "adjacency" or type(d) is not int or not 1 <= d < job.depth or not self._layer_done(d):
+            raise ValueError(f"layer {d!r} is not available")
+        return np.memmap(self._layer_path(d), dtype=_ROW, mode="r", shape=_layer_shape(job.problem, d))
+
+    def _holder(self, i):
+        try:
+            with open(self._lease(i)) as f:
+                return f.read().rpartition(" ")[0]
+        except FileNotFoundError:
+            return None
+
+    def claim(self, worker="worker"):
+        """
+        Index of a shard now leased to ``worker``, or None when none is free.
+        Adjacency shards are only handed out once their previous layer is done.
+        """
+        job = self.job()
+        now = time.time()
+        current = None  # the lowest layer with unfinished shards
+        for i in range(len(job.shards)):
+            d = _layer(job, i)
+            if current is not None and d > current:
+                break
+            if os.path.exists(self._done(i)):
+                continue
+            if current is None:
+                current = d
+                for old in range(2, d - 1):
+                    # No shard reads these layers any more; one that is still
+                    # leased may yet write to its own, so that layer is kept.
+                    if any(_layer(job, j) == old and os.path.exists(self._lease(j)) for j in range(len(job.shards))):
+                        continue
+                    try:
+                        os.remove(self._layer_path(old))
+                    except FileNotFoundError:
+                        pass
+            lease = self._lease(i)
+            try:
+                st = os.stat(lease)
+                if now - st.st_mtime < self.lease_seconds:
+                    continue
+                # Expired: the holder is presumed dead. Only the claimant that
+                # creates the marker for this very lease file may remove it, so
+                # two claimants cannot both take the shard over.
+                try:
+                    os.close(os.open(f"{lease}.{st.st_ino}.{st.st_mtime_ns}.takeover",
+                                     os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                except FileExistsError:
+                    continue
+                os.remove(lease)
+            except FileNotFoundError:
+                pass
+            try:
+                fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{worker} {now}\n")
+            if self._holder(i) == worker:
+                return i
+        return None
+
+    def complete(self, index, value, rows=None, worker=None):
+        """
+        Record shard ``index``; adjacency shards below the last layer also
+        write their ``rows``. The lease is dropped as in ``release``. A late
+        result for a shard another worker already finished (after taking over
+        an expired lease) is only checked against the recorded count.
+        """
+        job = self.job()
+        _check_index(job, index)
+        result = value if isinstance(value, CountResult) else CountResult(job.digest, value, {"shard": index})
+        if result.problem != job.digest: raise ValueError("result belongs to a different job")
+        if (result.meta or {}).get("shard") != index: raise ValueError("result is for a different shard")
+        if self._recorded(index, result.value):
+            self.release(index, worker)
+            return
+        if job.kind == "adjacency" and 2 <= _layer(job, index) < job.depth:
+            d, lo, hi = job.shards[index][0]
+            shape = _layer_shape(job.problem, d)
+            rows = None if rows is None else np.asarray(rows, dtype=_ROW)
+            if rows is None or rows.shape != (hi - lo,) + shape[1:]: raise ValueError(f"shard {index} needs its layer rows")
+            if _limb_total(rows) != result.value: raise ValueError(f"shard {index}: count does not match its rows")
+            try:
+                layer = np.memmap(self._layer_path(d), dtype=_ROW, mode="r+", shape=shape)
+            except FileNotFoundError:
+                # The layer was finished and dropped since the check above.
+                if self._recorded(index, result.value):
+                    self.release(index, worker)
+                    return
+                raise
+            layer[lo:hi] = rows
+            layer.flush()
+            del layer
+        _write_atomic(self._done(index), result.to_bytes())
+        self.release(index, worker)
+        for name in os.listdir(os.path.join(self.directory, "lease")):
+            if name.startswith(f"{index}.") and name.endswith(".takeover"):
+                try:
+                    os.remove(os.path.join(self.directory, "lease", name))
+                except FileNotFoundError:
+                    pass
+
+    def _recorded(self, index, value) -> bool:
+        """Whether shard ``index`` is already done; raises if it was done with a different count."""
+        try:
+            with open(self._done(index), "rb") as f:
+                done = from_bytes(f.read())
+        except FileNotFoundError:
+            return False
+        if done.value != value: raise ValueError(f"shard {index} was already counted as {done.value}, not {value}")
+        return True
+
+    def release(self, index, worker=None):
+        """Drop the lease on ``index``; with ``worker``, only while that worker holds it."""
+        _check_index(self.job(), index)
+        if worker is not None and self._holder(index) != worker:
+            return
+        try:
+            os.remove(self._lease(index))
+        except FileNotFoundError:
+            pass
+
+    def renew(self, index, worker="worker") -> bool:
+        """Restart the lease period of ``index`` if ``worker`` still holds it."""
+        _check_index(self.job(), index)
+        if self._holder(index) != worker:
+            return False
+        try:
+            os.utime(self._lease(index))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def status(self) -> ShardStatus:
+        job = self.job()
+        digest = job.digest
+        done = leased = partial = 0
+        for i in range(len(job.shards)):
+            try:
+                with open(self._done(i), "rb") as f:
+                    res = from_bytes(f.read())
+            except FileNotFoundError:
+                leased += os.path.exists(self._lease(i))
+                continue
+            if res.problem != digest: raise ValueError(f"shard {i} was counted for a different job")
+            done += 1
+            if _final(job, i):
+                partial += res.value
+        total = len(job.shards)
+        return ShardStatus(total, done, leased, partial, done == total)
+
+    def result(self) -> int:
+        st = self.status()
+        if not st.complete: raise RuntimeError(f"{st.shards - st.done} of {st.shards} shards are not finished")
+        return st.partial
+
+# ---------- Socket coordinator ----------
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        coord = self.server.coordinator
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                op = req["op"]
+                if op == "rows":
+                    # Read-only, so large layers are served outside the lock.
+                    layer = coord.layer(req["layer"])
+                    lo, hi = req["lo"], req["hi"]
+                    if type(lo) is not int or type(hi) is not int or not 0 <= lo < hi <= len(layer):
+                        raise ValueError(f"bad row range {lo!r}..{hi!r}")
+                    reply = {"rows": base64.b64encode(np.ascontiguousarray(layer[lo:hi]).tobytes()).decode()}
+                    self.wfile.write((json.dumps(reply) + "\n").encode())
+                    continue
+                with self.server.lock:
+                    if op == "job":
+                        reply = {"job": coord.job().to_json(), "lease": coord.lease_seconds}
+                    elif op == "claim":
+                        reply = {"index": coord.claim(req.get("worker", self.client_address[0]))}
+                    elif op == "complete":
+                        index = _check_index(coord.job(), req["index"])
+                        rows = req.get("rows")
+                        if rows is not None:
+                            job = coord.job()
+                            _, lo, hi = job.shards[index][0]
+                            rows = np.frombuffer(base64.b64decode(rows), dtype=_ROW)
+                            shape = _layer_shape(job.problem, _layer(job, index))
+                            if rows.size != (hi - lo) * shape[1] * shape[2]: raise ValueError("rows have the wrong size")
+                            rows = rows.reshape((hi - lo,) + shape[1:])
+                        coord.complete(index, from_bytes(bytes.fromhex(req["result"])), rows, req.get("worker"))
+                        reply = {"ok": True}
+                    elif op == "release":
+                        coord.release(_check_index(coord.job(), req["index"]), req.get("worker"))
+                        reply = {"ok": True}
+                    elif op == "renew":
+                        index = _check_index(coord.job(), req["index"])
+                        reply = {"ok": coord.renew(index, req.get("worker", self.client_address[0]))}
+                    elif op == "status":
+                        reply = {"status": coord.status()._asdict()}
+                    else:
+                        reply = {"error": f"unknown op {op!r}"}
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                reply = {"error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(directory, host="127.0.0.1", port=0, lease_seconds=DEFAULT_LEASE):
+    """
+    A started TCP server for the job in ``directory``; ``server_address`` has
+    the bound port. It is unauthenticated, so bind it to a trusted network.
+    """
+    server = _Server((host, port), _Handler)
+    server.coordinator = FileCoordinator(directory, lease_seconds)
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class RemoteCoordinator:
+    """Client side of ``serve``; same interface as ``FileCoordinator`` for workers."""
+
+    def __init__(self, host, port, timeout=None):
+        self._sock = socket.create_connection((host, int(port)), timeout=timeout)
+        self._file = self._sock.makefile("rwb")
+        self._job = None
+        self._layer = None  # (d, local copy of layer d)
+        self._lock = threading.Lock()  # the lease keeper thread shares the connection
+        self.lease_seconds = DEFAULT_LEASE
+
+    def _call(self, **req):
+        with self._lock:
+            self._file.write((json.dumps(req) + "\n").encode())
+            self._file.flush()
+            line = self._file.readline()
+        if not line: raise ConnectionError("coordinator closed the connection")
+        reply = json.loads(line)
+        if "error" in reply: raise ValueError(reply["error"])
+        return reply
+
+    def job(self) -> ShardJob:
+        if self._job is None:
+            reply = self._call(op="job")
+            self._job = ShardJob.from_json(reply["job"])
+            self.lease_seconds = reply.get("lease", DEFAULT_LEASE)
+        return self._job
+
+    def claim(self, worker="worker"):
+        return self._call(op="claim", worker=worker)["index"]
+
+    def layer(self, d):
+        """A local copy of the finished layer ``d``, fetched in slices into a temporary file."""
+        if self._layer is None or self._layer[0] != d:
+            self._layer = None
+            shape = _layer_shape(self.job().problem, d)
+            local = np.memmap(tempfile.TemporaryFile(), dtype=_ROW, mode="w+", shape=shape)
+            step = max(1, FETCH_BYTES // (shape[1] * shape[2] * _ROW.itemsize))
+            for lo in range(0, shape[0], step):
+                checkpoint()
+                hi = min(lo + step, shape[0])
+                data = base64.b64decode(self._call(op="rows", layer=d, lo=lo, hi=hi)["rows"])
+                local[lo:hi] = np.frombuffer(data, dtype=_ROW).reshape((hi - lo,) + shape[1:])
+            self._layer = (d, local)
+        return self._layer[1]
+
+    def complete(self, index, value, rows=None, worker=None):
+        _check_index(self.job(), index)
+        result = CountResult(self.job().digest, value, {"shard": index})
+        req = {"op": "complete", "index": index, "result": result.to_bytes().hex(), "worker": worker}
+        if rows is not None:
+            req["rows"] = base64.b64encode(np.ascontiguousarray(rows, dtype=_ROW).tobytes()).decode()
+        self._call(**req)
+
+    def _recorded(self, index, value) -> bool:
+        """Whether shard ``index`` is already done; raises if it was done with a different count."""
+        try:
+            with open(self._done(index), "rb") as f:
+                done = from_bytes(f.read())
+        except FileNotFoundError:
+            return False
+        if done.value != value: raise ValueError(f"shard {index} was already counted as {done.value}, not {value}")
+        return True
+
+    def release(self, index, worker=None):
+        self._call(op="release", index=index, worker=worker)
+
+    def renew(self, index, worker="worker") -> bool:
+        return self._call(op="renew", index=index, worker=worker)["ok"]
+
+    def status(self) -> ShardStatus:
+        return ShardStatus(**self._call(op="status")["status"])
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+# ---------- Workers ----------
+def connect(target, lease_seconds=DEFAULT_LEASE):
+    """A coordinator for a job directory or a "host:port" address."""
+    if os.path.isdir(target):
+        return FileCoordinator(target, lease_seconds)
+    host, _, port = target.rpartition(":")
+    if not host or not port.isdigit(): raise ValueError(f"{target!r} is neither a job directory nor host:port")
+    return RemoteCoordinator(host, port)
+
+def _keep_leased(coordinator, index, worker, stop):
+    """Renew the lease on ``index`` every quarter lease period until ``stop`` is set."""
+    interval = max(1.0, coordinator.lease_seconds / 4)
+    while not stop.wait(interval):
+        try:
+            if not coordinator.renew(index, worker):
+                return  # taken over; the count is still recorded when it finishes
+        except (OSError, ValueError):
+            return
+
+def run_worker(coordinator, worker=None, max_shards=None) -> int:
+    """
+    Claim and count shards until the job is complete; returns how many this
+    worker finished. While the shards of a layer are still out, it waits.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    job = coordinator.job()
+    source = None  # (d, rows of layer d) the current adjacency shards pull from
+    finished = 0
+    while max_shards is None or finished < max_shards:
+        index = coordinator.claim(worker)
+        if index is None:
+            if coordinator.status().complete:
+                break
+            checkpoint()
+            time.sleep(POLL_SECONDS)
+            continue
+        stop = threading.Event()
+        keeper = threading.Thread(target=_keep_leased, args=(coordinator, index, worker, stop), daemon=True)
+        keeper.start()
+        try:
+            d = _layer(job, index)
+            if job.kind == "adjacency" and d >= 2 and (source is None or source[0] != d - 1):
+                source = None
+                source = (d - 1, coordinator.layer(d - 1))
+            value, rows = count_shard(job, index, source and source[1])
+        except (Cancelled, KeyboardInterrupt):
+            coordinator.release(index, worker)
+            raise
+        finally:
+            stop.set()
+            keeper.join()
+        coordinator.complete(index, value, rows, worker)
+        finished += 1
+    return finished
+
+def process_worker(target, worker, lease_seconds=DEFAULT_LEASE) -> int:
+    """``run_worker`` on a fresh connection; picklable for process pools."""
+    return run_worker(connect(target, lease_seconds), worker)
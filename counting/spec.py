@@ -0,0 +1,318 @@
+# counting/spec.py
+"""
+Validated input parsing for the calculator tabs.
+
+Every list input (group sizes, forbidden pairs, assignments, people, batch
+lines) goes through one tokenizer. A source may be a ``str``, ``bytes``
+(e.g. an uploaded file's contents) or a binary file object. Bytes and files
+are decoded and split chunk by chunk, so a large upload is never split into
+one giant list of substrings. Items are separated by commas or newlines, so
+a file can hold one item per line.
+
+Parsers return tuples, and problem constructors return NamedTuples in
+canonical form: pair lists are sorted and de-duplicated, and
+intersection keys are sorted label tuples. Equal problems therefore compare
+and hash equal and can be used directly as cache keys. Results for
+``str``/``bytes`` sources are memoised, so a rerun with unchanged text does
+not parse again.
+
+Malformed input raises ``SpecError``, a ``ValueError`` naming the field, the
+item number, the line and the offending token.
+"""
+import codecs
+import io
+import json
+import re
+from functools import lru_cache, wraps
+from typing import NamedTuple
+
+from .teams import GroupConstraint
+from .weighted import parse_weight
+
+CHUNK_CHARS = 1 << 20
+CACHE_SIZE = 256
+_ITEM = re.compile(r"([^,\n]*)([,\n])")
+_LINE = re.compile(r"([^\n]*)(\n)")
+_GROUPS = r"(\*|all|\d+(?:\+\d+)*)"
+_ONE_SIDED = re.compile(_GROUPS + r"(>=|<=|==|=)(\d+)$")
+_TWO_SIDED = re.compile(r"(\d+)<=" + _GROUPS + r"<=(\d+)$")
+
+
+class SpecError(ValueError):
+    """An input field could not be parsed; the message says where and why."""
+
+    def __init__(self, field, message, item=None, line=None, token=None):
+        self.field, self.item, self.line, self.token = field, item, line, token
+        where = ""
+        if item is not None:
+            where = f" item {item}"
+            if line is not None and line > 1:
+                where += f" (line {line})"
+            where += f" {token!r}"
+        super().__init__(f"{field}:{where} {message}" if where else f"{field}: {message}")
+
+
+class SetFamily(NamedTuple):
+    sizes: tuple             # ((label, size), ...) sorted by label
+    intersections: tuple     # ((sorted label tuple, size), ...) sorted
+
+
+class TeamProblem(NamedTuple):
+    group_sizes: tuple
+    r: int
+    mins: tuple = ()         # empty means no bound of that kind
+    maxs: tuple = ()
+    exacts: tuple = ()
+    constraints: tuple = ()  # sorted GroupConstraints
+
+
+class AdjacencyProblem(NamedTuple):
+    n: int
+    r: int
+    forbidden: tuple         # sorted unique (a, b) pairs
+
+
+class ScheduleProblem(NamedTuple):
+    people: tuple
+    slots: int
+    cap: int
+    fixed: tuple             # sorted (name, slot) pairs
+    forbidden: tuple         # sorted unique (name, slot) pairs
+
+
+def _memoised(fn):
+    """lru_cache for str/bytes sources; file objects are parsed every time."""
+    cached = lru_cache(maxsize=CACHE_SIZE)(fn)
+
+    @wraps(fn)
+    def wrapper(source, *args, **kwargs):
+        if isinstance(source, (str, bytes)):
+            return cached(source, *args, **kwargs)
+        return fn(source, *args, **kwargs)
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+def _chunks(source):
+    if isinstance(source, str):
+        yield source
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    while True:
+        block = source.read(CHUNK_CHARS)
+        if not block:
+            break
+        yield decoder.decode(block) if isinstance(block, (bytes, bytearray)) else block
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def _tokens(source, pattern=_ITEM):
+    """(item number, line, token) for each non-empty stripped token."""
+    line, item, carry = 1, 0, ""
+    for chunk in _chunks(source):
+        text = carry + chunk
+        end = 0
+        for m in pattern.finditer(text):
+            tok = m.group(1).strip()
+            if tok:
+                item += 1
+                yield item, line, tok
+            if m.group(2) == "\n":
+                line += 1
+            end = m.end()
+        carry = text[end:]
+    tok = carry.strip()
+    if tok:
+        yield item + 1, line, tok
+
+def _int(field, item, line, tok, part=None, min_value=None):
+    """int(part or tok); errors point at the whole token."""
+    text = tok if part is None else part
+    try:
+        v = int(text)
+    except ValueError:
+        msg = "is not an integer" if part is None else f"has non-integer part {part!r}"
+        raise SpecError(field, msg, item, line, tok) from None
+    if min_value is not None and v < min_value:
+        raise SpecError(field, f"must be at least {min_value}", item, line, tok)
+    return v
+
+# ---------- Token lists ----------
+@_memoised
+def parse_ints(source, field="values", min_value=None) -> tuple:
+    """Comma- or newline-separated integers."""
+    return tuple(_int(field, i, ln, tok, min_value=min_value) for i, ln, tok in _tokens(source))
+
+@_memoised
+def parse_names(source, field="names", unique=True) -> tuple:
+    names = []
+    seen = set()
+    for i, ln, tok in _tokens(source):
+        if unique and tok in seen:
+            raise SpecError(field, "is listed twice", i, ln, tok)
+        seen.add(tok)
+        names.append(tok)
+    return tuple(names)
+
+@_memoised
+def parse_pairs(source, field="pairs", sep="-", left=int, right=int) -> tuple:
+    """Items of the form ``a<sep>b`` (e.g. "1-2", "Alice:0", "3@1"), converted by left/right."""
+    pairs = []
+    for i, ln, tok in _tokens(source):
+        a, found, b = tok.partition(sep)
+        a, b = a.strip(), b.strip()
+        if not found or not a or not b:
+            raise SpecError(field, f"should look like 'a{sep}b'", i, ln, tok)
+        pairs.append((_int(field, i, ln, tok, a) if left is int else a,
+                      _int(field, i, ln, tok, b) if right is int else b))
+    return tuple(pairs)
+
+@_memoised
+def parse_weights(source, field="weights", exact=True) -> tuple:
+    return tuple(_weight(field, i, ln, tok, exact) for i, ln, tok in _tokens(source))
+
+def _weight(field, item, line, tok, exact):
+    try:
+        return parse_weight(tok, exact)
+    except (ValueError, ZeroDivisionError) as e:
+        raise SpecError(field, "is negative" if "negative" in str(e) else "is not a number", item, line, tok) from None
+
+@_memoised
+def parse_weight_table(source, field="weights", exact=True) -> tuple:
+    """Lines of ``name: w0, w1, ...`` as ((name, (w0, w1, ...)), ...)."""
+    rows = []
+    for i, ln, tok in _tokens(source, _LINE):
+        name, found, rest = tok.partition(":")
+        if not found or not name.strip():
+            raise SpecError(field, "should look like 'name: w0,w1,...'", i, ln, tok)
+        rows.append((name.strip(), tuple(_weight(field, i, ln, w.strip(), exact)
+                                         for w in rest.split(",") if w.strip())))
+    return tuple(rows)
+
+@_memoised
+def parse_nr_lines(source, field="n,r pairs") -> tuple:
+    """One ``n,r`` pair per line, as (ns, rs)."""
+    ns, rs = [], []
+    for i, ln, tok in _tokens(source, _LINE):
+        a, found, b = tok.partition(",")
+        if not found or "," in b:
+            raise SpecError(field, "should look like 'n,r'", i, ln, tok)
+        ns.append(_int(field, i, ln, tok, a.strip()))
+        rs.append(_int(field, i, ln, tok, b.strip()))
+    return tuple(ns), tuple(rs)
+
+@_memoised
+def parse_team_constraints(source, field="Constraints", groups=None) -> tuple:
+    """
+    Items like ``0+1 >= 2``, ``2 <= 3``, ``1 <= 0+2 <= 4`` or ``* <= 5``, where
+    numbers on the group side are 0-based group indices and ``*``/``all``
+    means every group (which needs ``groups``, the number of groups).
+    """
+    found = set()
+    for i, ln, tok in _tokens(source):
+        text = tok.replace(" ", "")
+        m = _TWO_SIDED.match(text)
+        if m:
+            lo, lhs, hi = int(m.group(1)), m.group(2), int(m.group(3))
+        else:
+            m = _ONE_SIDED.match(text)
+            if not m:
+                raise SpecError(field, "should look like '0+1 >= 2', '2 <= 3' or '1 <= 0+2 <= 4'", i, ln, tok)
+            lhs, op, v = m.group(1), m.group(2), int(m.group(3))
+            lo, hi = (v, None) if op == ">=" else (0, v) if op == "<=" else (v, v)
+        if lhs in ("*", "all"):
+            if groups is None:
+                raise SpecError(field, "uses '*' but the number of groups is unknown", i, ln, tok)
+            members = tuple(range(groups))
+        else:
+            members = tuple(sorted({int(x) for x in lhs.split("+")}))
+        if groups is not None and members and members[-1] >= groups:
+            raise SpecError(field, f"names a group outside 0..{groups - 1}", i, ln, tok)
+        if hi is not None and lo > hi:
+            raise SpecError(field, "has a minimum above its maximum", i, ln, tok)
+        found.add(GroupConstraint(members, lo, hi))
+    return tuple(sorted(found, key=lambda c: (c.groups, c.min, -1 if c.max is None else c.max)))
+
+# ---------- Problems ----------
+def _json_object(field, text):
+    try:
+        obj = json.loads(text or "{}")
+    except json.JSONDecodeError as e:
+        raise SpecError(field, f"invalid JSON at line {e.lineno} column {e.colno}: {e.msg}") from None
+    if not isinstance(obj, dict):
+        raise SpecError(field, "must be a JSON object")
+    return obj
+
+def _count_value(field, key, v):
+    if isinstance(v, bool) or not isinstance(v, int) or v < 0:
+        raise SpecError(field, f"value for {key!r} must be a non-negative integer, got {v!r}")
+    return v
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_set_family(sets_text, intersections_text) -> SetFamily:
+    """Set sizes ``{"A": 20, ...}`` and intersections ``{"A,B": 8, ...}`` from JSON."""
+    sizes = {str(k): _count_value("Set sizes", k, v) for k, v in _json_object("Set sizes", sets_text).items()}
+    inters = {}
+    for k, v in _json_object("Intersections", intersections_text).items():
+        key = tuple(sorted(x.strip() for x in k.split(",")))
+        unknown = [x for x in key if x not in sizes]
+        if unknown:
+            raise SpecError("Intersections", f"key {k!r} names unknown set(s) {', '.join(unknown)}")
+        if len(set(key)) != len(key) or len(key) < 2:
+            raise SpecError("Intersections", f"key {k!r} must name two or more distinct sets")
+        if key in inters:
+            raise SpecError("Intersections", f"key {k!r} repeats an earlier intersection")
+        inters[key] = _count_value("Intersections", k, v)
+    return SetFamily(tuple(sorted(sizes.items())), tuple(sorted(inters.items())))
+
+def _bounds(field, values, sizes):
+    if values and len(values) != len(sizes):
+        raise SpecError(field, f"has {len(values)} entries but there are {len(sizes)} groups")
+    return values
+
+def team_problem(group_sizes, r, mins="", maxs="", exacts="", constraints="") -> TeamProblem:
+    """Group sizes, optional per-group bound lists and coupled constraints, each a parser source."""
+    sizes = parse_ints(group_sizes, "Group sizes", 0)
+    return TeamProblem(
+        sizes, int(r),
+        _bounds("Minimums", parse_ints(mins, "Minimums", 0), sizes),
+        _bounds("Maximums", parse_ints(maxs, "Maximums", 0), sizes),
+        _bounds("Exacts", parse_ints(exacts, "Exacts", 0), sizes),
+        parse_team_constraints(constraints, "Constraints", len(sizes)),
+    )
+
+def adjacency_problem(n, r, pairs) -> AdjacencyProblem:
+    """Forbidden-adjacency problem; every pair must name items 0..n-1."""
+    n = int(n)
+    found = parse_pairs(pairs, "Forbidden pairs", "-")
+    for i, (a, b) in enumerate(found, 1):
+        if not (0 <= a < n and 0 <= b < n):
+            raise SpecError("Forbidden pairs", f"names an item outside 0..{n - 1}", i, None, f"{a}-{b}")
+    return AdjacencyProblem(n, int(r), tuple(sorted(set(found))))
+
+def _slot_pairs(field, source, people, slots):
+    found = parse_pairs(source, field, ":", str, int)
+    known = set(people)
+    for i, (name, s) in enumerate(found, 1):
+        if name not in known:
+            raise SpecError(field, "names someone not in the people list", i, None, f"{name}:{s}")
+        if not 0 <= s < slots:
+            raise SpecError(field, f"slot must be in 0..{slots - 1}", i, None, f"{name}:{s}")
+    return found
+
+def schedule_problem(people, slots, cap, fixed="", forbidden="") -> ScheduleProblem:
+    """Scheduling problem; assignments must name listed people and existing slots."""
+    names = parse_names(people, "People")
+    slots, cap = int(slots), int(cap)
+    fixed_pairs = _slot_pairs("Fixed assignments", fixed, names, slots)
+    seen = {}
+    for i, (name, s) in enumerate(fixed_pairs, 1):
+        if name in seen:
+            raise SpecError("Fixed assignments", f"{name} is already fixed to slot {seen[name]}", i, None, f"{name}:{s}")
+        seen[name] = s
+    forbidden_pairs = _slot_pairs("Forbidden assignments", forbidden, names, slots)
+    return ScheduleProblem(names, slots, cap, tuple(sorted(fixed_pairs)), tuple(sorted(set(forbidden_pairs))))
@@ -0,0 +1,66 @@
+# counting/sweep.py
+"""
+Parameter sweeps that share work between neighbouring grid points.
+
+* ``sweep_arrangements_with_forbidden`` runs the layered DP from ``budget``
+  once. The total of layer r is the count for length r, so every r comes
+  out of the same pass, in packed arrays under the memory budget.
+* ``sweep_schedule_slots_count`` keeps one ``IncrementalScheduleCounter``
+  per capacity, so the EGF powers E_cap^k built for k slots are reused for
+  k + 1.
+* ``sweep_team_count`` builds the group product once and reads every r off
+  its coefficients.
+"""
+import csv
+import io
+
+from .bigint import to_decimal_string
+from .budget import DEFAULT_MEMORY_BUDGET, layered_counts
+from .incremental import IncrementalScheduleCounter, IncrementalTeamCounter
+
+
+def sweep_arrangements_with_forbidden(n, forbidden_pairs, r_max=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                                      spill_dir=None) -> list:
+    """[count for r = 0..r_max] of ``arrangements_with_forbidden(n, r, forbidden_pairs)``."""
+    r_max = n if r_max is None else min(r_max, n)
+    return layered_counts(n, r_max, forbidden_pairs, memory_budget, spill_dir)[0]
+
+def sweep_schedule_slots_count(people, slot_values, cap_values, must_include=None) -> list:
+    """
+    Grid of ``schedule_slots_count`` values: grid[i][j] is the count for
+    slot_values[i] slots of capacity cap_values[j]. Grid points where a fixed
+    assignment names a slot that does not exist count as 0.
+    """
+    fixed = [s for _, s in (must_include or [])]
+    n = len(people)
+    grid = [[0] * len(cap_values) for _ in slot_values]
+    for j, cap in enumerate(cap_values):
+        counter = IncrementalScheduleCounter(0, cap)
+        for i, slots in enumerate(slot_values):
+            if slots < 1 or any(s >= slots for s in fixed):
+                continue
+            grid[i][j] = counter.sync(slots, cap, fixed).count(n)
+    return grid
+
+def sweep_team_count(group_sizes, r_values, mins=None, maxs=None) -> list:
+    """Team selection counts with per-group bounds for every r in r_values."""
+    counter = IncrementalTeamCounter(group_sizes, mins, maxs)
+    return [counter.count(r) for r in r_values]
+
+def sweep_to_csv(row_label, row_values, col_label=None, col_values=None, grid=None) -> str:
+    """
+    CSV for a 1-D sweep (grid is a flat list, one value per row) or a 2-D grid
+    (first column holds row values, header holds column values). Values are
+    written exactly, whatever their size.
+    """
+    out = io.StringIO()
+    w = csv.writer(out)
+    if col_values is None:
+        w.writerow([row_label, "count"])
+        for x, v in zip(row_values, grid):
+            w.writerow([x, to_decimal_string(v)])
+    else:
+        w.writerow([f"{row_label}\\{col_label}"] + list(col_values))
+        for x, row in zip(row_values, grid):
+            w.writerow([x] + [to_decimal_string(v) for v in row])
+    return out.getvalue()
@@ -0,0 +1,146 @@
+# counting/teams.py
+"""
+Team selection under coupled constraints.
+
+Besides per-group [min, max] bounds, a ``GroupConstraint`` bounds the total
+number of picks over a set of groups: "at least 2 from groups 0 and 1
+combined", "at most 3 from the senior groups", "1 to 3 from group 2".
+
+The DP walks the groups once, choosing k picks from group i in C(g_i, k)
+ways. Its state is the running total plus one counter per constraint, and
+three things keep that state small:
+
+* A constraint only occupies a state slot between its first and last group.
+  After its last group the counter is checked against its minimum and
+  dropped, so the width of the state is the number of constraints spanning
+  the current group, not the total number of constraints.
+* A counter with an upper bound lives in 0..max, since larger values are
+  pruned. A counter with only a lower bound saturates at that minimum.
+* A state is pruned as soon as the remaining groups cannot lift a counter or
+  the total to its minimum, or the total would pass r.
+
+Single-group constraints fold into the per-group bounds, constraints over
+the same groups are intersected, and a constraint over every group only
+checks r. The table holds at most (r + 1) · prod (cap_j + 1) entries over
+the constraints active at one time, so the cost is polynomial in r for a
+fixed overlap. No composition is enumerated.
+"""
+import math
+from typing import NamedTuple, Optional
+
+from .cancel import checkpoint
+
+
+class GroupConstraint(NamedTuple):
+    groups: tuple            # sorted 0-based group indices
+    min: int = 0
+    max: Optional[int] = None
+
+    def describe(self) -> str:
+        lhs = "+".join(map(str, self.groups))
+        if self.max is None: return f"{lhs} >= {self.min}"
+        if self.min == self.max: return f"{lhs} = {self.min}"
+        if self.min == 0: return f"{lhs} <= {self.max}"
+        return f"{self.min} <= {lhs} <= {self.max}"
+
+
+def _normalise(group_sizes, r, constraints, mins, maxs):
+    """Per-group (lo, hi) and merged multi-group constraints, or None if infeasible."""
+    m = len(group_sizes)
+    mins = list(mins) if mins else [0] * m
+    maxs = list(maxs) if maxs else [None] * m
+    if len(mins) != m or len(maxs) != m: raise ValueError("bounds length must match group_sizes")
+    lo = [max(0, a) for a in mins]
+    hi = [g if b is None else min(g, b) for g, b in zip(group_sizes, maxs)]
+    merged = {}
+    for c in constraints:
+        c = GroupConstraint(*c) if not isinstance(c, GroupConstraint) else c
+        groups = tuple(sorted(set(c.groups)))
+        if not groups: raise ValueError("a constraint must name at least one group")
+        if groups[0] < 0 or groups[-1] >= m: raise ValueError(f"constraint {c.describe()} names a group outside 0..{m - 1}")
+        if c.min < 0 or (c.max is not None and c.max < 0): raise ValueError("constraint bounds must be non-negative")
+        a, b = merged.get(groups, (0, None))
+        merged[groups] = (max(a, c.min), c.max if b is None else b if c.max is None else min(b, c.max))
+    coupled = []
+    for groups, (a, b) in merged.items():
+        if len(groups) == 1:
+            (i,) = groups
+            lo[i] = max(lo[i], a)
+            if b is not None:
+                hi[i] = min(hi[i], b)
+        elif len(groups) == m:
+            if r < a or (b is not None and r > b): return None
+        else:
+            coupled.append(GroupConstraint(groups, a, b))
+    if any(a > b for a, b in zip(lo, hi)): return None
+    if any(c.max is not None and c.min > c.max for c in coupled): return None
+    return lo, hi, coupled
+
+def count_with_constraints(group_sizes, r, constraints=(), mins=None, maxs=None) -> int:
+    """
+    Teams of r members drawn from groups of the given sizes, with optional
+    per-group ``mins``/``maxs`` (None entries in ``maxs`` mean no cap) and any
+    number of ``GroupConstraint``s or (groups, min, max) tuples.
+    """
+    if r < 0: return 0
+    m = len(group_sizes)
+    norm = _normalise(group_sizes, r, constraints, mins, maxs)
+    if norm is None: return 0
+    lo, hi, coupled = norm
+    if sum(lo) > r or sum(hi) < r: return 0
+
+    first = [c.groups[0] for c in coupled]
+    last = [c.groups[-1] for c in coupled]
+    caps = [min(r, c.max) if c.max is not None else min(r, c.min) for c in coupled]
+    # reach[j][i]: the most constraint j can still gain from groups after i.
+    reach = []
+    for c in coupled:
+        row, acc = [0] * m, 0
+        for i in range(m - 1, -1, -1):
+            row[i] = acc
+            if i in c.groups:
+                acc += hi[i]
+        reach.append(row)
+    member = [[j for j, c in enumerate(coupled) if i in c.groups] for i in range(m)]
+    suffix_lo = [sum(lo[i + 1:]) for i in range(m)]
+    suffix_hi = [sum(hi[i + 1:]) for i in range(m)]
+
+    # State: (total, counters of the active constraints in ``active`` order).
+    active = []
+    layer = {(0, ()): 1}
+    for i, g in enumerate(group_sizes):
+        checkpoint()
+        opening = [j for j in range(len(coupled)) if first[j] == i]
+        before = active + opening
+        after = [j for j in before if last[j] != i]
+        keep = [before.index(j) for j in after]
+        closing = [(before.index(j), j) for j in before if last[j] == i]
+        pos = {j: before.index(j) for j in member[i]}
+        ways_k = [math.comb(g, k) for k in range(hi[i] + 1)]
+        nxt = {}
+        for (total, counts), ways in layer.items():
+            counts = counts + (0,) * len(opening)
+            for k in range(lo[i], min(hi[i], r - total) + 1):
+                t = total + k
+                if t + suffix_hi[i] < r: continue
+                if t + suffix_lo[i] > r: break
+                new = list(counts)
+                ok = True
+                for j, p in pos.items():
+                    v = new[p] + k
+                    c = coupled[j]
+                    if c.max is not None and v > c.max:
+                        ok = False
+                        break
+                    if v + reach[j][i] < c.min:
+                        ok = False
+                        break
+                    new[p] = min(v, caps[j])
+                if not ok: continue
+                if any(new[p] < coupled[j].min for p, j in closing): continue
+                key = (t, tuple(new[p] for p in keep))
+                nxt[key] = nxt.get(key, 0) + ways * ways_k[k]
+        layer = nxt
+        active = after
+        if not layer: return 0
+    return layer.get((r, ()), 0)
@@ -0,0 +1,117 @@
+# counting/transfer.py
+"""
+Forbidden adjacency with repetition, by transfer matrix.
+
+When items may repeat, a valid sequence of length r is a walk of r - 1
+steps in the "allowed next" graph: A[a, b] = 1 unless (a, b) is forbidden.
+The count is 1ᵀ A^(r-1) 1, computed by square-and-multiply in O(n³ log r).
+Three arithmetic modes match ``batch.MODES``:
+
+* ``"mod"``   – int64 NumPy products modulo a prime p < 2**31, as in
+  ``batch``. The right-hand factor is split into 16-bit limbs and each limb
+  product is reduced before they are combined, so every intermediate fits
+  in int64.
+* ``"exact"`` – Python ints in object arrays. The result has about
+  r·log10(λ) digits, so this is only for moderate r.
+* ``"log10"`` – float64 products, rescaled after each step, with the log of
+  the scale kept separately. All entries are non-negative, so there is no
+  cancellation. Each matrix carries a bound on the log of its relative
+  error: a product adds its factors' bounds plus about n·eps of rounding,
+  so every squaring doubles the bound and it grows roughly linearly in r.
+  The rounding of the accumulated log10 scale is added at the end, as in
+  ``approx``. The result is a ``LogCount`` carrying that (first-order)
+  bound.
+"""
+import math
+
+import numpy as np
+
+from .approx import LogCount
+from .batch import DEFAULT_MODULUS, MODES, check_modulus
+from .cancel import checkpoint
+
+# Exact mode refuses results longer than this many digits.
+MAX_EXACT_DIGITS = 2_000_000
+_LIMB = 16
+_EPS = 2.0 ** -52
+_LN10 = math.log(10)
+
+
+def transfer_matrix(n, forbidden_pairs) -> np.ndarray:
+    """A[a, b] = 1 if b may directly follow a."""
+    a = np.ones((n, n), dtype=np.int64)
+    for x, y in forbidden_pairs:
+        if 0 <= x < n and 0 <= y < n:
+            a[x, y] = 0
+    return a
+
+def _matmul_mod(a, b, p):
+    lo = b & ((1 << _LIMB) - 1)
+    hi = b >> _LIMB
+    return ((a @ hi) % p * (1 << _LIMB) + (a @ lo) % p) % p
+
+def _power_apply(v, m, e, mul):
+    """v · m^e by square-and-multiply, with ``mul`` as the product."""
+    while e:
+        checkpoint()
+        if e & 1:
+            v = mul(v, m)
+        e >>= 1
+        if e:
+            m = mul(m, m)
+    return v
+
+def arrangements_with_repetition(n, r, forbidden_pairs, mode="exact", modulus=DEFAULT_MODULUS):
+    """
+    Sequences of length r over items 0..n-1, repeats allowed, where no
+    forbidden (a, b) pair appears as consecutive items. Forbidding (a, a)
+    forbids an item directly repeating.
+    """
+    if mode not in MODES: raise ValueError(f"mode must be one of {MODES}")
+    if r < 0: raise ValueError("r must be non-negative")
+    if r == 0 or n == 0:
+        value = 1 if r == 0 else 0
+        if mode == "mod":
+            check_modulus(modulus)
+            return value % modulus
+        if mode == "log10": return LogCount(0.0 if value else float("-inf"), 0.0)
+        return value
+    a = transfer_matrix(n, forbidden_pairs)
+    e = r - 1
+
+    if mode == "mod":
+        check_modulus(modulus)
+        p = int(modulus)
+        # Each limb product is at most n·(p-1)·(2**16-1); the combination stays below 2**48.
+        if n * (p - 1) * ((1 << _LIMB) - 1) >= 2 ** 63:
+            raise ValueError(f"{n} items is too many for int64 products modulo {p}")
+        v = np.ones((1, n), dtype=np.int64) % p
+        v = _power_apply(v, a % p, e, lambda x, y: _matmul_mod(x, y, p))
+        return int(v.sum() % p)
+
+    if mode == "exact":
+        if r * math.log10(max(n, 2)) > MAX_EXACT_DIGITS:
+            raise ValueError(f"exact result may exceed {MAX_EXACT_DIGITS:,} digits; use mod or log10 mode")
+        v = np.ones((1, n), dtype=object)
+        v = _power_apply(v, a.astype(object), e, lambda x, y: x @ y)
+        return int(v.sum())
+
+    # log10: (matrix, log10 scale, ln error bound), renormalised after each product.
+    def mul(x, y):
+        prod = x[0] @ y[0]
+        err = x[2] + y[2] + (n + 1) * _EPS
+        top = prod.max()
+        if top == 0:
+            return prod, x[1] + y[1], err
+        lt = math.log10(top)
+        # log10(top) and the two additions to the scale round relative to their size.
+        err += _LN10 * _EPS * (2 * (abs(x[1]) + abs(y[1]) + abs(lt)) + 1)
+        return prod / top, x[1] + y[1] + lt, err
+
+    v = _power_apply((np.ones((1, n)), 0.0, 0.0), (a.astype(np.float64), 0.0, 0.0), e, mul)
+    total = v[0].sum()
+    if total == 0:
+        return LogCount(float("-inf"), 0.0)
+    log10_total = v[1] + math.log10(total)
+    err = v[2] + (n + 2) * _EPS + _EPS * abs(log10_total) * _LN10
+    return LogCount(log10_total, math.expm1(err))
@@ -0,0 +1,173 @@
+# counting/weighted.py
+"""
+Weighted counting: probabilities and expectations under non-uniform weights.
+
+Every counter here sums weights instead of counting outcomes. The arithmetic
+is generic, so ``Fraction`` weights give exact rationals and ``float``
+weights give floats.
+
+``weighted_team_distribution`` — each member of group i carries weight w_i,
+and a team weighs the product of its members' weights. Group i contributes
+sum_{lo_i <= k <= hi_i} C(g_i, k) w_i^k x^k, and the x^r coefficient of the
+product is the total weight of valid teams. With prefix and suffix products,
+one sweep gives every group's distribution of picks, and dividing by the
+unconstrained total prod (1 + w_i x)^{g_i} gives the probability that a
+weighted random team meets the bounds.
+
+``weighted_schedule`` — person p prefers slot s with weight w[p][s], and an
+assignment weighs the product over people. A forward DP over people, keyed
+by slot loads, gives the total weight. A backward pass over the same states
+gives every (person, slot) marginal and the expected load per slot. A fixed
+assignment keeps only that slot's weight; a zero weight forbids the slot.
+"""
+import math
+from fractions import Fraction
+from typing import NamedTuple
+
+from .cancel import checkpoint
+from .incremental import _mul
+
+
+class WeightedTeam(NamedTuple):
+    total: object          # weight of teams meeting the bounds
+    free_total: object     # weight of all teams of size r
+    probability: object    # total / free_total
+    pmf: list              # pmf[i][k] = P(k picks from group i | bounds met)
+    expected: list         # expected picks per group
+
+
+class WeightedSchedule(NamedTuple):
+    total: object          # total weight of valid schedules
+    assignment: list       # assignment[p][s] = P(person p in slot s)
+    expected_load: list    # expected number of people per slot
+
+
+def parse_weight(text, exact=True):
+    """A weight from text such as "3", "0.25" or "2/3", as a Fraction or a float."""
+    text = text.strip()
+    w = Fraction(text)
+    if w < 0: raise ValueError(f"weight {text!r} is negative")
+    return w if exact else float(w)
+
+def _div(a, b):
+    if not b:
+        return 0
+    if isinstance(a, int) and isinstance(b, int):
+        return Fraction(a, b)
+    return a / b
+
+def _weighted_group_poly(size, w, lo, hi):
+    hi = size if hi is None else min(hi, size)
+    lo = max(lo, 0)
+    if lo > hi:
+        return [0]
+    return [math.comb(size, k) * w ** k if k >= lo else 0 for k in range(hi + 1)]
+
+def _coeff(poly, r):
+    return poly[r] if 0 <= r < len(poly) else 0
+
+# ---------- Team selection ----------
+def weighted_team_count(group_sizes, weights, r, mins=None, maxs=None):
+    """Total weight of teams of size r meeting per-group [min, max] bounds."""
+    m = len(group_sizes)
+    mins = list(mins) if mins else [0] * m
+    maxs = list(maxs) if maxs else [None] * m
+    if not (len(weights) == len(mins) == len(maxs) == m): raise ValueError("weights and bounds must match group_sizes")
+    prod = [1]
+    for g, w, lo, hi in zip(group_sizes, weights, mins, maxs):
+        prod = _mul(prod, _weighted_group_poly(g, w, lo, hi))[:r + 1]
+    return _coeff(prod, r)
+
+def weighted_team_distribution(group_sizes, weights, r, mins=None, maxs=None) -> WeightedTeam:
+    """Weighted team total, probability that the bounds hold, and per-group pick distributions."""
+    m = len(group_sizes)
+    mins = list(mins) if mins else [0] * m
+    maxs = list(maxs) if maxs else [None] * m
+    if not (len(weights) == len(mins) == len(maxs) == m): raise ValueError("weights and bounds must match group_sizes")
+    polys = [_weighted_group_poly(g, w, lo, hi)[:r + 1] for g, w, lo, hi in zip(group_sizes, weights, mins, maxs)]
+    prefix = [[1]]
+    for p in polys:
+        prefix.append(_mul(prefix[-1], p)[:r + 1])
+    suffix = [[1]]
+    for p in reversed(polys):
+        suffix.append(_mul(p, suffix[-1])[:r + 1])
+    suffix.reverse()
+    total = _coeff(prefix[m], r)
+
+    free = [1]
+    for g, w in zip(group_sizes, weights):
+        free = _mul(free, _weighted_group_poly(g, w, 0, None))[:r + 1]
+    free_total = _coeff(free, r)
+
+    pmf, expected = [], []
+    for i, p in enumerate(polys):
+        others = _mul(prefix[i], suffix[i + 1])
+        dist = [_div(p[k] * _coeff(others, r - k), total) for k in range(len(p))]
+        pmf.append(dist)
+        expected.append(sum(k * q for k, q in enumerate(dist)))
+    return WeightedTeam(total, free_total, _div(total, free_total), pmf, expected)
+
+# ---------- Scheduling ----------
+def _schedule_rows(people, slots, weights, must_include):
+    rows = []
+    for p in people:
+        row = list((weights or {}).get(p, ()))[:slots]
+        rows.append(row + [1] * (slots - len(row)))
+    index = {p: i for i, p in enumerate(people)}
+    for name, s in must_include or []:
+        if name not in index: raise ValueError(f"fixed assignment names unknown person {name!r}")
+        if not 0 <= s < slots: raise ValueError(f"fixed assignment slot {s} out of range")
+        i = index[name]
+        rows[i] = [w if j == s else 0 for j, w in enumerate(rows[i])]
+    return rows
+
+def _forward(rows, slots, cap):
+    layers = [{(0,) * slots: 1}]
+    for row in rows:
+        checkpoint()
+        nxt = {}
+        for state, acc in layers[-1].items():
+            for s, w in enumerate(row):
+                if w and state[s] < cap:
+                    key = state[:s] + (state[s] + 1,) + state[s + 1:]
+                    nxt[key] = nxt.get(key, 0) + acc * w
+        layers.append(nxt)
+    return layers
+
+def weighted_schedule_count(people, slots, max_per_slot, weights=None, must_include=None):
+    """
+    Total weight of assignments of every person to a slot holding at most
+    max_per_slot people. ``weights`` maps a person to per-slot weights
+    (missing people or slots weigh 1); with no weights this equals
+    ``schedule_slots_count``.
+    """
+    rows = _schedule_rows(people, slots, weights, must_include)
+    return sum(_forward(rows, slots, max_per_slot)[-1].values())
+
+def weighted_schedule(people, slots, max_per_slot, weights=None, must_include=None) -> WeightedSchedule:
+    """Weighted schedule total with per-(person, slot) probabilities and expected slot loads."""
+    rows = _schedule_rows(people, slots, weights, must_include)
+    layers = _forward(rows, slots, max_per_slot)
+    total = sum(layers[-1].values())
+    n = len(rows)
+    assignment = [[0] * slots for _ in range(n)]
+    # back[state] = weight of completing the people after the current one from state.
+    back = {state: 1 for state in layers[-1]}
+    for i in range(n - 1, -1, -1):
+        checkpoint()
+        row = rows[i]
+        cur = {}
+        probs = assignment[i]
+        for state, acc in layers[i].items():
+            b = 0
+            for s, w in enumerate(row):
+                if w and state[s] < max_per_slot:
+                    rest = back.get(state[:s] + (state[s] + 1,) + state[s + 1:], 0)
+                    if rest:
+                        b += w * rest
+                        probs[s] += acc * w * rest
+            cur[state] = b
+        back = cur
+        assignment[i] = [_div(x, total) for x in probs]
+    expected_load = [sum(assignment[i][s] for i in range(n)) for s in range(slots)]
+    return WeightedSchedule(total, assignment, expected_load)
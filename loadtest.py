@@ -0,0 +1,263 @@
+# loadtest.py
+"""
+Headless load test for streamlit_app.py.
+
+Each simulated user is a ``streamlit.testing`` AppTest session in its own
+thread, so every session's script runs in the same process, as it would on
+a Streamlit server. Users load the page, then repeatedly pick a weighted
+scenario on one of the five main tabs, with an exponential think time
+between interactions. Every widget change or button click is one script
+rerun, and each rerun's wall time is one latency sample.
+
+Every configuration runs in a fresh subprocess, so caches, process pools and
+memory start clean. A configuration is a comma-separated list of:
+
+    perf=0|1       COUNTING_PERFORMANCE_MODE (skip animations and delays)
+    cache=0|1      COUNTING_RESULT_CACHE (per-session result cache)
+    workers=N      value of the "Worker processes" control
+    approx=0|1     the "Approximate mode" toggle
+
+Example:
+
+    python loadtest.py --users 50 --duration 60 \\
+        --config perf=0,cache=1 --config perf=1,cache=1 --config perf=1,cache=0,workers=2
+
+The report gives, per configuration, reruns, errors, throughput
+(reruns/s), p50/p99 latency overall and per scenario, and peak/final
+resident memory of the load-test process. AppTest runs the app inside that
+process, so this is harness + app memory, not that of a ``streamlit run``
+server.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+SCRIPT_TIMEOUT = 300
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss is a peak, in KiB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[k]
+
+# ---------- Scenarios ----------
+def _find(elements, label):
+    for el in elements:
+        if label in el.label:
+            return el
+    raise LookupError(f"no widget labelled {label!r}")
+
+def _click(at, label):
+    _find(at.button, label).click()
+
+def tab1_counting(at, rng):
+    n = rng.randint(5, 2000)
+    yield lambda: _find(at.number_input, "Total items (n)").set_value(n)
+    yield lambda: _find(at.number_input, "Items to select (r)").set_value(rng.randint(0, n))
+    yield lambda: _click(at, "Calculate")
+
+def tab2_union(at, rng):
+    k = rng.randint(2, 5)
+    labels = "ABCDE"[:k]
+    sizes = {l: rng.randint(10, 60) for l in labels}
+    inter = {f"{a},{b}": rng.randint(0, min(sizes[a], sizes[b]) // 3)
+             for i, a in enumerate(labels) for b in labels[i + 1:]}
+    yield lambda: _find(at.text_area, "Define your sets").set_value(json.dumps(sizes))
+    yield lambda: _find(at.text_area, "Set intersections").set_value(json.dumps(inter))
+    yield lambda: _click(at, "Calculate Union Size")
+
+def tab3_team(at, rng):
+    sizes = [rng.randint(3, 9) for _ in range(rng.randint(2, 5))]
+    mins = [rng.randint(0, 2) for _ in sizes]
+    yield lambda: _find(at.text_input, "Group sizes").set_value(",".join(map(str, sizes)))
+    yield lambda: _find(at.number_input, "Total selections").set_value(rng.randint(sum(mins), sum(sizes)))
+    yield lambda: _find(at.text_input, "Minimum from each group").set_value(",".join(map(str, mins)))
+    yield lambda: _click(at, "Compute Minimums")
+
+def tab4_adjacency(at, rng):
+    n = rng.randint(5, 11)
+    pairs = {(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(0, n))}
+    yield lambda: _find(at.number_input, "Total items (0 to n-1)").set_value(n)
+    yield lambda: _find(at.number_input, "Arrangement length").set_value(rng.randint(1, n))
+    yield lambda: _find(at.text_input, "Forbidden pairs").set_value(",".join(f"{a}-{b}" for a, b in sorted(pairs)))
+    yield lambda: _click(at, "Analyze Arrangements")
+
+def tab5_schedule(at, rng):
+    people = [f"P{i}" for i in range(rng.randint(3, 9))]
+    yield lambda: _find(at.text_input, "People/Resources").set_value(",".join(people))
+    yield lambda: _find(at.number_input, "Available slots").set_value(rng.randint(2, 5))
+    yield lambda: _find(at.number_input, "Max per slot").set_value(rng.randint(2, 4))
+    yield lambda: _find(at.text_input, "Fixed assignments").set_value(f"{people[0]}:0")
+    yield lambda: _click(at, "Generate Schedules")
+
+SCENARIOS = {
+    "tab1_counting": (3, tab1_counting),
+    "tab2_union": (1, tab2_union),
+    "tab3_team": (2, tab3_team),
+    "tab4_adjacency": (2, tab4_adjacency),
+    "tab5_schedule": (2, tab5_schedule),
+}
+
+# ---------- One configuration (runs in a child process) ----------
+def _user(uid, cfg, deadline, think, samples, errors, lock):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(cfg["seed"] * 1000 + uid)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[n][0] for n in names]
+
+    def rerun(name, at):
+        t = time.perf_counter()
+        at.run()
+        dt = time.perf_counter() - t
+        failed = bool(at.exception) or bool(at.error)
+        with lock:
+            samples.setdefault(name, []).append(dt)
+            if failed:
+                errors[name] = errors.get(name, 0) + 1
+
+    at = AppTest.from_file(APP, default_timeout=SCRIPT_TIMEOUT)
+    rerun("page_load", at)
+    if cfg.get("approx"):
+        _find(at.toggle, "Approximate mode").set_value(True)
+        rerun("settings", at)
+    if cfg.get("workers", 1) > 1:
+        control = _find(at.number_input, "Worker processes")
+        control.set_value(min(cfg["workers"], control.max_value))
+        rerun("settings", at)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        for step in SCENARIOS[name][1](at, rng):
+            step()
+            rerun(name, at)
+            if time.perf_counter() >= deadline:
+                break
+            time.sleep(rng.expovariate(1 / think) if think > 0 else 0)
+
+def run_config(cfg) -> dict:
+    samples, errors, lock = {}, {}, threading.Lock()
+    mem = {"start": rss_bytes(), "peak": 0}
+    stop = threading.Event()
+
+    def sample_memory():
+        while not stop.is_set():
+            mem["peak"] = max(mem["peak"], rss_bytes())
+            stop.wait(0.2)
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    deadline = start + cfg["duration"]
+    users = []
+    for uid in range(cfg["users"]):
+        th = threading.Thread(target=_user, args=(uid, cfg, deadline, cfg["think"], samples, errors, lock), daemon=True)
+        users.append(th)
+        th.start()
+        time.sleep(cfg["ramp"] / max(1, cfg["users"]))
+    for th in users:
+        th.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    mem["final"] = rss_bytes()
+    mem["peak"] = max(mem["peak"], mem["final"])
+
+    every = [x for name, xs in samples.items() if name not in ("page_load", "settings") for x in xs]
+    return {
+        "config": cfg["label"],
+        "users": cfg["users"],
+        "reruns": len(every),
+        "errors": sum(v for k, v in errors.items() if k not in ("page_load", "settings")),
+        "throughput": len(every) / elapsed if elapsed else 0.0,
+        "p50": percentile(every, 50),
+        "p99": percentile(every, 99),
+        "page_load_p50": percentile(samples.get("page_load", []), 50),
+        "scenarios": {name: {"n": len(xs), "p50": percentile(xs, 50), "p99": percentile(xs, 99),
+                             "errors": errors.get(name, 0)}
+                      for name, xs in sorted(samples.items())},
+        "harness_rss_peak_mb": mem["peak"] / 2 ** 20,
+        "harness_rss_final_mb": mem["final"] / 2 ** 20,
+    }
+
+# ---------- Driver ----------
+def parse_config(text):
+    cfg = {"perf": 0, "cache": 1, "workers": 1, "approx": 0}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        key, _, value = part.partition("=")
+        if key not in cfg or not value.isdigit():
+            raise argparse.ArgumentTypeError(f"bad config item {part!r}; expected perf/cache/workers/approx=<int>")
+        cfg[key] = int(value)
+    cfg["label"] = ",".join(f"{k}={v}" for k, v in cfg.items())
+    return cfg
+
+def run_in_subprocess(cfg, args):
+    env = dict(os.environ)
+    env["COUNTING_PERFORMANCE_MODE"] = "1" if cfg["perf"] else "0"
+    env["COUNTING_RESULT_CACHE"] = "1" if cfg["cache"] else "0"
+    job = dict(cfg, users=args.users, duration=args.duration, think=args.think, ramp=args.ramp, seed=args.seed)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(job)],
+                          env=env, capture_output=True, text=True)
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode or not lines:
+        raise RuntimeError(f"config {cfg['label']} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+def print_report(results):
+    ms = lambda s: f"{s * 1000:8.1f}"
+    print(f"{'config':<40} {'reruns':>7} {'err':>4} {'rerun/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'load ms':>8} {'h+a RSS pk MB':>13} {'h+a RSS MB':>10}")
+    for r in results:
+        print(f"{r['config']:<40} {r['reruns']:>7} {r['errors']:>4} {r['throughput']:>8.2f} {ms(r['p50'])} "
+              f"{ms(r['p99'])} {ms(r['page_load_p50'])} {r['harness_rss_peak_mb']:>13.1f} {r['harness_rss_final_mb']:>10.1f}")
+    print("h+a RSS: the load-test process, which runs the app sessions in-process (harness + app).")
+    for r in results:
+        print(f"\n{r['config']}")
+        for name, s in r["scenarios"].items():
+            print(f"  {name:<16} n={s['n']:<6} p50={ms(s['p50']).strip()} ms  p99={ms(s['p99']).strip()} ms"
+                  f"  errors={s['errors']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless load test for streamlit_app.py")
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load per configuration")
+    parser.add_argument("--think", type=float, default=0.5, help="mean think time between interactions (s)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users join")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--config", action="append", type=parse_config, help="configuration to compare (repeatable)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_config(json.loads(args.child))))
+        return
+    configs = args.config or [parse_config("perf=0"), parse_config("perf=1")]
+    results = []
+    for cfg in configs:
+        print(f"running {cfg['label']} ({args.users} users, {args.duration:g}s)...", file=sys.stderr)
+        results.append(run_in_subprocess(cfg, args))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# shard.py
+"""
+Command line for sharded counting (``counting/shard.py``).
+
+    python shard.py plan-adjacency jobs/a --n 16 --r 16 --pairs 1-2,2-3 --shards 512
+    python shard.py plan-schedule jobs/s --people A,B,C,D --slots 3 --cap 2 --fixed A:0
+    python shard.py work jobs/a --processes 8      # on each machine sharing jobs/
+    python shard.py serve jobs/a --port 7878       # or share the job over TCP
+    python shard.py work host:7878
+    python shard.py status jobs/a                  # exact total once all shards are done
+
+Interrupted workers can simply be started again: finished shards are kept,
+and leases of workers that died expire after ``--lease`` seconds.
+"""
+import argparse
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from counting import SpecError, adjacency_problem, schedule_problem
+from counting.shard import (
+    DEFAULT_LEASE, DEFAULT_SHARDS, FileCoordinator, connect, plan_adjacency, plan_schedule, process_worker,
+    run_worker, serve,
+)
+
+
+def command(args):
+    if args.cmd == "plan-adjacency":
+        prob = adjacency_problem(args.n, args.r, args.pairs)
+        job = plan_adjacency(prob.n, prob.r, prob.forbidden, args.shards)
+        FileCoordinator.create(args.directory, job)
+        print(f"{len(job.shards)} shards over DP layers 2..{job.depth}" if job.depth >= 2 else
+              f"{len(job.shards)} shards (trivial length)")
+    elif args.cmd == "plan-schedule":
+        prob = schedule_problem(args.people, args.slots, args.cap, args.fixed)
+        job = plan_schedule(prob.people, prob.slots, prob.cap, prob.fixed, args.shards)
+        FileCoordinator.create(args.directory, job)
+        print(f"{len(job.shards)} shards cut at depth {job.depth}")
+    elif args.cmd == "work":
+        base = args.id or f"{socket.gethostname()}:{os.getpid()}"
+        if args.processes > 1:
+            # spawn: each worker gets a clean interpreter.
+            with ProcessPoolExecutor(args.processes, mp_context=get_context("spawn")) as ex:
+                done = sum(ex.map(process_worker, [args.target] * args.processes,
+                                  [f"{base}/{k}" for k in range(args.processes)], [args.lease] * args.processes))
+        else:
+            done = run_worker(connect(args.target, args.lease), base)
+        print(f"finished {done} shards")
+    elif args.cmd == "serve":
+        server = serve(args.directory, args.host, args.port, args.lease)
+        print(f"serving {args.directory} on {server.server_address[0]}:{server.server_address[1]}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        st = connect(args.target).status()
+        print(f"{st.done}/{st.shards} shards done, {st.leased} leased")
+        print(f"{'total' if st.complete else 'partial sum'}: {st.partial}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded exact counting across processes and hosts")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("plan-adjacency", help="plan a forbidden-adjacency count")
+    p.add_argument("directory")
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--r", type=int, required=True)
+    p.add_argument("--pairs", default="", help='forbidden pairs, e.g. "1-2,2-3"')
+    p.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="most shards per DP layer")
+    p = sub.add_parser("plan-schedule", help="plan a slot-scheduling count")
+    p.add_argument("directory")
+    p.add_argument("--people", required=True, help="comma-separated names")
+    p.add_argument("--slots", type=int, required=True)
+    p.add_argument("--cap", type=int, required=True)
+    p.add_argument("--fixed", default="", help='fixed assignments, e.g. "Alice:0"')
+    p.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    p = sub.add_parser("work", help="count shards from a job directory or host:port")
+    p.add_argument("target")
+    p.add_argument("--id", help="worker name recorded in leases")
+    p.add_argument("--processes", type=int, default=1)
+    p.add_argument("--lease", type=float, default=DEFAULT_LEASE,
+                   help="seconds before a lease expires (job directories; a server applies its own)")
+    p = sub.add_parser("serve", help="share a job directory over TCP")
+    p.add_argument("directory")
+    p.add_argument("--host", default="127.0.0.1", help="address to bind; the server is unauthenticated")
+    p.add_argument("--port", type=int, default=7878)
+    p.add_argument("--lease", type=float, default=DEFAULT_LEASE, help="seconds before a lease expires")
+    p = sub.add_parser("status", help="progress and the exact partial sum")
+    p.add_argument("target")
+    args = parser.parse_args(argv)
+    try:
+        command(args)
+    except (SpecError, ValueError, OSError) as e:
+        parser.error(str(e))
+
+if __name__ == "__main__":
+    main()
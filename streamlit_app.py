@@ -1,154 +1,29 @@
 # streamlit_app.py
-import math
-from functools import lru_cache
-from itertools import combinations as it_combinations
+import os
+import altair as alt
 import streamlit as st
 import time
 
-# ---------- Combinatorics core ----------
-def nPr(n: int, r: int) -> int:
-    if r < 0 or r > n: return 0
-    return math.factorial(n) // math.factorial(n - r)
-
-def nCr(n: int, r: int) -> int:
-    if r < 0 or r > n: return 0
-    return math.factorial(n) // (math.factorial(r) * math.factorial(n - r))
-
-def multiset_permutations_count(counts: dict) -> int:
-    total = sum(counts.values())
-    denom = 1
-    for c in counts.values():
-        denom *= math.factorial(c)
-    return math.factorial(total) // denom
-
-def inclusion_exclusion(set_sizes: dict, intersections: dict) -> int:
-    """
-    set_sizes: {'A':a, 'B':b, ...}
-    intersections: keys as tuples sorted, e.g. ('A','B'): x, ('A','B','C'): y
-    """
-    labels = list(set(set_sizes.keys()))
-    total = 0
-
-    def inter_size(lbls_tuple):
-        key = tuple(sorted(lbls_tuple))
-        return intersections.get(key, 0)
-
-    for r in range(1, len(labels)+1):
-        sign = 1 if r % 2 == 1 else -1
-        for subset in it_combinations(labels, r):
-            if r == 1:
-                total += sign * set_sizes[subset[0]]
-            else:
-                total += sign * inter_size(subset)
-    return total
-
-def count_with_min_requirements(group_sizes, mins, r):
-    m = len(group_sizes)
-    if len(mins) != m: raise ValueError("mins length must match group_sizes")
-    if sum(mins) > r: return 0
-    remaining = r - sum(mins)
-
-    def bounded_compositions(total_rem, bounds):
-        if len(bounds) == 1:
-            if 0 <= total_rem <= bounds[0]:
-                yield (total_rem,)
-            return
-        b0 = bounds[0]
-        for x0 in range(0, min(b0, total_rem) + 1):
-            for rest in bounded_compositions(total_rem - x0, bounds[1:]):
-                yield (x0,) + rest
-
-    bounds = [group_sizes[i] - mins[i] for i in range(m)]
-    total = 0
-    for extra in bounded_compositions(remaining, bounds):
-        picks = [mins[i] + extra[i] for i in range(m)]
-        ways = 1
-        for g, e in zip(group_sizes, picks):
-            ways *= nCr(g, e)
-        total += ways
-    return total
-
-def count_with_exact_requirements(group_sizes, exacts):
-    if len(group_sizes) != len(exacts): raise ValueError("exacts length mismatch")
-    ways = 1
-    for g, e in zip(group_sizes, exacts):
-        if e < 0 or e > g: return 0
-        ways *= nCr(g, e)
-    return ways
-
-def count_with_at_most(group_sizes, maxs, r):
-    if len(group_sizes) != len(maxs): raise ValueError("maxs length mismatch")
-    def bounded_compositions(total_rem, bounds):
-        if len(bounds) == 1:
-            if 0 <= total_rem <= bounds[0]:
-                yield (total_rem,)
-            return
-        b0 = bounds[0]
-        for x0 in range(0, min(b0, total_rem) + 1):
-            for rest in bounded_compositions(total_rem - x0, bounds[1:]):
-                yield (x0,) + rest
-    caps = [min(g, m) for g, m in zip(group_sizes, maxs)]
-    total = 0
-    for picks in bounded_compositions(r, caps):
-        ways = 1
-        for g, e in zip(group_sizes, picks):
-            ways *= nCr(g, e)
-        total += ways
-    return total
-
-def arrangements_with_forbidden(n, r, forbidden_pairs):
-    from functools import lru_cache
-    all_items = tuple(range(n))
-    fset = set(tuple(p) for p in forbidden_pairs)
-
-    @lru_cache(maxsize=None)
-    def dp(mask, last):
-        used_count = mask.bit_count()
-        if used_count == r:
-            return 1
-        total = 0
-        for x in all_items:
-            bit = 1 << x
-            if mask & bit: 
-                continue
-            if last != -1 and (last, x) in fset:
-                continue
-            total += dp(mask | bit, x)
-        return total
-
-    return dp(0, -1)
-
-def schedule_slots_count(people, slots, max_per_slot, must_include=None):
-    n = len(people)
-    if must_include is None:
-        must_include = []
-    
-    def bounded_compositions(total, parts, cap):
-        if parts == 1:
-            if 0 <= total <= cap:
-                yield (total,)
-            return
-        for x in range(0, min(total, cap) + 1):
-            for rest in bounded_compositions(total - x, parts - 1, cap):
-                yield (x,) + rest
-
-    total_count = 0
-    for counts in bounded_compositions(n, slots, max_per_slot):
-        slot_req = [0]*slots
-        for _, s in must_include:
-            slot_req[s] += 1
-        feasible = all(slot_req[i] <= counts[i] for i in range(slots))
-        if not feasible:
-            continue
-        m = len(must_include)
-        remaining_people = n - m
-        remaining_counts = [counts[i] - slot_req[i] for i in range(slots)]
-        denom = 1
-        for c in remaining_counts:
-            denom *= math.factorial(c)
-        ways_assign = math.factorial(remaining_people) // denom
-        total_count += ways_assign
-    return total_count
+from counting import (
+    INLINE_DIGITS, LogCount, count_summary, digit_count, format_count, format_log_count,
+    log10_abs, log_percentage, to_decimal_string,
+    approx_count_with_at_most, approx_count_with_exact_requirements,
+    approx_count_with_min_requirements, approx_nCr, approx_nPr, approx_schedule_slots_count,
+    count_with_exact_requirements, inclusion_exclusion, nPr, nCr,
+    DEFAULT_MODULUS, batch_nCr, batch_nPr, constrained_multiset_count, multiset_permutations_count,
+    count_forbidden_permutations, schedule_with_forbidden,
+    default_workers, get_executor, parallel_count_with_min_requirements,
+    parallel_schedule_slots_count, DEFAULT_MEMORY_BUDGET, bounded_arrangements_with_forbidden,
+    IncrementalScheduleCounter, IncrementalTeamCounter,
+    sweep_arrangements_with_forbidden, sweep_schedule_slots_count, sweep_team_count, sweep_to_csv,
+    weighted_schedule, weighted_team_distribution,
+    bonferroni_bounds,
+    SpecError, adjacency_problem, parse_names, parse_nr_lines, parse_pairs, parse_set_family,
+    parse_weight_table, parse_weights, schedule_problem, team_problem,
+    AdjacencySpec, BatchResult, BatchSpec, BlobCache, CountResult,
+    arrangements_with_repetition,
+    count_with_constraints,
+)
 
 # ---------- UI helpers ----------
 st.set_page_config(
@@ -651,12 +526,67 @@ h1, h2, h3, h4, h5, h6 {
 
 st.markdown(SCROLLABLE_PROFESSIONAL_CSS, unsafe_allow_html=True)
 
+def format_result(value):
+    if isinstance(value, LogCount):
+        return format_log_count(value)
+    return format_count(value)
+
+def result_summary(value):
+    if isinstance(value, LogCount):
+        return {"log10": value.log10, "relative_error_bound": value.rel_error}
+    return count_summary(value)
+
+# Deployment switches, read on every rerun so each server process (or load-test run) can set its own.
+PERFORMANCE_MODE = os.environ.get("COUNTING_PERFORMANCE_MODE") == "1"
+RESULT_CACHE = os.environ.get("COUNTING_RESULT_CACHE", "1") != "0"
+
+def pause(seconds):
+    """Decorative delay, skipped in performance mode."""
+    if not PERFORMANCE_MODE:
+        time.sleep(seconds)
+
+def session_counter(key, factory):
+    """Incremental counter kept across reruns, so each edit only recomputes what changed."""
+    if key not in st.session_state:
+        st.session_state[key] = factory()
+    return st.session_state[key]
+
+def spec_source(text, label, key):
+    """Uploaded file contents if a file was given, else the typed text."""
+    upload = st.file_uploader(label, type=["txt", "csv"], key=key)
+    return upload.getvalue() if upload is not None else text
+
+def result_cache():
+    """Per-session result cache, or a zero-capacity one when caching is switched off."""
+    return session_counter("result_cache", BlobCache) if RESULT_CACHE else BlobCache(0)
+
+def offer_full_expansion(value, key):
+    """Download button for counts too long to print; the expansion is built only when clicked."""
+    if isinstance(value, LogCount) or digit_count(value) <= INLINE_DIGITS:
+        return
+    st.download_button(
+        "⬇️ Full decimal expansion",
+        data=lambda: to_decimal_string(value),
+        file_name=f"{key}.txt",
+        mime="text/plain",
+        key=key,
+        on_click="ignore",
+    )
+
+def note_exact_serial(what, approx, workers=1):
+    """Say which global settings a forbidden-cell count ignores: the rook engine is exact and single-process."""
+    ignored = [name for name, on in (("approximate mode", approx), (f"{workers} worker processes", workers > 1)) if on]
+    if ignored:
+        verb = "are" if len(ignored) > 1 else "is"
+        st.info(f"ℹ️ {what} are counted exactly in one process, so {' and '.join(ignored)} {verb} ignored.")
+
 # Animated title with typing effect
 title_placeholder = st.empty()
 title_text = "✨ Combinatorics Engine Pro"
-for i in range(len(title_text) + 1):
-    title_placeholder.title(title_text[:i] + "█")
-    time.sleep(0.05)  # Reduced delay
+if not PERFORMANCE_MODE:
+    for i in range(len(title_text) + 1):
+        title_placeholder.title(title_text[:i] + "█")
+        time.sleep(0.05)  # Reduced delay
 title_placeholder.title(title_text)
 
 # Animated subtitle
@@ -681,13 +611,32 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+mode_col, workers_col = st.columns([3, 1])
+with mode_col:
+    approx_mode = st.toggle(
+        "≈ Approximate mode",
+        help="Return log10 magnitudes with a relative error bound instead of exact big integers",
+    )
+with workers_col:
+    workers = st.number_input(
+        "⚡ Worker processes",
+        min_value=1,
+        max_value=default_workers(),
+        value=1,
+        step=1,
+        help="Split exact DP and composition sums across this many processes",
+    )
+
 # Enhanced tabs with icons
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
     "🎯 Permutations & Combinations",
     "🔄 Inclusion–Exclusion",
     "👥 Team Constraints",
     "🚫 Forbidden Adjacency",
-    "📅 Smart Scheduling"
+    "📅 Smart Scheduling",
+    "📦 Batch Mode",
+    "🧩 Multiset Arrangements",
+    "📈 Parameter Sweep"
 ])
 
 with tab1:
@@ -710,6 +659,14 @@ with tab1:
             with col2:
                 r = st.number_input("Items to select (r)", min_value=0, value=3, step=1, help="Number of items to select")
             
+            forbidden_str = ""
+            if mode.startswith("🔢"):
+                forbidden_str = st.text_input(
+                    '🚫 Forbidden placements (format: "item@position")',
+                    "",
+                    help="Item i (0 to n-1) may not sit at position j (0 to r-1); e.g. 0@0,1@1,2@2 for derangements"
+                )
+            
             run = st.button("🚀 Calculate", type="primary")
     
     with colB:
@@ -722,26 +679,40 @@ with tab1:
             st.markdown("*Combinations: Order doesn't matter*")
     
     if run:
-        if r > n:
-            st.error("❌ Error: r cannot exceed n")
-        else:
-            with st.spinner("🔄 Computing..."):
-                time.sleep(0.5)  # Small delay for effect
-                res = nPr(n, r) if mode.startswith("🔢") else nCr(n, r)
+        try:
+            if r > n:
+                st.error("❌ Error: r cannot exceed n")
+            else:
+                with st.spinner("🔄 Computing..."):
+                    pause(0.5)  # Small delay for effect
+                    forbidden_cells = list(parse_pairs(forbidden_str, "Forbidden placements", "@"))
+                    if forbidden_cells:
+                        note_exact_serial("Forbidden placements", approx_mode)
+                        res = count_forbidden_permutations(n, r, forbidden_cells)
+                    elif approx_mode:
+                        res = approx_nPr(n, r) if mode.startswith("🔢") else approx_nCr(n, r)
+                    else:
+                        res = nPr(n, r) if mode.startswith("🔢") else nCr(n, r)
                 
-            col1, col2, col3 = st.columns(3)
-            with col2:
-                st.metric("🎯 Result", f"{res:,}")
+                col1, col2, col3 = st.columns(3)
+                with col2:
+                    st.metric("🎯 Result", format_result(res))
             
-            st.markdown("---")
-            st.markdown("**📊 Calculation Details**")
-            st.code({
-                "mode": "permutation" if mode.startswith("🔢") else "combination", 
-                "n": n, 
-                "r": r, 
-                "result": res,
-                "formula": f"{n}P{r}" if mode.startswith("🔢") else f"{n}C{r}"
-            }, language="json")
+                st.markdown("---")
+                st.markdown("**📊 Calculation Details**")
+                st.code({
+                    "mode": "permutation" if mode.startswith("🔢") else "combination", 
+                    "n": n, 
+                    "r": r, 
+                    **({"forbidden_placements": forbidden_cells} if forbidden_cells else {}),
+                    "result": result_summary(res),
+                    "formula": f"{n}P{r}" if mode.startswith("🔢") else f"{n}C{r}"
+                }, language="json")
+                offer_full_expansion(res, "tab1_result")
+        except SpecError as e:
+            st.error(f"❌ {e}")
+        except ValueError as e:
+            st.error(f"❌ Cannot compute this count: {e}")
 
 with tab2:
     st.markdown("### 🔄 Inclusion-Exclusion Principle")
@@ -767,37 +738,77 @@ with tab2:
             help="Define the sizes of intersections between sets"
         )
     
+    tc1, tc2 = st.columns([2, 1])
+    with tc1:
+        truncated = st.toggle(
+            "✂️ Truncated mode (Bonferroni bounds)",
+            help="Evaluate intersections only up to a depth and treat missing ones as unknown instead of zero"
+        )
+    with tc2:
+        ie_depth = st.number_input("Max depth", min_value=1, value=3, step=1, disabled=not truncated)
+    
     if st.button("🧮 Calculate Union Size", type="primary"):
         try:
             with st.spinner("🔄 Processing sets..."):
-                import json
-                time.sleep(0.3)
-                
-                set_sizes = json.loads(sets_raw or "{}")
-                inters_dict = json.loads(inters_raw or "{}")
+                pause(0.3)
                 
-                intersections = {}
-                for k, v in inters_dict.items():
-                    key = tuple(sorted(k.split(",")))
-                    intersections[key] = int(v)
+                family = parse_set_family(sets_raw, inters_raw)
+                set_sizes = dict(family.sizes)
+                intersections = dict(family.intersections)
+                inters_dict = {",".join(k): v for k, v in family.intersections}
                 
-                res = inclusion_exclusion(set_sizes, intersections)
+                if truncated:
+                    bounds = bonferroni_bounds(set_sizes, intersections, int(ie_depth))
+                    res = bounds.lower if bounds.exact else None
+                else:
+                    res = inclusion_exclusion(set_sizes, intersections)
             
-            col1, col2, col3 = st.columns([1,2,1])
-            with col2:
-                st.metric("🎯 Union |A ∪ B ∪ ...|", f"{res:,}")
+            if res is None:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("🔽 Union lower bound", format_count(bounds.lower))
+                with col2:
+                    st.metric("🔼 Union upper bound", format_count(bounds.upper))
+                st.dataframe({
+                    "depth": [s.depth for s in bounds.steps],
+                    "S_k range": [f"{format_count(s.sum_low)} – {format_count(s.sum_high)}" for s in bounds.steps],
+                    "missing": [s.missing for s in bounds.steps],
+                    "lower": [format_count(s.lower) for s in bounds.steps],
+                    "upper": [format_count(s.upper) for s in bounds.steps],
+                })
+                if bounds.suggestions:
+                    st.markdown("**🎯 Intersections that would tighten the bounds most**")
+                    st.dataframe({
+                        "intersection": [",".join(k) for k, _ in bounds.suggestions],
+                        "potential tightening": [w for _, w in bounds.suggestions],
+                    })
+                st.code({
+                    "set_sizes": set_sizes,
+                    "intersections": inters_dict,
+                    "max_depth": int(ie_depth),
+                    "depth_evaluated": bounds.depth,
+                    "union_bounds": [count_summary(bounds.lower), count_summary(bounds.upper)],
+                    "principle": "Bonferroni inequalities"
+                }, language="json")
+            else:
+                col1, col2, col3 = st.columns([1,2,1])
+                with col2:
+                    st.metric("🎯 Union |A ∪ B ∪ ...|", format_count(res))
             
-            st.markdown("---")
-            st.markdown("**📊 Detailed Analysis**")
-            st.code({
-                "set_sizes": set_sizes,
-                "intersections": inters_dict,
-                "union_size": res,
-                "principle": "Inclusion-Exclusion"
-            }, language="json")
+                st.markdown("---")
+                st.markdown("**📊 Detailed Analysis**")
+                st.code({
+                    "set_sizes": set_sizes,
+                    "intersections": inters_dict,
+                    "union_size": count_summary(res),
+                    "principle": "Inclusion-Exclusion"
+                }, language="json")
+                offer_full_expansion(res, "tab2_union")
             
-        except Exception as e:
-            st.error(f"❌ Parse error: {e}")
+        except SpecError as e:
+            st.error(f"❌ {e}")
+        except ValueError as e:
+            st.error(f"❌ Cannot compute the union: {e}")
 
 with tab3:
     st.markdown("### 👥 Advanced Team Constraints")
@@ -842,84 +853,180 @@ with tab3:
         )
         run_max = st.button("📈 Compute At-most", type="secondary")
 
-    def parse_int_list(s):
-        s = s.strip()
-        if not s: return []
-        return [int(x.strip()) for x in s.split(",") if x.strip()]
+    with st.expander("📂 Load group sizes from file"):
+        gs_source = spec_source(gs, "Group sizes file (comma- or newline-separated)", "tab3_groups_file")
 
     try:
-        group_sizes = parse_int_list(gs)
-    except:
+        group_sizes = list(team_problem(gs_source, r_val).group_sizes)
+    except SpecError as e:
+        st.error(f"❌ {e}")
         group_sizes = []
 
     if run_min and group_sizes:
         try:
             with st.spinner("🔄 Calculating minimum constraints..."):
-                time.sleep(0.4)
-                mins = parse_int_list(mins_str)
-                if mins and len(mins) != len(group_sizes):
-                    st.error("❌ Minimums length must match group sizes")
+                pause(0.4)
+                mins = list(team_problem(gs_source, r_val, mins=mins_str).mins)
+                if approx_mode:
+                    res = approx_count_with_min_requirements(group_sizes, mins or [0]*len(group_sizes), r_val)
+                elif int(workers) > 1:
+                    res = parallel_count_with_min_requirements(
+                        group_sizes, mins or [0]*len(group_sizes), r_val, int(workers))
                 else:
-                    res = count_with_min_requirements(group_sizes, mins or [0]*len(group_sizes), r_val)
-                    
-                    col1, col2, col3 = st.columns([1,2,1])
-                    with col2:
-                        st.metric("🎯 Valid Combinations", f"{res:,}")
-                    
-                    st.code({
-                        "group_sizes": group_sizes,
-                        "minimums": mins or [0]*len(group_sizes),
-                        "total_selections": r_val,
-                        "result": res,
-                        "constraint_type": "minimum"
-                    }, language="json")
+                    counter = session_counter("tab3_min_counter", lambda: IncrementalTeamCounter([]))
+                    res = counter.sync(group_sizes, mins).count(r_val)
+                
+                col1, col2, col3 = st.columns([1,2,1])
+                with col2:
+                    st.metric("🎯 Valid Combinations", format_result(res))
+                
+                st.code({
+                    "group_sizes": group_sizes,
+                    "minimums": mins or [0]*len(group_sizes),
+                    "total_selections": r_val,
+                    "result": result_summary(res),
+                    "constraint_type": "minimum"
+                }, language="json")
+                offer_full_expansion(res, "tab3_min")
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
     if run_exact and group_sizes:
         try:
             with st.spinner("🔄 Calculating exact constraints..."):
-                time.sleep(0.4)
-                exacts = parse_int_list(exacts_str)
+                pause(0.4)
+                exacts = list(team_problem(gs_source, r_val, exacts=exacts_str).exacts)
                 if len(exacts) != len(group_sizes):
                     st.error("❌ Exacts length must match group sizes")
                 else:
-                    res = count_with_exact_requirements(group_sizes, exacts)
+                    res = (approx_count_with_exact_requirements if approx_mode else count_with_exact_requirements)(
+                        group_sizes, exacts)
                     
                     col1, col2, col3 = st.columns([1,2,1])
                     with col2:
-                        st.metric("🎯 Valid Combinations", f"{res:,}")
+                        st.metric("🎯 Valid Combinations", format_result(res))
                     
                     st.code({
                         "group_sizes": group_sizes,
                         "exact_requirements": exacts,
-                        "result": res,
+                        "result": result_summary(res),
                         "constraint_type": "exact"
                     }, language="json")
+                    offer_full_expansion(res, "tab3_exact")
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
     if run_max and group_sizes:
         try:
             with st.spinner("🔄 Calculating maximum constraints..."):
-                time.sleep(0.4)
-                maxs = parse_int_list(maxs_str)
+                pause(0.4)
+                maxs = list(team_problem(gs_source, r_val, maxs=maxs_str).maxs)
                 if len(maxs) != len(group_sizes):
                     st.error("❌ At-most length must match group sizes")
                 else:
-                    res = count_with_at_most(group_sizes, maxs, r_val)
+                    if approx_mode:
+                        res = approx_count_with_at_most(group_sizes, maxs, r_val)
+                    else:
+                        counter = session_counter("tab3_max_counter", lambda: IncrementalTeamCounter([]))
+                        res = counter.sync(group_sizes, None, maxs).count(r_val)
                     
                     col1, col2, col3 = st.columns([1,2,1])
                     with col2:
-                        st.metric("🎯 Valid Combinations", f"{res:,}")
+                        st.metric("🎯 Valid Combinations", format_result(res))
                     
                     st.code({
                         "group_sizes": group_sizes,
                         "maximums": maxs,
                         "total_selections": r_val,
-                        "result": res,
+                        "result": result_summary(res),
                         "constraint_type": "maximum"
                     }, language="json")
+                    offer_full_expansion(res, "tab3_max")
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
+    with st.expander("🔗 Coupled constraints"):
+        st.markdown(
+            "Bound the combined picks of several groups (0-based indices). Together with the "
+            "minimum and maximum fields above, one per line or comma-separated: `0+1 >= 2`, "
+            "`2 <= 3`, `1 <= 0+2 <= 4`, `* <= 5` (all groups)."
+        )
+        coupled_str = st.text_area(
+            "🔗 Group constraints",
+            "0+1 >= 3\n1+2 <= 3",
+            help="Counted with a DP over groups, so any mix of constraints stays polynomial"
+        )
+        run_coupled = st.button("🔗 Compute Coupled")
+
+    if run_coupled and group_sizes:
+        try:
+            with st.spinner("🔄 Calculating coupled constraints..."):
+                pause(0.4)
+                problem = team_problem(gs_source, r_val, mins=mins_str, maxs=maxs_str, constraints=coupled_str)
+                res = count_with_constraints(
+                    group_sizes, r_val, problem.constraints, list(problem.mins) or None, list(problem.maxs) or None)
+
+                col1, col2, col3 = st.columns([1,2,1])
+                with col2:
+                    st.metric("🎯 Valid Combinations", format_result(res))
+
+                st.code({
+                    "group_sizes": group_sizes,
+                    "minimums": list(problem.mins) or None,
+                    "maximums": list(problem.maxs) or None,
+                    "constraints": [c.describe() for c in problem.constraints],
+                    "total_selections": r_val,
+                    "result": result_summary(res),
+                    "constraint_type": "coupled"
+                }, language="json")
+                offer_full_expansion(res, "tab3_coupled")
+        except SpecError as e:
+            st.error(f"❌ {e}")
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
+    with st.expander("⚖️ Weighted selection"):
+        st.markdown("Members of group i are picked with relative weight wᵢ; a team weighs the product of its members' weights.")
+        wc1, wc2 = st.columns([2, 1])
+        with wc1:
+            team_weights_str = st.text_input(
+                "⚖️ Weight per group member",
+                "1,2,1",
+                help='One weight per group, e.g. "1, 0.5, 2/3"'
+            )
+        with wc2:
+            team_exact = st.toggle("Exact fractions", value=True, key="tab3_weight_exact")
+        run_weighted = st.button("⚖️ Compute Weighted Probabilities")
+
+    if run_weighted and group_sizes:
+        try:
+            team_weights = list(parse_weights(team_weights_str, "Weights", team_exact))
+            bounds = team_problem(gs_source, r_val, mins=mins_str, maxs=maxs_str)
+            mins, maxs = list(bounds.mins) or None, list(bounds.maxs) or None
+            if len(team_weights) != len(group_sizes):
+                st.error("❌ Weights length must match group sizes")
+            else:
+                dist = weighted_team_distribution(group_sizes, team_weights, r_val, mins, maxs)
+                wcols = st.columns(2)
+                with wcols[0]:
+                    st.metric("🎯 P(constraints hold)", f"{float(dist.probability):.6%}")
+                with wcols[1]:
+                    st.metric("⚖️ Weighted total", f"{float(dist.total):.6g}")
+                st.dataframe({
+                    "group": list(range(len(group_sizes))),
+                    "size": group_sizes,
+                    "weight": [str(w) for w in team_weights],
+                    "expected picks": [float(e) for e in dist.expected],
+                })
+                st.code({
+                    "group_sizes": group_sizes,
+                    "weights": [str(w) for w in team_weights],
+                    "minimums": mins,
+                    "maximums": maxs,
+                    "total_selections": r_val,
+                    "probability": str(dist.probability),
+                    "expected_picks": [str(e) for e in dist.expected],
+                }, language="json")
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
@@ -938,6 +1045,25 @@ with tab4:
             "1-2,2-3",
             help="Items that cannot be adjacent in arrangements"
         )
+        pairs_source = spec_source(pairs_str, "📂 Or load forbidden pairs from file", "tab4_pairs_file")
+        budget_mb = st.number_input(
+            "💾 DP memory budget (MB)",
+            min_value=1,
+            value=DEFAULT_MEMORY_BUDGET // 2**20,
+            step=64,
+            help="Above this the DP switches to compact arrays, then to layer files on disk; covers all worker processes"
+        )
+        rc1, rc2 = st.columns(2)
+        with rc1:
+            with_repetition = st.toggle(
+                "🔁 Items may repeat",
+                help="Count sequences that may reuse items (walks in the allowed-next graph); lengths up to 10^18"
+            )
+        with rc2:
+            rep_mode = st.selectbox(
+                "Arithmetic", ["mod", "exact", "log10"], key="tab4_rep_mode", disabled=not with_repetition,
+                help="mod: modulo 1,000,000,007 · exact: big integers (moderate lengths) · log10: magnitude"
+            )
     
     with col2:
         st.markdown("**📋 Example**")
@@ -953,27 +1079,64 @@ with tab4:
     if st.button("🔍 Analyze Arrangements", type="primary"):
         try:
             with st.spinner("🔄 Computing valid arrangements..."):
-                time.sleep(0.5)
-                pairs = []
-                pairs_str = pairs_str.strip()
-                if pairs_str:
-                    for p in pairs_str.split(","):
-                        a, b = p.split("-")
-                        pairs.append((int(a), int(b)))
+                pause(0.5)
+                pairs = list(adjacency_problem(n_f, r_f, pairs_source).forbidden)
                 
-                if r_f > n_f:
+                if with_repetition:
+                    res = arrangements_with_repetition(n_f, r_f, pairs, rep_mode, DEFAULT_MODULUS)
+                    col1, col2, col3 = st.columns([1,2,1])
+                    with col2:
+                        st.metric(
+                            "🎯 Valid Sequences" + (f" (mod {DEFAULT_MODULUS:,})" if rep_mode == "mod" else ""),
+                            format_result(res)
+                        )
+                    if rep_mode != "mod" and n_f > 0 and r_f > 0:
+                        seq_log = res.log10 if rep_mode == "log10" else log10_abs(res)
+                        st.markdown(f"**📊 {log_percentage(seq_log, r_f * log10_abs(n_f)):.1f}% of all "
+                                    f"{n_f}^{r_f} sequences are valid**")
+                    st.markdown("---")
+                    st.code({
+                        "total_items": n_f,
+                        "sequence_length": r_f,
+                        "forbidden_pairs": pairs,
+                        "repetition": True,
+                        "arithmetic": rep_mode,
+                        **({"modulus": DEFAULT_MODULUS} if rep_mode == "mod" else {}),
+                        "valid_sequences": res if rep_mode == "mod" else result_summary(res),
+                    }, language="json")
+                    if rep_mode == "exact":
+                        offer_full_expansion(res, "tab4_sequences")
+                elif r_f > n_f:
                     st.error("❌ Arrangement length cannot exceed total items")
                 else:
-                    res = arrangements_with_forbidden(n_f, r_f, pairs)
+                    adj_spec = AdjacencySpec(n_f, r_f, pairs)
+                    cache = result_cache()
+                    cached = cache.get(adj_spec)
+                    if cached is not None:
+                        res, dp_meta = cached.value, cached.meta
+                    else:
+                        # The budget holds with any worker count: layers are split, not duplicated.
+                        executor = get_executor(int(workers)) if int(workers) > 1 else None
+                        res, dp_meta = bounded_arrangements_with_forbidden(
+                            n_f, r_f, pairs, int(budget_mb) * 2**20, executor=executor, workers=int(workers))
+                        cache.put(adj_spec, CountResult(adj_spec, res, dp_meta))
                     
                     col1, col2, col3 = st.columns([1,2,1])
                     with col2:
-                        st.metric("🎯 Valid Arrangements", f"{res:,}")
+                        st.metric("🎯 Valid Arrangements", format_count(res))
                     
                     # Calculate percentage if total arrangements > 0
-                    total_arrangements = nPr(n_f, r_f) if r_f <= n_f else 0
-                    if total_arrangements > 0:
-                        percentage = (res / total_arrangements) * 100
+                    if approx_mode:
+                        total_arrangements = approx_nPr(n_f, r_f)
+                        has_total = not total_arrangements.is_zero
+                        if has_total:
+                            percentage = log_percentage(log10_abs(res), total_arrangements.log10)
+                    else:
+                        total_arrangements = nPr(n_f, r_f) if r_f <= n_f else 0
+                        has_total = total_arrangements > 0
+                        if has_total:
+                            percentage = (res / total_arrangements) * 100
+                    if has_total:
                         st.markdown(f"**📊 {percentage:.1f}% of all possible arrangements are valid**")
                     
                     st.markdown("---")
@@ -981,10 +1144,12 @@ with tab4:
                         "total_items": n_f,
                         "arrangement_length": r_f,
                         "forbidden_pairs": pairs,
-                        "valid_arrangements": res,
-                        "total_possible": total_arrangements,
-                        "success_rate": f"{percentage:.2f}%" if total_arrangements > 0 else "N/A"
+                        "valid_arrangements": count_summary(res),
+                        "total_possible": result_summary(total_arrangements),
+                        "success_rate": f"{percentage:.2f}%" if has_total else "N/A",
+                        **({"dp": dp_meta} if dp_meta else {})
                     }, language="json")
+                    offer_full_expansion(res, "tab4_arrangements")
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
@@ -1014,9 +1179,19 @@ with tab5:
             "Alice:0,Charlie:1",
             help='Format: "name:slot,name:slot"'
         )
+        forbid = st.text_input(
+            '🚫 Forbidden assignments',
+            "",
+            help='People who may not take a slot. Format: "name:slot,name:slot"'
+        )
+        ppl_source = spec_source(ppl, "📂 Or load people from file", "tab5_people_file")
     
     st.markdown("**📊 Visual Representation**")
-    people_list = [x.strip() for x in ppl.split(",") if x.strip()]
+    try:
+        people_list = list(parse_names(ppl_source, "People"))
+    except SpecError as e:
+        st.error(f"❌ {e}")
+        people_list = []
     
     # Create a visual representation of slots
     slot_cols = st.columns(int(slots))
@@ -1028,21 +1203,26 @@ with tab5:
     if st.button("🚀 Generate Schedules", type="primary"):
         try:
             with st.spinner("🔄 Optimizing schedules..."):
-                time.sleep(0.6)
-                people = people_list
-                must_include = []
-                
-                if must.strip():
-                    for m in must.split(","):
-                        if ":" in m:
-                            name, s = m.split(":")
-                            must_include.append((name.strip(), int(s.strip())))
+                pause(0.6)
+                sched = schedule_problem(ppl_source, slots, cap, must, forbid)
+                people = list(sched.people)
+                must_include = list(sched.fixed)
+                forbidden_assign = list(sched.forbidden)
                 
-                res = schedule_slots_count(people, int(slots), int(cap), must_include)
+                if forbidden_assign:
+                    note_exact_serial("Forbidden assignments", approx_mode, int(workers))
+                    res = schedule_with_forbidden(people, int(slots), int(cap), forbidden_assign, must_include)
+                elif approx_mode:
+                    res = approx_schedule_slots_count(people, int(slots), int(cap), must_include)
+                elif int(workers) > 1:
+                    res = parallel_schedule_slots_count(people, int(slots), int(cap), must_include, int(workers))
+                else:
+                    counter = session_counter("tab5_counter", lambda: IncrementalScheduleCounter(int(slots), int(cap)))
+                    res = counter.sync(int(slots), int(cap), [s for _, s in must_include]).count(len(people))
                 
                 col1, col2, col3 = st.columns([1,2,1])
                 with col2:
-                    st.metric("🎯 Possible Schedules", f"{res:,}")
+                    st.metric("🎯 Possible Schedules", format_result(res))
                 
                 # Additional insights
                 st.markdown("---")
@@ -1064,13 +1244,260 @@ with tab5:
                     "slots": int(slots),
                     "max_per_slot": int(cap),
                     "fixed_assignments": must_include,
-                    "possible_schedules": res,
+                    "forbidden_assignments": forbidden_assign,
+                    "possible_schedules": result_summary(res),
                     "utilization_rate": f"{utilization:.2f}%"
                 }, language="json")
+                offer_full_expansion(res, "tab5_schedules")
                 
         except Exception as e:
             st.error(f"❌ Error: {e}")
 
+    with st.expander("⚖️ Slot preferences"):
+        st.markdown("Each person takes a slot with relative weight w[person][slot]; unlisted weights are 1 and 0 rules a slot out.")
+        prefs = st.text_area(
+            "⚖️ Preference weights (one person per line)",
+            "Bob: 2,1,1\nDavid: 0,1,3",
+            help='Format: "name: w0,w1,..." with weights like 2, 0.5 or 1/3'
+        )
+        sched_exact = st.toggle("Exact fractions", value=True, key="tab5_weight_exact")
+        run_prefs = st.button("⚖️ Compute Slot Probabilities")
+
+    if run_prefs:
+        try:
+            must_include = list(schedule_problem(ppl_source, slots, cap, must).fixed)
+            pref_weights = {name: list(ws) for name, ws in parse_weight_table(prefs, "Preference weights", sched_exact)}
+            ws_res = weighted_schedule(people_list, int(slots), int(cap), pref_weights, must_include)
+            if not ws_res.total:
+                st.warning("⚠️ No schedule has positive weight")
+            else:
+                st.dataframe(
+                    {"person": people_list}
+                    | {f"P(slot {s})": [float(row[s]) for row in ws_res.assignment] for s in range(int(slots))}
+                )
+                st.bar_chart({"expected load": [float(x) for x in ws_res.expected_load]})
+                st.code({
+                    "weights": {k: [str(w) for w in v] for k, v in pref_weights.items()},
+                    "fixed_assignments": must_include,
+                    "weighted_total": str(ws_res.total),
+                    "expected_load": [str(x) for x in ws_res.expected_load],
+                }, language="json")
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
+with tab6:
+    st.markdown("### 📦 Batch Calculator")
+    st.markdown("*Evaluate a whole column of (n, r) pairs in one vectorized pass*")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        batch_raw = st.text_area(
+            "📋 n,r pairs (one per line)",
+            value="10,3\n20,10\n52,5\n100,50",
+            height=180,
+            help="Each line holds one n,r pair"
+        )
+    
+    with col2:
+        batch_op = st.selectbox("Operation", ["🎲 Combination (nCr)", "🔢 Permutation (nPr)"])
+        batch_mode = st.selectbox(
+            "Arithmetic",
+            ["exact", "mod", "log10"],
+            index=2 if approx_mode else 0,
+            help="exact: big integers · mod: results modulo a prime · log10: magnitudes only"
+        )
+        batch_modulus = st.number_input("Prime modulus", min_value=2, value=DEFAULT_MODULUS, step=1,
+                                        disabled=batch_mode != "mod")
+    batch_source = spec_source(batch_raw, "📂 Or load n,r pairs from file (one per line)", "tab6_batch_file")
+    
+    if st.button("📦 Compute Batch", type="primary"):
+        try:
+            with st.spinner("🔄 Evaluating batch..."):
+                batch_n, batch_r = (list(v) for v in parse_nr_lines(batch_source))
+                
+                batch_spec = BatchSpec("nCr" if batch_op.startswith("🎲") else "nPr", batch_mode,
+                                       int(batch_modulus) if batch_mode == "mod" else 0, batch_n, batch_r)
+                cache = result_cache()
+                cached = cache.get(batch_spec)
+                if cached is None:
+                    batch_fn = batch_nCr if batch_spec.op == "nCr" else batch_nPr
+                    cached = cache.put(batch_spec, BatchResult(
+                        batch_spec, batch_mode, batch_fn(batch_n, batch_r, batch_mode, int(batch_modulus))))
+                batch_res = cached.values
+            
+            st.metric("📋 Pairs Evaluated", len(batch_n))
+            st.dataframe({
+                "n": batch_n,
+                "r": batch_r,
+                "result": [format_count(v) for v in batch_res] if batch_mode == "exact" else list(batch_res),
+            })
+            st.download_button(
+                "💾 Download binary result (.cnt)",
+                data=cached.to_bytes(),
+                file_name="batch.cnt",
+                mime="application/octet-stream",
+                on_click="ignore",
+            )
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
+with tab7:
+    st.markdown("### 🧩 Multiset Arrangements")
+    st.markdown("*Arrange repeated item types under adjacency and position rules*")
+    
+    col1, col2 = st.columns([3, 2])
+    
+    with col1:
+        st.markdown("**⚙️ Configuration**")
+        ms_counts_str = st.text_input(
+            '📦 Item types and counts (format: "A:3,B:2")',
+            "A:3,B:2,C:2",
+            help="How many copies of each item type to arrange"
+        )
+        ms_adj_str = st.text_input(
+            '🚫 Forbidden neighbours (format: "A-A,B-C")',
+            "A-A",
+            help="The second type may not directly follow the first; A-A forbids two A's in a row"
+        )
+        ms_symmetric = st.checkbox("↔️ Forbid pairs in both directions", value=True)
+        ms_pos_str = st.text_input(
+            '📍 Forbidden positions (format: "A@0,C@6")',
+            "",
+            help="0-based positions an item type may not occupy"
+        )
+    
+    with col2:
+        st.markdown("**📋 Example**")
+        st.info("""
+        **Items**: A×3, B×2, C×2  
+        **Forbidden**: A-A  
+        
+        ✅ Valid: A B A C A B C  
+        ❌ Invalid: A A B C A B C (A-A adjacent)
+        """)
+    
+    if st.button("🧩 Count Arrangements", type="primary"):
+        try:
+            with st.spinner("🔄 Counting arrangements..."):
+                ms_counts = dict(parse_pairs(ms_counts_str, "Item counts", ":", str, int))
+                ms_pairs = list(parse_pairs(ms_adj_str, "Forbidden neighbours", "-", str, str))
+                ms_positions = {}
+                for name, p in parse_pairs(ms_pos_str, "Forbidden positions", "@", str, int):
+                    ms_positions.setdefault(name, set()).add(p)
+                
+                res = constrained_multiset_count(ms_counts, ms_pairs, ms_positions, ms_symmetric)
+                ms_total = multiset_permutations_count(ms_counts)
+            
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                st.metric("🎯 Valid Arrangements", format_count(res))
+            if ms_total > 0:
+                st.markdown(f"**📊 {log_percentage(log10_abs(res), log10_abs(ms_total)):.1f}% of all distinct orderings are valid**")
+            
+            st.markdown("---")
+            st.code({
+                "counts": ms_counts,
+                "forbidden_neighbours": ms_pairs,
+                "symmetric": ms_symmetric,
+                "forbidden_positions": {k: sorted(v) for k, v in ms_positions.items()},
+                "valid_arrangements": count_summary(res),
+                "unconstrained": count_summary(ms_total)
+            }, language="json")
+            offer_full_expansion(res, "tab7_multiset")
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
+with tab8:
+    st.markdown("### 📈 Parameter Sweep")
+    st.markdown("*Tabulate a count across a whole grid of parameters in one pass*")
+    
+    sweep_kind = st.selectbox(
+        "Sweep",
+        ["📅 Scheduling: slots × capacity", "🚫 Forbidden adjacency: every length r", "👥 Team: every team size r"],
+        key="sweep_kind"
+    )
+    
+    col1, col2 = st.columns(2)
+    if sweep_kind.startswith("📅"):
+        with col1:
+            sw_people = st.text_input("👥 People/Resources", "Alice,Bob,Charlie,David,Eve", key="sweep_people")
+            sw_must = st.text_input('📌 Fixed assignments', "", help='Format: "name:slot,name:slot"', key="sweep_must")
+        with col2:
+            sw_slots = st.slider("🕐 Slots range", 1, 40, (1, 20), key="sweep_slots")
+            sw_caps = st.slider("👤 Max per slot range", 1, 20, (1, 10), key="sweep_caps")
+    elif sweep_kind.startswith("🚫"):
+        with col1:
+            sw_n = st.number_input("🔢 Total items (0 to n-1)", min_value=0, max_value=22, value=8, step=1, key="sweep_n")
+        with col2:
+            sw_pairs = st.text_input('🚫 Forbidden pairs (format: "a-b,c-d")', "1-2,2-3", key="sweep_pairs")
+            sw_budget = st.number_input(
+                "💾 DP memory budget (MB)", min_value=1, value=DEFAULT_MEMORY_BUDGET // 2**20, step=64,
+                help="Layers beyond this go to files on disk", key="sweep_budget"
+            )
+    else:
+        with col1:
+            sw_groups = st.text_input("🏢 Group sizes (comma-separated)", "6,5,4", key="sweep_groups")
+            sw_mins = st.text_input("🔽 Minimum from each group", "", key="sweep_mins")
+        with col2:
+            sw_maxs = st.text_input("🔼 Maximum from each group", "", key="sweep_maxs")
+    
+    if st.button("📈 Run Sweep", type="primary"):
+        try:
+            with st.spinner("🔄 Sweeping..."):
+                if sweep_kind.startswith("📅"):
+                    sw_people_list = list(parse_names(sw_people, "People"))
+                    sw_must_list = list(parse_pairs(sw_must, "Fixed assignments", ":", str, int))
+                    row_label, row_values = "slots", list(range(sw_slots[0], sw_slots[1] + 1))
+                    col_label, col_values = "cap", list(range(sw_caps[0], sw_caps[1] + 1))
+                    grid = sweep_schedule_slots_count(sw_people_list, row_values, col_values, sw_must_list)
+                else:
+                    col_label = col_values = None
+                    row_label = "r"
+                    if sweep_kind.startswith("🚫"):
+                        sw_pair_list = list(adjacency_problem(sw_n, sw_n, sw_pairs).forbidden)
+                        grid = sweep_arrangements_with_forbidden(int(sw_n), sw_pair_list,
+                                                                 memory_budget=int(sw_budget) * 2**20)
+                        row_values = list(range(len(grid)))
+                    else:
+                        sw_team = team_problem(sw_groups, 0, mins=sw_mins, maxs=sw_maxs)
+                        sw_sizes = list(sw_team.group_sizes)
+                        sw_min_list = list(sw_team.mins) or None
+                        sw_max_list = list(sw_team.maxs) or None
+                        row_values = list(range(sum(sw_sizes) + 1))
+                        grid = sweep_team_count(sw_sizes, row_values, sw_min_list, sw_max_list)
+            
+            if col_values is None:
+                st.dataframe({row_label: row_values, "count": [format_count(v) for v in grid]})
+                st.bar_chart({"log10(count)": [log10_abs(v) if v else 0.0 for v in grid]})
+            else:
+                heat = [
+                    {row_label: x, col_label: y, "log10(count)": log10_abs(v) if v else None, "count": format_count(v)}
+                    for x, row in zip(row_values, grid) for y, v in zip(col_values, row)
+                ]
+                st.altair_chart(
+                    alt.Chart(alt.Data(values=heat)).mark_rect().encode(
+                        x=alt.X(f"{col_label}:O"),
+                        y=alt.Y(f"{row_label}:O"),
+                        color=alt.Color("log10(count):Q", scale=alt.Scale(scheme="viridis")),
+                        tooltip=[f"{row_label}:O", f"{col_label}:O", "count:N"],
+                    )
+                )
+                st.dataframe(
+                    {row_label: row_values} | {f"{row_label} \\ {col_label}={y}": [format_count(row[j]) for row in grid]
+                                               for j, y in enumerate(col_values)}
+                )
+            
+            st.download_button(
+                "⬇️ Download CSV",
+                data=sweep_to_csv(row_label, row_values, col_label, col_values, grid),
+                file_name="sweep.csv",
+                mime="text/csv",
+                on_click="ignore",
+            )
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
 # Enhanced footer
 st.markdown("---")
 st.markdown("""
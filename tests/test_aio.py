@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from counting import count_with_at_most
+from counting.aio import AsyncCounters
+from counting.cancel import checkpoint
+
+
+def _blocking(release, calls):
+    def fn(x):
+        calls.append(x)
+        while not release.wait(0.01):
+            checkpoint()
+        return len(calls)
+    return fn
+
+
+def test_equal_array_arguments_share_one_flight():
+    async def main():
+        ac = AsyncCounters()
+        release, calls = threading.Event(), []
+        fn = _blocking(release, calls)
+        a = asyncio.ensure_future(ac.run("f", fn, np.array([3, 4])))
+        b = asyncio.ensure_future(ac.run("f", fn, np.array([3, 4])))
+        await asyncio.sleep(0.05)
+        assert ac.in_flight("f") == 1
+        release.set()
+        assert await a == await b == 1
+        assert await ac.run("count", count_with_at_most, np.array([3, 4]), [1, 2], 3) == \
+            count_with_at_most([3, 4], [1, 2], 3)
+        ac.close()
+    asyncio.run(main())
+
+
+def test_unhashable_arguments_run_unshared():
+    class Opaque:
+        __hash__ = None
+
+    async def main():
+        ac = AsyncCounters()
+        assert await asyncio.gather(ac.run("f", lambda o: 7, Opaque()), ac.run("f", lambda o: 7, Opaque())) == [7, 7]
+        ac.close()
+    asyncio.run(main())
+
+
+def test_cancelled_flight_is_not_joined():
+    async def main():
+        ac = AsyncCounters()
+        release, calls = threading.Event(), []
+        fn = _blocking(release, calls)
+        first = asyncio.ensure_future(ac.run("f", fn, 1))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0)
+        assert ac.in_flight() == 0
+        again = asyncio.ensure_future(ac.run("f", fn, 1))
+        await asyncio.sleep(0.05)
+        release.set()
+        assert await again == 2
+        ac.close()
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import math
+from collections import Counter
+from itertools import combinations, permutations, product
+
+import pytest
+
+from counting import (
+    approx_count_with_at_most, approx_count_with_exact_requirements, approx_count_with_min_requirements,
+    approx_multiset_permutations_count, approx_nCr, approx_nPr, approx_schedule_slots_count, format_log_count,
+)
+
+GROUPS = [2, 3, 1]
+
+
+def close(approx, exact):
+    if exact == 0:
+        return approx.is_zero
+    return abs(math.expm1((approx.log10 - math.log10(exact)) * math.log(10))) <= approx.rel_error + 1e-15
+
+
+def picks(group_sizes, r):
+    """Group of each picked item, for every r-subset of the labelled items."""
+    items = [g for g, size in enumerate(group_sizes) for _ in range(size)]
+    for chosen in combinations(range(len(items)), r):
+        yield Counter(items[i] for i in chosen)
+
+
+def schedules(people, slots, cap, fixed):
+    for seats in product(range(slots), repeat=len(people)):
+        if max(Counter(seats).values(), default=0) <= cap and all(seats[people.index(p)] == s for p, s in fixed):
+            yield seats
+
+
+@pytest.mark.parametrize("n, r", [(0, 0), (5, 0), (5, 2), (6, 6), (4, 5)])
+def test_nPr_nCr(n, r):
+    assert close(approx_nPr(n, r), sum(1 for _ in permutations(range(n), r)))
+    assert close(approx_nCr(n, r), sum(1 for _ in combinations(range(n), r)))
+
+
+def test_multiset():
+    counts = {"a": 2, "b": 1, "c": 2}
+    assert close(approx_multiset_permutations_count(counts), len(set(permutations("aabcc"))))
+
+
+@pytest.mark.parametrize("r", range(7))
+def test_group_counters(r):
+    mins, maxs = [1, 1, 0], [1, 2, 1]
+    assert close(approx_count_with_min_requirements(GROUPS, mins, r),
+                 sum(all(c[g] >= m for g, m in enumerate(mins)) for c in picks(GROUPS, r)))
+    assert close(approx_count_with_at_most(GROUPS, maxs, r),
+                 sum(all(c[g] <= m for g, m in enumerate(maxs)) for c in picks(GROUPS, r)))
+
+
+@pytest.mark.parametrize("exacts", [[1, 2, 0], [2, 3, 1], [0, 4, 0]])
+def test_exact_requirements(exacts):
+    expected = sum(all(c[g] == e for g, e in enumerate(exacts)) for c in picks(GROUPS, sum(exacts)))
+    assert close(approx_count_with_exact_requirements(GROUPS, exacts), expected)
+
+
+@pytest.mark.parametrize("slots, cap, fixed", [(3, 2, []), (2, 3, [("A", 0)]), (3, 1, [("A", 0), ("B", 0)]), (2, 2, [])])
+def test_schedule(slots, cap, fixed):
+    people = list("ABCDE")
+    expected = sum(1 for _ in schedules(people, slots, cap, fixed))
+    assert close(approx_schedule_slots_count(people, slots, cap, fixed), expected)
+
+
+def test_huge_values_stay_finite():
+    # C(2m, m) ~ 4**m / sqrt(pi m)
+    m = 5 * 10 ** 8
+    lc = approx_nCr(2 * m, m)
+    assert abs(lc.log10 - (2 * m * math.log10(2) - math.log10(math.pi * m) / 2)) < 1e-6 and lc.rel_error < 1e-3
+    assert format_log_count(approx_nPr(3, 4)) == "0"
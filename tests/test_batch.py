@@ -0,0 +1,63 @@
+import math
+from itertools import combinations, permutations
+
+import numpy as np
+import pytest
+
+from counting import DEFAULT_MODULUS, batch_multiset_permutations_count, batch_nCr, batch_nPr, exact_factorials
+from counting.batch import TABLE_CAP, _is_prime, check_modulus
+
+N = np.array([0, 1, 4, 5, 6, 6, 3])
+R = np.array([0, 2, 2, 5, 3, 0, -1])
+P = 1_000_003
+
+
+def brute(n, r, choose):
+    if r < 0: return 0
+    return sum(1 for _ in (combinations if choose else permutations)(range(n), r))
+
+
+@pytest.mark.parametrize("fn, choose", [(batch_nCr, True), (batch_nPr, False)])
+def test_all_modes_match_brute_force(fn, choose):
+    expected = [brute(n, r, choose) for n, r in zip(N.tolist(), R.tolist())]
+    assert fn(N, R).tolist() == expected
+    assert fn(N, R, "mod", P).tolist() == [e % P for e in expected]
+    logs = fn(N, R, "log10")
+    for got, e in zip(logs.tolist(), expected):
+        assert got == -math.inf if e == 0 else math.isclose(got, math.log10(e), abs_tol=1e-12)
+
+
+def test_multiset_rows():
+    rows = [[2, 1, 0], [1, 1, 1], [0, 0, 0], [3, 0, 2]]
+    expected = [len(set(permutations("".join(ch * c for ch, c in zip("abc", row))))) for row in rows]
+    assert batch_multiset_permutations_count(rows).tolist() == expected
+    assert batch_multiset_permutations_count(rows, "mod", P).tolist() == [e % P for e in expected]
+    assert np.allclose(batch_multiset_permutations_count(rows, "log10"), np.log10(expected))
+
+
+def test_arguments_above_the_table_cap():
+    n, r, p = TABLE_CAP + 5, 3, DEFAULT_MODULUS
+    assert batch_nCr([n], [r], "mod", p).tolist() == [math.comb(n, r) % p]
+    assert batch_nPr([n], [r], "mod", p).tolist() == [math.perm(n, r) % p]
+    assert batch_multiset_permutations_count([[n - r, r]], "mod", p).tolist() == [math.comb(n, r) % p]
+    assert math.isclose(batch_nCr([n], [r], "log10")[0], math.log10(math.comb(n, r)))
+
+
+def test_exact_factorials_reuse_cached_neighbours():
+    assert exact_factorials([30, 10])[30] == math.factorial(30)
+    assert exact_factorials([12, 31, 29]) == {v: math.factorial(v) for v in (12, 29, 31)}
+
+
+def test_primality_matches_trial_division():
+    def slow(m):
+        return m > 1 and all(m % d for d in range(2, math.isqrt(m) + 1))
+    assert [m for m in range(5000) if _is_prime(m)] == [m for m in range(5000) if slow(m)]
+    assert _is_prime(2 ** 31 - 1) and not _is_prime(2 ** 31 - 3)
+
+
+@pytest.mark.parametrize("modulus", [1, 4, 561, 2 ** 31 + 11, 1.5])
+def test_bad_moduli_are_rejected(modulus):
+    with pytest.raises(ValueError):
+        check_modulus(modulus)
+    with pytest.raises(ValueError):
+        batch_nCr([3], [1], "mod", modulus)
@@ -0,0 +1,59 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from counting import bonferroni_bounds, inclusion_exclusion
+
+
+def family(seed, sets=5, universe=12):
+    rng = random.Random(seed)
+    members = {chr(65 + i): set(rng.sample(range(universe), rng.randint(0, universe // 2))) for i in range(sets)}
+    sizes = {l: len(s) for l, s in members.items()}
+    inter = {}
+    for k in range(2, sets + 1):
+        for key in combinations(sorted(members), k):
+            inter[key] = len(set.intersection(*(members[l] for l in key)))
+    return members, sizes, inter, len(set().union(*members.values()))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_full_family_is_exact(seed):
+    _, sizes, inter, union = family(seed)
+    res = bonferroni_bounds(sizes, inter)
+    assert res.exact and res.lower == res.upper == union == inclusion_exclusion(sizes, inter)
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("max_depth", [1, 2, 3])
+def test_truncated_bounds_contain_the_union(seed, max_depth):
+    _, sizes, inter, union = family(seed)
+    res = bonferroni_bounds(sizes, inter, max_depth=max_depth)
+    assert res.lower <= union <= res.upper
+    assert res.depth <= max_depth
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_missing_intersections_are_unknown_not_zero(seed):
+    _, sizes, inter, union = family(seed)
+    rng = random.Random(seed)
+    kept = {k: v for k, v in inter.items() if rng.random() < 0.5}
+    res = bonferroni_bounds(sizes, kept)
+    assert res.lower <= union <= res.upper
+    assert all(key not in kept for key, _ in res.suggestions)
+    # Supplying the suggested intersections never loosens the bounds.
+    more = {**kept, **{key: inter[key] for key, _ in res.suggestions}}
+    again = bonferroni_bounds(sizes, more)
+    assert res.lower <= again.lower <= union <= again.upper <= res.upper
+
+
+def test_disjoint_sets_stop_after_one_level():
+    sizes = {"A": 3, "B": 4, "C": 5}
+    res = bonferroni_bounds(sizes, {("A", "B"): 0, ("A", "C"): 0, ("B", "C"): 0})
+    assert res.exact and res.lower == 12 and res.depth == 2
+
+
+def test_term_cap_reports_incomplete():
+    sizes = {f"S{i:02d}": 10 for i in range(30)}
+    res = bonferroni_bounds(sizes, {}, max_terms=100)
+    assert not res.complete and res.lower <= res.upper
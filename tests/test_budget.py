@@ -0,0 +1,40 @@
+import math
+from itertools import permutations
+
+import pytest
+
+from counting import bounded_arrangements_with_forbidden
+from counting.budget import layered_counts
+
+PAIRS = [(0, 1), (1, 2), (2, 0), (3, 3), (4, 5)]
+
+
+def brute(n, r, pairs):
+    bad = set(pairs)
+    return sum(all(p not in bad for p in zip(seq, seq[1:])) for seq in permutations(range(n), r))
+
+
+@pytest.mark.parametrize("budget, layout", [(2 ** 30, "memo"), (2 ** 13, "array"), (1, "mmap")])
+@pytest.mark.parametrize("n, r", [(6, 6), (7, 4), (5, 3)])
+def test_every_layout_matches_brute_force(tmp_path, budget, layout, n, r):
+    res = bounded_arrangements_with_forbidden(n, r, PAIRS, budget, spill_dir=str(tmp_path))
+    assert res.value == brute(n, r, PAIRS)
+    assert res.meta["layout"] == layout
+    assert not list(tmp_path.iterdir())
+
+
+def test_layered_counts_give_every_length(tmp_path):
+    counts, meta = layered_counts(7, 7, PAIRS, 1, spill_dir=str(tmp_path))
+    assert counts == [brute(7, r, PAIRS) for r in range(8)]
+    assert meta["layout"] == "mmap" and meta["peak_disk_bytes"] > 0
+
+
+def test_limbs_carry_past_32_bits():
+    # 14! needs two 32-bit limbs; with no forbidden pairs every permutation counts.
+    counts, _ = layered_counts(14, 14, [], 2 ** 30)
+    assert counts == [math.perm(14, r) for r in range(15)]
+
+
+@pytest.mark.parametrize("r", [0, 1, 8])
+def test_edge_lengths(r):
+    assert bounded_arrangements_with_forbidden(7, r, PAIRS, 1).value == (brute(7, r, PAIRS) if r <= 7 else 0)
@@ -0,0 +1,79 @@
+from collections import Counter
+from itertools import combinations, product
+
+import pytest
+
+from counting import IncrementalScheduleCounter, IncrementalTeamCounter
+
+
+def brute_team(groups, r):
+    """groups: [(size, lo, hi or None)]"""
+    items = [g for g, (size, _, _) in enumerate(groups) for _ in range(size)]
+    total = 0
+    for chosen in combinations(range(len(items)), r):
+        c = Counter(items[i] for i in chosen)
+        total += all(lo <= c[g] and (hi is None or c[g] <= hi) for g, (_, lo, hi) in enumerate(groups))
+    return total
+
+
+def brute_schedule(n, slots, cap, fixed_slots):
+    fixed = Counter(fixed_slots)
+    people = n - len(fixed_slots)
+    if people < 0: return 0
+    return sum(all(Counter(seats)[s] + fixed[s] <= cap for s in range(slots))
+               for seats in product(range(slots), repeat=people))
+
+
+def test_team_counter_follows_edits():
+    groups = [(3, 1, None), (2, 0, 1), (4, 0, 3)]
+    counter = IncrementalTeamCounter(*map(list, zip(*groups)))
+    edits = [
+        (0, (3, 0, 2)), (2, (2, 1, None)), (1, (3, 1, 3)), (0, (1, 1, 1)), (2, (4, 2, 2)),
+    ]
+    for i, grp in [(None, None)] + edits:
+        if i is not None:
+            counter.set_group(i, *grp)
+            groups[i] = grp
+        for r in range(sum(g for g, _, _ in groups) + 2):
+            assert counter.count(r) == brute_team(groups, r)
+    counter.add_group(2, 1, 1)
+    groups.append((2, 1, 1))
+    assert [counter.count(r) for r in range(9)] == [brute_team(groups, r) for r in range(9)]
+
+
+def test_team_sync_only_rebuilds_what_changed():
+    counter = IncrementalTeamCounter([3, 3, 3, 3], [1, 0, 0, 0], [None] * 4)
+    counter.count(5)
+    before = counter.convolutions
+    counter.sync([3, 3, 3, 3], [1, 0, 0, 1], [None] * 4)
+    assert counter.count(5) == brute_team([(3, 1, None), (3, 0, None), (3, 0, None), (3, 1, None)], 5)
+    assert counter.convolutions - before <= 2
+    counter.sync([2, 3], [0, 1], [None, 2])
+    assert counter.count(3) == brute_team([(2, 0, None), (3, 1, 2)], 3)
+
+
+@pytest.mark.parametrize("edits", [
+    [("slots", 3), ("cap", 3), ("fixed", [0, 0]), ("slots", 4)],
+    [("fixed", [1]), ("cap", 1), ("cap", 2), ("fixed", [])],
+])
+def test_schedule_counter_follows_edits(edits):
+    slots, cap, fixed = 2, 2, []
+    counter = IncrementalScheduleCounter(slots, cap, fixed)
+    for what, value in [(None, None)] + edits:
+        if what == "slots":
+            counter.set_slots(value)
+            slots = value
+        elif what == "cap":
+            counter.set_cap(value)
+            cap = value
+        elif what == "fixed":
+            counter.set_fixed(value)
+            fixed = value
+        for n in range(7):
+            assert counter.count(n) == brute_schedule(n, slots, cap, fixed)
+
+
+def test_schedule_sync_matches_a_fresh_counter():
+    counter = IncrementalScheduleCounter(3, 2)
+    for slots, cap, fixed in [(3, 2, [0]), (4, 2, [0, 3]), (2, 3, [1, 1]), (3, 1, [])]:
+        assert counter.sync(slots, cap, fixed).count(5) == brute_schedule(5, slots, cap, fixed)
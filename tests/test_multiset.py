@@ -0,0 +1,45 @@
+from itertools import permutations
+
+import pytest
+
+from counting import constrained_multiset_count, multiset_permutations_count
+
+
+def brute(counts, forbidden_adjacent=(), forbidden_positions=None, symmetric=False):
+    bad = set(forbidden_adjacent) | ({(b, a) for a, b in forbidden_adjacent} if symmetric else set())
+    banned = forbidden_positions or {}
+    items = [t for t, c in counts.items() for _ in range(c)]
+    return sum(
+        all(pair not in bad for pair in zip(seq, seq[1:])) and all(i not in banned.get(t, ()) for i, t in enumerate(seq))
+        for seq in set(permutations(items))
+    )
+
+
+@pytest.mark.parametrize("counts, adjacent, positions, symmetric", [
+    ({"A": 3, "B": 2, "C": 2}, [], None, False),
+    ({"A": 3, "B": 2, "C": 2}, [("A", "A")], None, False),
+    ({"A": 2, "B": 2, "C": 1}, [("A", "B")], None, False),
+    ({"A": 2, "B": 2, "C": 1}, [("A", "B")], None, True),
+    ({"A": 3, "B": 1, "C": 2}, [("C", "C")], {"A": {0, 5}, "B": {2}}, False),
+    ({"A": 4, "B": 1}, [("A", "A")], None, False),
+    ({"A": 0, "B": 2}, [], {"B": {0}}, False),
+])
+def test_matches_brute_force(counts, adjacent, positions, symmetric):
+    assert constrained_multiset_count(counts, adjacent, positions, symmetric) == \
+        brute(counts, adjacent, positions, symmetric)
+
+
+def test_without_constraints_is_the_multinomial():
+    counts = {"A": 5, "B": 4, "C": 3, "D": 2}
+    assert constrained_multiset_count(counts) == multiset_permutations_count(counts)
+
+
+@pytest.mark.parametrize("args", [
+    ({"A": -1},),
+    ({"A": 2}, [("A", "Z")]),
+    ({"A": 2}, (), {"A": {2}}),
+    ({"A": 2}, (), {"Z": {0}}),
+])
+def test_bad_input(args):
+    with pytest.raises(ValueError):
+        constrained_multiset_count(*args)
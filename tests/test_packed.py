@@ -0,0 +1,31 @@
+import pytest
+
+from counting import team_problem
+from counting.approx import LogCount
+from counting.packed import AdjacencySpec, CountResult, Packed, ScheduleSpec, TeamSpec, from_bytes
+
+
+@pytest.mark.parametrize("value", [
+    AdjacencySpec(6, 4, [(0, 1), (2, 2)]),
+    ScheduleSpec(["A", "B", "C"], 3, 2, [("A", 0)], [("B", 1)]),
+    TeamSpec.from_problem(team_problem("3,4,5", 5, constraints="0+1 >= 2, 1 <= 2 <= 3")),
+    CountResult(b"\0" * 16, -(10 ** 500)),
+    CountResult(b"\1" * 16, LogCount(12.5, 1e-12), {"shard": 3}),
+])
+def test_round_trip(value):
+    again = from_bytes(value.to_bytes())
+    assert again == value and again.digest == value.digest
+
+
+def test_reassigned_field_changes_encoding():
+    a = AdjacencySpec(5, 3, [(0, 1)])
+    before = a.digest
+    a.r = 4
+    assert a.digest != before
+    assert from_bytes(a.to_bytes()).r == 4
+    assert a == AdjacencySpec(5, 4, [(0, 1)])
+
+
+def test_base_is_abstract():
+    with pytest.raises(TypeError):
+        Packed()
@@ -0,0 +1,63 @@
+from collections import Counter
+from itertools import combinations, permutations, product
+
+import pytest
+
+from counting import (
+    arrangements_with_forbidden, count_with_min_requirements, get_executor, parallel_arrangements_with_forbidden,
+    parallel_count_with_min_requirements, parallel_schedule_slots_count, schedule_slots_count, shutdown_executor,
+)
+
+PAIRS = [(0, 1), (1, 2), (3, 3), (4, 0)]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    yield
+    shutdown_executor()
+
+
+@pytest.mark.parametrize("n, r", [(5, 3), (6, 6), (7, 5)])
+def test_adjacency_matches_brute_force(n, r):
+    bad = set(PAIRS)
+    expected = sum(all(p not in bad for p in zip(seq, seq[1:])) for seq in permutations(range(n), r))
+    assert parallel_arrangements_with_forbidden(n, r, PAIRS, workers=2) == expected
+
+
+@pytest.mark.parametrize("r", [0, 3, 5, 8])
+def test_min_requirements_matches_brute_force(r):
+    groups, mins = [3, 2, 4], [1, 0, 2]
+    items = [g for g, size in enumerate(groups) for _ in range(size)]
+    expected = sum(
+        all(c[g] >= m for g, m in enumerate(mins))
+        for c in (Counter(items[i] for i in s) for s in combinations(range(len(items)), r))
+    )
+    assert parallel_count_with_min_requirements(groups, mins, r, workers=2) == expected
+
+
+@pytest.mark.parametrize("slots, cap, fixed", [(3, 2, []), (3, 3, [("A", 0), ("B", 0)]), (4, 1, [("C", 3)])])
+def test_schedule_matches_brute_force(slots, cap, fixed):
+    people = list("ABCDE")
+    pinned = dict(fixed)
+    expected = sum(
+        max(Counter(seats).values()) <= cap and all(pinned.get(p, s) == s for p, s in zip(people, seats))
+        for seats in product(range(slots), repeat=len(people))
+    )
+    assert parallel_schedule_slots_count(people, slots, cap, fixed, workers=2) == expected
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_any_worker_count_gives_the_serial_result(workers):
+    people = [f"P{i}" for i in range(12)]
+    assert parallel_schedule_slots_count(people, 5, 4, [("P0", 1)], workers) == \
+        schedule_slots_count(people, 5, 4, [("P0", 1)])
+    assert parallel_count_with_min_requirements([5, 6, 7, 8], [1, 2, 0, 3], 14, workers) == \
+        count_with_min_requirements([5, 6, 7, 8], [1, 2, 0, 3], 14)
+    assert parallel_arrangements_with_forbidden(10, 7, PAIRS, workers) == arrangements_with_forbidden(10, 7, PAIRS)
+
+
+def test_changing_the_worker_count_replaces_the_pool():
+    first = get_executor(2)
+    assert get_executor(2) is first
+    second = get_executor(3)
+    assert second is not first and list(second.map(abs, [-1, -2])) == [1, 2]
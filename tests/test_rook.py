@@ -0,0 +1,68 @@
+import random
+from collections import Counter
+from itertools import combinations, permutations, product
+
+import pytest
+
+from counting import count_forbidden_permutations, rook_polynomial, schedule_slots_count, schedule_with_forbidden
+
+
+def brute_rooks(cells):
+    cells = sorted(set(cells))
+    poly = [sum(1 for s in combinations(cells, k)
+                if len({r for r, _ in s}) == k and len({c for _, c in s}) == k) for k in range(len(cells) + 1)]
+    while len(poly) > 1 and poly[-1] == 0:
+        poly.pop()
+    return poly
+
+
+def brute_permutations(n, r, forbidden):
+    bad = set(forbidden)
+    return sum(all((item, pos) not in bad for pos, item in enumerate(seq)) for seq in permutations(range(n), r))
+
+
+def brute_schedule(people, slots, cap, forbidden, fixed):
+    bad, pinned = set(forbidden), dict(fixed)
+    return sum(
+        max(Counter(seats).values(), default=0) <= cap
+        and all((p, s) not in bad and pinned.get(p, s) == s for p, s in zip(people, seats))
+        for seats in product(range(slots), repeat=len(people))
+    )
+
+
+def boards(count, rows, cols, seed):
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(rows) for c in range(cols)]
+    return [rng.sample(cells, rng.randint(0, len(cells) // 2)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("cells", boards(12, 4, 5, 1) + [[(0, 0), (0, 1), (1, 0), (1, 1)], [(i, i) for i in range(5)]])
+def test_rook_polynomial(cells):
+    assert rook_polynomial(cells) == brute_rooks(cells)
+
+
+@pytest.mark.parametrize("n, r", [(4, 4), (5, 3), (6, 6), (3, 0), (2, 3)])
+@pytest.mark.parametrize("seed", range(3))
+def test_forbidden_permutations(n, r, seed):
+    forbidden = boards(1, n, max(r, 1), 100 * seed + 10 * n + r)[0]
+    assert count_forbidden_permutations(n, r, forbidden) == brute_permutations(n, r, forbidden)
+
+
+def test_derangements():
+    assert [count_forbidden_permutations(n, n, [(i, i) for i in range(n)]) for n in range(8)] == \
+        [1, 0, 1, 2, 9, 44, 265, 1854]
+
+
+@pytest.mark.parametrize("slots, cap, fixed", [(3, 2, []), (2, 3, [("A", 1)]), (3, 1, []), (4, 2, [("B", 0), ("C", 0)])])
+@pytest.mark.parametrize("seed", range(3))
+def test_schedule_with_forbidden(slots, cap, fixed, seed):
+    people = list("ABCDE")
+    rng = random.Random(seed)
+    forbidden = rng.sample([(p, s) for p in people for s in range(slots)], rng.randint(1, 2 * slots))
+    assert schedule_with_forbidden(people, slots, cap, forbidden, fixed) == \
+        brute_schedule(people, slots, cap, forbidden, fixed)
+
+
+def test_schedule_without_forbidden_cells_matches_core():
+    people = list("ABCDEF")
+    assert schedule_with_forbidden(people, 3, 3, [], [("A", 2)]) == schedule_slots_count(people, 3, 3, [("A", 2)])
@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+from counting import arrangements_with_forbidden, schedule_slots_count
+from counting.shard import (
+    FileCoordinator, RemoteCoordinator, count_job, count_shard, plan_adjacency, plan_schedule, run_worker, serve,
+)
+
+PAIRS = [(0, 1), (1, 2), (3, 3), (4, 0)]
+
+
+def _expire(coord, index):
+    old = time.time() - 2 * coord.lease_seconds
+    os.utime(coord._lease(index), (old, old))
+
+
+@pytest.mark.parametrize("n, r", [(0, 0), (3, 0), (3, 1), (3, 4), (5, 2), (7, 7), (9, 6)])
+def test_adjacency_shards_sum_exactly(tmp_path, n, r):
+    pairs = [p for p in PAIRS if max(p) < n]
+    job = plan_adjacency(n, r, pairs, 3)
+    coord = FileCoordinator.create(str(tmp_path / "job"), job)
+    assert run_worker(coord, "w") == len(job.shards)
+    assert coord.result() == count_job(job) == arrangements_with_forbidden(n, r, pairs)
+
+
+def test_schedule_shards_sum_exactly(tmp_path):
+    people = list("ABCDEFG")
+    job = plan_schedule(people, 4, 3, [("A", 0), ("B", 2)], 8)
+    coord = FileCoordinator.create(str(tmp_path / "job"), job)
+    run_worker(coord, "w")
+    expected = schedule_slots_count(people, 4, 3, [("A", 0), ("B", 2)])
+    assert coord.result() == count_job(job) == expected
+
+
+def test_restart_from_a_partial_job(tmp_path):
+    job = plan_adjacency(9, 8, PAIRS, 4)
+    path = str(tmp_path / "job")
+    first = FileCoordinator.create(path, job)
+    assert run_worker(first, "a", max_shards=5) == 5
+    assert not first.status().complete
+    # A new process reuses the plan and its finished shards.
+    again = FileCoordinator.create(path, job)
+    assert run_worker(again, "b") == len(job.shards) - 5
+    assert again.result() == arrangements_with_forbidden(9, 8, PAIRS)
+
+
+def test_expired_lease_is_taken_over_once(tmp_path):
+    job = plan_adjacency(8, 6, PAIRS, 2)
+    a = FileCoordinator.create(str(tmp_path / "job"), job, lease_seconds=60)
+    assert a.claim("A") == 0
+    value, rows = count_shard(job, 0, a.layer(1))
+    b = FileCoordinator(a.directory, lease_seconds=60)
+    # Shard 0 is all of layer 2 and still leased to A, so layer 3 waits.
+    assert b.claim("B") is None
+    _expire(a, 0)
+    assert not a.renew(0, "B")
+    assert run_worker(b, "B") == len(job.shards)
+    assert not a.renew(0, "A")
+    # A finishes late: the result is checked, not written again.
+    a.complete(0, value, rows, "A")
+    with pytest.raises(ValueError):
+        a.complete(0, value + 1, rows, "A")
+    assert b.result() == arrangements_with_forbidden(8, 6, PAIRS)
+
+
+def test_release_only_drops_own_lease(tmp_path):
+    job = plan_schedule(list("ABCDE"), 3, 2, (), 2)
+    coord = FileCoordinator.create(str(tmp_path / "job"), job)
+    i = coord.claim("A")
+    coord.release(i, "B")
+    assert coord.status().leased == 1
+    coord.release(i, "A")
+    assert coord.status().leased == 0
+
+
+def test_socket_protocol(tmp_path):
+    job = plan_adjacency(9, 9, PAIRS, 4)
+    path = str(tmp_path / "job")
+    FileCoordinator.create(path, job)
+    server = serve(path)
+    try:
+        remote = RemoteCoordinator(*server.server_address)
+        for bad in ("../../x", -1, len(job.shards), True, None):
+            with pytest.raises(ValueError):
+                remote.release(bad)
+        assert run_worker(remote, "r") == len(job.shards)
+        status = remote.status()
+        assert status.complete and status.partial == arrangements_with_forbidden(9, 9, PAIRS)
+        remote.close()
+    finally:
+        server.shutdown()
+        server.server_close()
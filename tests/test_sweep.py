@@ -0,0 +1,55 @@
+import csv
+import io
+import math
+import sys
+from collections import Counter
+from itertools import combinations, permutations, product
+
+from counting import sweep_arrangements_with_forbidden, sweep_schedule_slots_count, sweep_team_count, sweep_to_csv
+
+PAIRS = [(0, 1), (2, 2), (3, 1), (4, 0)]
+
+
+def test_adjacency_sweep_matches_brute_force():
+    bad = set(PAIRS)
+    expected = [sum(all(p not in bad for p in zip(s, s[1:])) for s in permutations(range(6), r)) for r in range(7)]
+    assert sweep_arrangements_with_forbidden(6, PAIRS) == expected
+    assert sweep_arrangements_with_forbidden(6, PAIRS, r_max=3, memory_budget=1) == expected[:4]
+
+
+def test_schedule_grid_matches_brute_force():
+    people = list("ABCD")
+    fixed = [("A", 1)]
+    slot_values, cap_values = [1, 2, 3, 4], [1, 2, 4]
+    grid = sweep_schedule_slots_count(people, slot_values, cap_values, fixed)
+    for slots, row in zip(slot_values, grid):
+        for cap, got in zip(cap_values, row):
+            expected = sum(
+                max(Counter(seats).values()) <= cap and seats[0] == 1
+                for seats in product(range(slots), repeat=len(people))
+            )
+            assert got == expected, (slots, cap)
+
+
+def test_team_sweep_matches_brute_force():
+    sizes, mins, maxs = [2, 3, 2], [1, 0, 0], [2, 2, 1]
+    items = [g for g, size in enumerate(sizes) for _ in range(size)]
+    expected = []
+    for r in range(9):
+        picks = (Counter(items[i] for i in s) for s in combinations(range(len(items)), r))
+        expected.append(sum(all(lo <= c[g] <= hi for g, (lo, hi) in enumerate(zip(mins, maxs))) for c in picks))
+    assert sweep_team_count(sizes, range(9), mins, maxs) == expected
+
+
+def test_csv_keeps_every_digit():
+    big = math.factorial(3000)
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    try:
+        digits = str(big)
+    finally:
+        sys.set_int_max_str_digits(limit)
+    rows = list(csv.reader(io.StringIO(sweep_to_csv("r", [1, 2], grid=[big, 0]))))
+    assert rows == [["r", "count"], ["1", digits], ["2", "0"]]
+    rows = list(csv.reader(io.StringIO(sweep_to_csv("slots", [1], "cap", [1, 2], [[3, big]]))))
+    assert rows == [["slots\\cap", "1", "2"], ["1", "3", digits]]
@@ -0,0 +1,61 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from counting import GroupConstraint, count_with_constraints, count_with_min_requirements, parse_team_constraints
+
+
+def brute(sizes, r, constraints, mins=None, maxs=None):
+    items = [g for g, size in enumerate(sizes) for _ in range(size)]
+    mins = mins or [0] * len(sizes)
+    maxs = maxs or [None] * len(sizes)
+    total = 0
+    for chosen in combinations(range(len(items)), r):
+        c = Counter(items[i] for i in chosen)
+        ok = all(lo <= c[g] and (hi is None or c[g] <= hi) for g, (lo, hi) in enumerate(zip(mins, maxs)))
+        for con in constraints:
+            k = sum(c[g] for g in con.groups)
+            ok = ok and con.min <= k and (con.max is None or k <= con.max)
+        total += ok
+    return total
+
+
+def random_constraints(rng, m, count):
+    out = []
+    for _ in range(count):
+        groups = tuple(sorted(rng.sample(range(m), rng.randint(1, m))))
+        lo = rng.randint(0, 3)
+        hi = rng.choice([None, lo + rng.randint(0, 3)])
+        out.append(GroupConstraint(groups, lo, hi))
+    return out
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_random_constraints_match_brute_force(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 3) for _ in range(rng.randint(2, 4))]
+    constraints = random_constraints(rng, len(sizes), rng.randint(1, 4))
+    for r in range(sum(sizes) + 1):
+        assert count_with_constraints(sizes, r, constraints) == brute(sizes, r, constraints), (sizes, r, constraints)
+
+
+def test_overlapping_constraints_with_group_bounds():
+    sizes = [3, 2, 3, 2]
+    constraints = parse_team_constraints("0+1 >= 2, 1+2 <= 3, 2+3 = 2, 1 <= 0+3 <= 3")
+    for r in range(11):
+        assert count_with_constraints(sizes, r, constraints, [0, 1, 0, 0], [2, None, None, 1]) == \
+            brute(sizes, r, constraints, [0, 1, 0, 0], [2, None, None, 1])
+
+
+def test_no_coupling_matches_min_requirements():
+    sizes, mins = [4, 5, 3, 6], [1, 2, 0, 1]
+    for r in range(19):
+        assert count_with_constraints(sizes, r, (), mins) == count_with_min_requirements(sizes, mins, r)
+
+
+@pytest.mark.parametrize("constraints", [[GroupConstraint((0, 5), 1)], [GroupConstraint((), 1)], [((0, 1), -1)]])
+def test_bad_constraints(constraints):
+    with pytest.raises(ValueError):
+        count_with_constraints([2, 2], 2, constraints)
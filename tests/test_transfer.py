@@ -0,0 +1,64 @@
+import math
+from itertools import product
+
+import numpy as np
+import pytest
+
+from counting import arrangements_with_repetition
+from counting.transfer import _matmul_mod
+
+CASES = [
+    (1, 3, []),
+    (3, 0, [(0, 1)]),
+    (3, 1, [(0, 0)]),
+    (3, 5, [(0, 1), (1, 0)]),
+    (4, 6, [(0, 0), (1, 1), (2, 3)]),
+    (5, 4, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0)]),
+]
+
+
+def brute(n, r, pairs):
+    bad = set(pairs)
+    return sum(all((a, b) not in bad for a, b in zip(seq, seq[1:])) for seq in product(range(n), repeat=r))
+
+
+@pytest.mark.parametrize("n, r, pairs", CASES)
+def test_matches_brute_force(n, r, pairs):
+    expected = brute(n, r, pairs)
+    assert arrangements_with_repetition(n, r, pairs) == expected
+    assert arrangements_with_repetition(n, r, pairs, "mod", 101) == expected % 101
+    approx = arrangements_with_repetition(n, r, pairs, "log10")
+    if expected:
+        assert abs(10 ** approx.log10 / expected - 1) <= approx.rel_error + 1e-15
+    else:
+        assert approx.is_zero
+
+
+def test_mod_matches_exact_for_large_r():
+    p = 2 ** 31 - 1
+    exact = arrangements_with_repetition(6, 300, [(0, 1), (2, 2), (5, 3)])
+    assert arrangements_with_repetition(6, 300, [(0, 1), (2, 2), (5, 3)], "mod", p) == exact % p
+
+
+def test_limb_products_do_not_overflow():
+    # The largest n the guard allows. The low-limb product is just under 2**63
+    # and the high one is nearly p before shifting, so their unreduced sum overflows.
+    p = 2 ** 31 - 1
+    n = 2 ** 63 // ((p - 1) * 0xFFFF)
+    x = 0x7FFEFFFF
+    a = np.full((1, n), p - 1, dtype=np.int64)
+    a[0, 0] -= 4
+    b = np.full((n, 1), x, dtype=np.int64)
+    assert int(_matmul_mod(a, b, p)[0, 0]) == int(a.sum(dtype=object)) * x % p
+
+
+@pytest.mark.parametrize("modulus", [1, 100, 2 ** 31 + 11, 2 ** 32 - 5])
+def test_modulus_rule_matches_batch(modulus):
+    with pytest.raises(ValueError, match="prime below 2\\*\\*31"):
+        arrangements_with_repetition(3, 4, [], "mod", modulus)
+
+
+def test_log10_is_close_for_long_walks():
+    approx = arrangements_with_repetition(3, 200, [(0, 0)], "log10")
+    exact = arrangements_with_repetition(3, 200, [(0, 0)])
+    assert abs(approx.log10 - math.log10(exact)) * math.log(10) <= approx.rel_error + 1e-12
@@ -0,0 +1,77 @@
+import math
+from collections import Counter
+from fractions import Fraction as F
+from itertools import combinations, product
+
+import pytest
+
+from counting import (
+    parse_weight, schedule_slots_count, weighted_schedule, weighted_schedule_count, weighted_team_count,
+    weighted_team_distribution,
+)
+
+SIZES, WEIGHTS, MINS, MAXS = [2, 3, 2], [F(1, 2), F(2), F(3, 4)], [1, 0, 0], [2, 2, 1]
+
+
+def brute_teams(r):
+    items = [g for g, size in enumerate(SIZES) for _ in range(size)]
+    total = free = 0
+    picks = [Counter() for _ in SIZES]
+    for chosen in combinations(range(len(items)), r):
+        c = Counter(items[i] for i in chosen)
+        w = math.prod(WEIGHTS[items[i]] for i in chosen)
+        free += w
+        if all(lo <= c[g] <= hi for g, (lo, hi) in enumerate(zip(MINS, MAXS))):
+            total += w
+            for g in range(len(SIZES)):
+                picks[g][c[g]] += w
+    return total, free, picks
+
+
+@pytest.mark.parametrize("r", range(8))
+def test_team_distribution_matches_brute_force(r):
+    total, free, picks = brute_teams(r)
+    assert weighted_team_count(SIZES, WEIGHTS, r, MINS, MAXS) == total
+    res = weighted_team_distribution(SIZES, WEIGHTS, r, MINS, MAXS)
+    assert (res.total, res.free_total) == (total, free)
+    assert res.probability == (total / free if free else 0)
+    for g, dist in enumerate(res.pmf):
+        for k, p in enumerate(dist):
+            assert p == (picks[g][k] / total if total else 0)
+        assert res.expected[g] == sum(k * p for k, p in enumerate(dist))
+
+
+PEOPLE = list("ABCD")
+PREFS = {"A": [F(2), F(1), F(0)], "B": [F(1, 3), F(1)], "D": [F(5), F(1, 2), F(1)]}
+
+
+@pytest.mark.parametrize("cap, fixed", [(2, []), (3, [("C", 2)]), (1, []), (2, [("B", 1), ("D", 0)])])
+def test_schedule_marginals_match_brute_force(cap, fixed):
+    rows = {p: (PREFS.get(p, []) + [1] * 3)[:3] for p in PEOPLE}
+    pinned = dict(fixed)
+    total = 0
+    marg = Counter()
+    for seats in product(range(3), repeat=len(PEOPLE)):
+        if max(Counter(seats).values()) > cap or any(pinned.get(p, s) != s for p, s in zip(PEOPLE, seats)):
+            continue
+        w = math.prod(rows[p][s] for p, s in zip(PEOPLE, seats))
+        total += w
+        for p, s in zip(PEOPLE, seats):
+            marg[p, s] += w
+    assert weighted_schedule_count(PEOPLE, 3, cap, PREFS, fixed) == total
+    res = weighted_schedule(PEOPLE, 3, cap, PREFS, fixed)
+    assert res.total == total
+    for i, p in enumerate(PEOPLE):
+        assert res.assignment[i] == [marg[p, s] / total if total else 0 for s in range(3)]
+    assert res.expected_load == [sum(res.assignment[i][s] for i in range(len(PEOPLE))) for s in range(3)]
+
+
+def test_unit_weights_count_schedules():
+    people = list("ABCDEF")
+    assert weighted_schedule_count(people, 3, 3, None, [("A", 1)]) == schedule_slots_count(people, 3, 3, [("A", 1)])
+
+
+def test_parse_weight():
+    assert parse_weight(" 2/3 ") == F(2, 3) and parse_weight("0.25", exact=False) == 0.25
+    with pytest.raises(ValueError):
+        parse_weight("-1")